@@ -4,4 +4,6 @@
 Note: this is the package initializer for the main package.
 """
 
-__all__ = ["naive_backtracking", "bonnici_giugno"]
+__all__ = ["naive_backtracking", "bonnici_giugno", "compiled_graph", "domains", "symmetry", "parallel", "matcher", "ordering",
+           "stats", "graph_file", "edge_list", "result_cache",
+           "incremental", "native", "async_matcher", "graph_isomorphism"]
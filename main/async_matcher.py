@@ -0,0 +1,337 @@
+import asyncio
+import os
+from collections import deque
+from contextlib import ExitStack
+from multiprocessing import get_context
+from time import perf_counter
+
+import numpy as np
+
+from bonnici_giugno import BUDGET_EXHAUSTED, SearchResult, compile_target
+from parallel import run_task, search_pattern, start_task, target_pool
+
+# Seconds to keep waiting past a deadline for a worker to report what it found; the workers
+# watch the same deadline, so this only covers getting the result back.
+GRACE = 0.05
+
+# Number of most recent queries the latency figures of metrics() are computed over.
+WINDOW = 1000
+
+
+class Overloaded(RuntimeError):
+    """
+    Raised when a query arrives while every search slot is taken and the wait queue is full.
+    """
+
+
+class AsyncSubgraphMatcher:
+    """
+    asyncio front end for subgraph queries against one or more pre-compiled targets. Searches run
+    on a process pool sharing the targets (see parallel.target_pool), so the event loop only waits.
+    At most max_in_flight queries are searched at once; a query that times out or is cancelled
+    keeps its slot until its worker tasks have stopped, which they do within a few thousand search
+    states as each query has its own cancellation flag. Further queries wait for a slot, in
+    arrival order, in a queue of at most max_queued; beyond that they are rejected with Overloaded.
+    Use as an async context manager, or call start() and close().
+    Args:
+        targets: The larger graph (NetworkX Graph object or CompiledTarget), or a dict from name to
+            such graphs. A single graph is named None.
+        workers: Number of worker processes; defaults to os.cpu_count().
+        max_in_flight: Queries searched at once; defaults to twice the number of workers.
+        max_queued: Queries allowed to wait for a slot; 0 rejects a query as soon as all slots are taken.
+        timeout: Default deadline of every query in seconds, counted from the call (so time spent
+            queued counts too); None for no deadline.
+        node_label, edge_label: Optional labels the targets are compiled with (see CompiledTarget).
+        ordering, mode: As for bonnici_giugno_subgraph_isomorphism.
+        fanout: Subtrees of one embeddings() query searched at once. With 1, embeddings arrive in the
+            order of iter_subgraph_isomorphisms.
+    """
+
+    def __init__(self, targets, workers=None, max_in_flight=None, max_queued=64, timeout=None, node_label=None,
+                 edge_label=None, ordering="gcf", mode="monomorphism", fanout=1):
+        if not isinstance(targets, dict):
+            targets = {None: targets}
+        self.targets = {name: compile_target(G, node_label, edge_label) for name, G in targets.items()}
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or 2 * self.workers
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.ordering = ordering
+        self.mode = mode
+        self.fanout = fanout
+        self.in_flight = 0
+        self.queued = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.outcomes = {"completed": 0, "timed_out": 0, "cancelled": 0, "failed": 0}
+        self._latencies = deque(maxlen=WINDOW)
+        self._waits = deque(maxlen=WINDOW)
+        self._slots = None
+        self._free = None
+        self._flags = None
+        self._pool = None
+        self._stack = None
+
+    async def start(self):
+        """
+        Shares the targets with a new process pool; worker processes start with the first queries.
+        """
+        if self._pool is None:
+            context = get_context()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._free = list(range(self.max_in_flight))
+            self._flags = context.RawArray("b", self.max_in_flight)
+            self._stack = ExitStack()
+            self._pool = self._stack.enter_context(target_pool(self.targets, self.workers, flags=self._flags))
+
+    async def close(self):
+        """
+        Cancels outstanding work and shuts the pool down, without blocking the event loop.
+        """
+        if self._pool is not None:
+            stack, self._pool = self._stack, None
+            await asyncio.get_running_loop().run_in_executor(None, stack.close)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def match(self, H, target=None, timeout=None):
+        """
+        Looks for one embedding of H, like SubgraphMatcher.search.
+        Args:
+            H: The smaller graph (NetworkX Graph object).
+            target: Name of the target to search; may be omitted when there is only one.
+            timeout: Deadline of this query in seconds, instead of the default.
+        Returns:
+            A SearchResult. A deadline that passes, even before the query left the queue, gives
+            BUDGET_EXHAUSTED with stopped "deadline".
+        Raises:
+            Overloaded: If the query can neither be searched nor queued.
+        """
+        name, compiled = self._target(target)
+        deadline = self._deadline(timeout)
+        started = perf_counter()
+        slot = await self._admit(started, deadline)
+        if slot is None:
+            return SearchResult(BUDGET_EXHAUSTED, None, {}, 0, "deadline")
+        outcome = "cancelled"
+        futures = []
+        try:
+            future = self._submit(futures, search_pattern, name, H, self._remaining(deadline), self.ordering,
+                                  self.mode, slot)
+            if not await self._wait({future}, deadline):
+                outcome = "timed_out"
+                return SearchResult(BUDGET_EXHAUSTED, None, {}, 0, "deadline")
+            result = future.result()
+            result.mapping = compiled.translate(result.mapping)
+            result.partial = compiled.translate(result.partial)
+            outcome = "timed_out" if result.stopped is not None else "completed"
+            return result
+        except Exception:
+            outcome = "failed"
+            raise
+        finally:
+            self._finish(started, outcome, slot, futures)
+
+    def embeddings(self, H, target=None, timeout=None, symmetry_breaking=False):
+        """
+        Streams every embedding of H. The search runs in chunks of parallel.SPLIT_STATES states
+        per worker task, and the next chunk of a subtree is only started once the caller has
+        consumed the previous one, so a slow consumer holds back its own query and no other.
+        Leaving the async for loop early (or calling aclose()) cancels the remaining work.
+        Args:
+            H, target, timeout: As for match.
+            symmetry_breaking: If True, yield each distinct subgraph of G once (see iter_subgraph_isomorphisms).
+        Returns:
+            An EmbeddingStream yielding mappings (dicts from H nodes to G nodes).
+        Raises:
+            Overloaded: When iteration starts, if the query can neither be searched nor queued.
+        """
+        stream = EmbeddingStream()
+        stream._generator = self._embeddings(stream, target, H, self._deadline(timeout), symmetry_breaking)
+        return stream
+
+    def metrics(self):
+        """
+        Returns figures for sizing the pool: the current in_flight and queued counts with their
+        limits, totals of submitted and rejected queries and of outcomes ("completed", "timed_out",
+        "cancelled", "failed"), and summaries ("count", "mean", "p50", "p95", "p99", "max", in
+        seconds) of the latency of the last WINDOW queries and of the time they spent queued.
+        """
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_in_flight": self.max_in_flight,
+            "max_queued": self.max_queued,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "outcomes": dict(self.outcomes),
+            "latency": _summary(self._latencies),
+            "queue_wait": _summary(self._waits),
+        }
+
+    async def _embeddings(self, stream, target, H, deadline, symmetry_breaking):
+        name, compiled = self._target(target)
+        started = perf_counter()
+        slot = await self._admit(started, deadline)
+        if slot is None:
+            stream.stopped = "deadline"
+            return
+        outcome = "cancelled"
+        futures = []
+        running = set()
+        try:
+            if len(H.nodes) == 0:
+                yield {}
+            else:
+                running.add(self._submit(futures, start_task, name, H, self._remaining(deadline), self.ordering,
+                                         self.mode, symmetry_breaking, "all", slot))
+                plan, tasks = None, []
+                while running:
+                    done = await self._wait(running, deadline)
+                    if not done:
+                        stream.stopped = "deadline"
+                        break
+                    running -= done
+                    late = deadline is not None and perf_counter() > deadline
+                    for future in done:
+                        if plan is None:
+                            plan, found, unexplored = future.result()
+                            if plan is None:
+                                break
+                        else:
+                            found, unexplored = future.result()
+                        # The deepest unexplored subtree comes last; taking it first keeps the sequential order.
+                        tasks += unexplored
+                        pattern = plan[0]
+                        for mapping in found:
+                            yield {pattern.nodes[p]: compiled.nodes[c] for p, c in enumerate(mapping)}
+                    if late:
+                        stream.stopped = "deadline"
+                        break
+                    while tasks and len(running) < self.fanout:
+                        prefix, roots = tasks.pop()
+                        running.add(self._submit(futures, run_task, plan, prefix, roots, "all",
+                                                 self._remaining(deadline), name, slot))
+            outcome = "timed_out" if stream.stopped is not None else "completed"
+        except Exception:
+            outcome = "failed"
+            raise
+        finally:
+            self._finish(started, outcome, slot, futures)
+
+    def _target(self, name):
+        # Returns (name, compiled target); the name may be omitted when there is only one target.
+        if name is None and len(self.targets) == 1:
+            name = next(iter(self.targets))
+        if name not in self.targets:
+            raise ValueError(f"Unknown target {name!r}")
+        return name, self.targets[name]
+
+    def _deadline(self, timeout):
+        timeout = timeout if timeout is not None else self.timeout
+        return perf_counter() + timeout if timeout is not None else None
+
+    @staticmethod
+    def _remaining(deadline):
+        return max(deadline - perf_counter(), 0) if deadline is not None else None
+
+    async def _admit(self, started, deadline):
+        """
+        Waits for a search slot. Returns its index in the cancellation flags, or None if the deadline
+        passed first.
+        Raises:
+            Overloaded: If all slots are taken and the queue is full.
+        """
+        if self._pool is None:
+            raise RuntimeError("AsyncSubgraphMatcher is not started; use async with or call start()")
+        self.submitted += 1
+        if self._slots.locked() and self.queued >= self.max_queued:
+            self.rejected += 1
+            raise Overloaded(f"{self.in_flight} queries in flight and {self.queued} queued")
+        self.queued += 1
+        try:
+            if deadline is None:
+                await self._slots.acquire()
+            else:
+                await asyncio.wait_for(self._slots.acquire(), self._remaining(deadline))
+        except asyncio.TimeoutError:
+            self.outcomes["timed_out"] += 1
+            self._latencies.append(perf_counter() - started)
+            return None
+        finally:
+            self.queued -= 1
+            self._waits.append(perf_counter() - started)
+        self.in_flight += 1
+        slot = self._free.pop()
+        self._flags[slot] = 0
+        return slot
+
+    def _finish(self, started, outcome, slot, futures):
+        """
+        Records the outcome of a query and cancels its outstanding worker tasks (the executor
+        futures in futures). The slot is released once those tasks have actually stopped, so
+        abandoned searches count towards max_in_flight until then.
+        """
+        self.outcomes[outcome] += 1
+        self._latencies.append(perf_counter() - started)
+        running = [future for future in futures if not future.cancel() and not future.done()]
+        if not running:
+            self._release(slot)
+            return
+        self._flags[slot] = 1
+        stopped = asyncio.ensure_future(asyncio.wait([asyncio.wrap_future(future) for future in running]))
+        stopped.add_done_callback(lambda _: self._release(slot))
+
+    def _release(self, slot):
+        self.in_flight -= 1
+        self._free.append(slot)
+        self._slots.release()
+
+    def _submit(self, futures, function, *args):
+        # Keeps the executor future in futures: cancelling the asyncio wrapper does not stop a running task.
+        future = self._pool.submit(function, *args)
+        futures.append(future)
+        return asyncio.wrap_future(future)
+
+    async def _wait(self, futures, deadline):
+        """
+        Waits until one of futures is done, or shortly after the deadline. Returns the done futures.
+        """
+        timeout = self._remaining(deadline) + GRACE if deadline is not None else None
+        done, _ = await asyncio.wait(futures, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        return done
+
+
+class EmbeddingStream:
+    """
+    Async iterator over the embeddings of one query (see AsyncSubgraphMatcher.embeddings).
+    Attributes:
+        stopped: "deadline" if the deadline ended the stream before the search space was exhausted, else None.
+    """
+
+    def __init__(self):
+        self.stopped = None
+        self._generator = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self._generator.__anext__()
+
+    async def aclose(self):
+        await self._generator.aclose()
+
+
+def _summary(samples):
+    if not samples:
+        return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99]).tolist()
+    return {"count": len(samples), "mean": float(np.mean(samples)), "p50": p50, "p95": p95, "p99": p99,
+            "max": max(samples)}
@@ -0,0 +1,471 @@
+import argparse
+import csv
+import gc
+import json
+import platform
+import random
+import sys
+from itertools import product
+from statistics import mean, median, stdev
+from time import perf_counter
+
+import networkx as nx
+import numpy as np
+
+from bonnici_giugno import (NOT_FOUND, bonnici_giugno_subgraph_isomorphism, count_subgraph_isomorphisms,
+                            search_subgraph_isomorphism)
+from compiled_graph import LAYOUTS, CompiledTarget
+from naive_backtracking import naive_subgraph_isomorphism
+from stats import SearchStats
+
+ALGORITHMS = {
+    "ri": bonnici_giugno_subgraph_isomorphism,
+    "naive": naive_subgraph_isomorphism,
+}
+
+# The default parameter grid; "quick" is small enough for a smoke run.
+GRIDS = {
+    "default": {
+        "families": ["er", "grid", "scale_free", "regular"],
+        "sizes": [30, 100, 300],
+        "densities": [0.05, 0.2],
+        "pattern_sizes": [5, 8],
+    },
+    "quick": {
+        "families": ["er", "grid", "scale_free", "regular"],
+        "sizes": [16],
+        "densities": [0.2],
+        "pattern_sizes": [4],
+    },
+    # Sparse to dense families for comparing the adjacency layouts (see compare_layouts).
+    "layouts": {
+        "families": ["path", "cycle", "grid", "complete", "er"],
+        "sizes": [16, 100, 400, 1000],
+        "densities": [0.4],
+        "pattern_sizes": [5],
+    },
+    # Sparse and dense targets on both sides of the node limits of choose_layout; random regular
+    # graphs of degree 5 to 80, since complete and Erdos-Renyi graphs this large take too long to build.
+    "layouts-large": {
+        "families": ["path", "grid", "regular"],
+        "sizes": [10000, 20000, 40000],
+        "densities": [0.0005, 0.002],
+        "pattern_sizes": [5],
+    },
+}
+
+# Families whose shape does not depend on the density.
+SHAPES = ("grid", "path", "cycle", "complete")
+
+# The naive matcher is only timed on targets with at most this many nodes; it prunes partial
+# assignments but has no ordering or domains, so absent patterns in larger graphs take minutes.
+NAIVE_NODES = 30
+
+# Search states allowed when checking that a candidate absent pattern really is absent.
+ABSENT_STATES = 200000
+
+# Embeddings counted per search when comparing layouts.
+LAYOUT_LIMIT = 5000
+
+# Fields identifying a measurement, used to match results against a baseline.
+KEY_FIELDS = ("family", "n", "density", "k", "pattern", "algorithm")
+
+
+def make_graph(family, n, density, seed):
+    """
+    Builds a target graph with integer nodes.
+    Args:
+        family: "er" (Erdos-Renyi), "grid" (square 2D grid), "scale_free" (Barabasi-Albert),
+            "regular" (random regular), "path", "cycle" or "complete"; the density is ignored for
+            the families in SHAPES.
+        n: Number of nodes (rounded down to a square for grids).
+        density: Edge density; sets p for "er", the attachment count for "scale_free" and the degree for "regular".
+        seed: Random seed.
+    """
+    if family == "er":
+        return nx.gnp_random_graph(n, density, seed=seed)
+    if family == "grid":
+        side = max(2, int(np.sqrt(n)))
+        return nx.convert_node_labels_to_integers(nx.grid_2d_graph(side, side))
+    if family == "scale_free":
+        return nx.barabasi_albert_graph(n, min(n - 1, max(1, round(density * n / 2))), seed=seed)
+    if family == "regular":
+        degree = min(n - 1, max(2, round(density * (n - 1))))
+        if n * degree % 2:
+            degree -= 1
+        return nx.random_regular_graph(degree, n, seed=seed)
+    if family == "path":
+        return nx.path_graph(n)
+    if family == "cycle":
+        return nx.cycle_graph(n)
+    if family == "complete":
+        return nx.complete_graph(n)
+    raise ValueError(f"Unknown graph family: {family}")
+
+
+def planted_pattern(G, k, seed):
+    """
+    Returns a connected pattern on k nodes that occurs in G: the subgraph induced by a randomly
+    grown connected node set, relabelled to shuffled integers. None if G has no such set.
+    """
+    rng = random.Random(seed)
+    starts = list(G.nodes)
+    rng.shuffle(starts)
+    for start in starts:
+        chosen, frontier = [start], set(G.neighbors(start))
+        while len(chosen) < k and frontier:
+            v = rng.choice(sorted(frontier))
+            chosen.append(v)
+            frontier |= set(G.neighbors(v))
+            frontier -= set(chosen)
+        if len(chosen) == k:
+            labels = list(range(k))
+            rng.shuffle(labels)
+            return nx.relabel_nodes(G.subgraph(chosen), dict(zip(chosen, labels)))
+    return None
+
+
+def absent_pattern(G, k, seed):
+    """
+    Returns a pattern on k nodes that does not occur in G: a planted pattern with random extra
+    edges, added one at a time until a bounded search proves the pattern absent. None if that fails.
+    """
+    rng = random.Random(seed)
+    H = planted_pattern(G, k, seed)
+    if H is None:
+        return None
+    H = nx.Graph(H)
+    missing = [(u, v) for u in range(k) for v in range(u + 1, k) if not H.has_edge(u, v)]
+    rng.shuffle(missing)
+    for u, v in missing:
+        H.add_edge(u, v)
+        if search_subgraph_isomorphism(G, H, max_states=ABSENT_STATES).status == NOT_FOUND:
+            return H
+    return None
+
+
+def benchmark_cases(grid, seed=0):
+    """
+    Yields one case dict per point of the grid and pattern kind ("planted" or "absent"), with the
+    graphs under "G" and "H". Every graph is derived from seed, so repeated runs see the same inputs.
+    """
+    for index, (family, n, density, k) in enumerate(product(grid["families"], grid["sizes"], grid["densities"],
+                                                             grid["pattern_sizes"])):
+        if family in SHAPES and density != grid["densities"][0]:
+            continue
+        case_seed = seed * 100003 + index
+        G = make_graph(family, n, density, case_seed)
+        for kind, build in (("planted", planted_pattern), ("absent", absent_pattern)):
+            H = build(G, k, case_seed)
+            if H is None:
+                continue
+            yield {"family": family, "n": len(G), "density": None if family in SHAPES else density, "k": k,
+                   "pattern": kind, "edges": G.number_of_edges(), "G": G, "H": H}
+
+
+def time_call(function, repeats, warmup):
+    """
+    Times function() with perf_counter after warmup untimed calls, with garbage collection
+    paused during each timed call (as timeit does).
+    Returns:
+        (list of samples in seconds, result of the last call).
+    """
+    result = None
+    for _ in range(warmup):
+        result = function()
+    samples = []
+    for _ in range(repeats):
+        gc.collect()
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start = perf_counter()
+            result = function()
+            samples.append(perf_counter() - start)
+        finally:
+            if enabled:
+                gc.enable()
+    return samples, result
+
+
+def confidence_interval(samples, level=0.95, resamples=2000, seed=0):
+    """
+    Percentile bootstrap confidence interval for the median of samples, with a fixed seed.
+    """
+    if len(samples) < 2:
+        return samples[0], samples[0]
+    rng = np.random.default_rng(seed)
+    medians = np.median(rng.choice(samples, (resamples, len(samples))), axis=1)
+    low, high = np.quantile(medians, [(1 - level) / 2, (1 + level) / 2])
+    return float(low), float(high)
+
+
+def run_benchmarks(grid, algorithms=("ri", "naive"), repeats=7, warmup=1, seed=0, log=None):
+    """
+    Runs every algorithm on every case of the grid.
+    Args:
+        grid: Dict with "families", "sizes", "densities" and "pattern_sizes" lists (see GRIDS).
+        algorithms: Names from ALGORITHMS; naive is skipped on targets above NAIVE_NODES.
+        repeats: Timed samples per measurement.
+        warmup: Untimed calls before the samples.
+        seed: Seed for the graphs and the bootstrap.
+        log: Optional callable receiving a progress line per measurement.
+    Returns:
+        A dict with "meta" (environment and settings) and "results" (one dict per measurement).
+    """
+    results = []
+    for case in benchmark_cases(grid, seed):
+        G, H = case["G"], case["H"]
+        for name in algorithms:
+            if name == "naive" and len(G) > NAIVE_NODES:
+                continue
+            function = ALGORITHMS[name]
+            samples, mapping = time_call(lambda: function(G, H), repeats, warmup)
+            stats = SearchStats()
+            function(G, H, stats=stats)
+            row = measurement(case, name, samples, mapping is not None, stats.states, seed)
+            results.append(row)
+            if log is not None:
+                log(f"{name:5} {case['family']:10} n={case['n']:<4} density={case['density']} k={case['k']} "
+                    f"{case['pattern']:7} median={row['median'] * 1e3:.3f} ms states={row['states']}")
+    return {"meta": environment(grid, repeats, warmup, seed), "results": results}
+
+
+def measurement(case, algorithm, samples, found, states, seed):
+    """
+    Returns the result dict of one measurement: the case fields, the algorithm, whether an
+    embedding was found, the states explored and summary statistics of the samples.
+    """
+    low, high = confidence_interval(samples, seed=seed)
+    row = {field: case[field] for field in ("family", "n", "density", "k", "pattern", "edges")}
+    row.update(algorithm=algorithm, found=found, states=states, median=median(samples), ci_low=low, ci_high=high,
+               mean=mean(samples), stdev=stdev(samples) if len(samples) > 1 else 0.0, samples=samples)
+    return row
+
+
+def environment(grid, repeats, warmup, seed, **settings):
+    """
+    Returns the "meta" dict of a report: versions, platform and the settings of the run.
+    """
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "networkx": nx.__version__,
+        "numpy": np.__version__,
+        "grid": grid,
+        "repeats": repeats,
+        "warmup": warmup,
+        "seed": seed,
+        **settings,
+    }
+
+
+def compare_layouts(grid, repeats=5, warmup=1, seed=0, limit=LAYOUT_LIMIT, log=None):
+    """
+    Times the RI search on every case of the grid with the target compiled in each adjacency
+    layout (see CompiledTarget.layout), counting up to limit embeddings so that the search loop
+    dominates. Targets are compiled once per layout outside the timing, as a SubgraphMatcher
+    would keep them, and the warmup calls build the rows a layout caches.
+    Args:
+        grid, repeats, warmup, seed, log: As for run_benchmarks.
+        limit: Embeddings counted per search.
+    Returns:
+        A report like run_benchmarks, with one measurement per case and layout (algorithm
+        "ri-sets", "ri-csr" or "ri-bits") and one with algorithm "ri", a copy of the measurement of
+        the layout choose_layout picks. Every measurement names its layout under "layout".
+    """
+    results = []
+    for case in benchmark_cases(grid, seed):
+        G, H = case["G"], case["H"]
+        chosen = CompiledTarget(G).layout
+        for layout in LAYOUTS:
+            target = CompiledTarget(G, layout=layout)
+            samples, count = time_call(lambda: count_subgraph_isomorphisms(target, H, limit=limit), repeats, warmup)
+            stats = SearchStats()
+            count_subgraph_isomorphisms(target, H, limit=limit, stats=stats)
+            row = measurement(case, f"ri-{layout}", samples, count > 0, stats.states, seed)
+            row["layout"] = layout
+            results.append(row)
+            if layout == chosen:
+                results.append(dict(row, algorithm="ri"))
+            if log is not None:
+                log(f"{layout:4} {case['family']:10} n={case['n']:<4} density={case['density']} k={case['k']} "
+                    f"{case['pattern']:7} median={row['median'] * 1e3:.3f} ms{' (chosen)' if layout == chosen else ''}")
+    return {"meta": environment(grid, repeats, warmup, seed, limit=limit), "results": results}
+
+
+def layout_summary(results):
+    """
+    Sums the median runtimes of a compare_layouts report per family and algorithm.
+    Returns:
+        A dict from family (and "all" for the whole grid) to a dict from algorithm to total seconds.
+    """
+    totals = {}
+    for row in results:
+        for family in (row["family"], "all"):
+            by_algorithm = totals.setdefault(family, {})
+            by_algorithm[row["algorithm"]] = by_algorithm.get(row["algorithm"], 0.0) + row["median"]
+    if "all" in totals:
+        totals["all"] = totals.pop("all")
+    return totals
+
+
+def write_results(report, path):
+    """
+    Writes a run_benchmarks report as JSON, or as CSV (one row per measurement, samples joined
+    by spaces) when path ends in .csv.
+    """
+    if path.endswith(".csv"):
+        fields = list(KEY_FIELDS) + ["edges", "found", "states", "median", "ci_low", "ci_high", "mean", "stdev",
+                                     "samples"]
+        with open(path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fields, extrasaction="ignore")
+            writer.writeheader()
+            for row in report["results"]:
+                writer.writerow(dict(row, samples=" ".join(map(repr, row["samples"]))))
+    else:
+        with open(path, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+def load_results(path):
+    """
+    Reads the measurements written by write_results (JSON or CSV).
+    Returns:
+        A list of result dicts.
+    """
+    if not path.endswith(".csv"):
+        with open(path) as file:
+            return json.load(file)["results"]
+    rows = []
+    with open(path, newline="") as file:
+        for row in csv.DictReader(file):
+            row["n"], row["k"], row["edges"], row["states"] = (int(row[f]) for f in ("n", "k", "edges", "states"))
+            row["density"] = float(row["density"]) if row["density"] else None
+            row["found"] = row["found"] == "True"
+            for field in ("median", "ci_low", "ci_high", "mean", "stdev"):
+                row[field] = float(row[field])
+            row["samples"] = [float(sample) for sample in row["samples"].split()]
+            rows.append(row)
+    return rows
+
+
+def compare(results, baseline, threshold=0.1):
+    """
+    Compares measurements with a baseline run.
+    A measurement regresses when its median is more than threshold (relative) above the baseline
+    median and its confidence interval lies entirely above the baseline's, so noise alone does
+    not trip it. Improvements are reported the same way in the other direction.
+    Returns:
+        A list of (key, baseline median, median, ratio, verdict) tuples, verdict being
+        "regression", "improvement" or "same", for the measurements present in both runs.
+    """
+    base = {tuple(row[field] for field in KEY_FIELDS): row for row in baseline}
+    rows = []
+    for row in results:
+        key = tuple(row[field] for field in KEY_FIELDS)
+        old = base.get(key)
+        if old is None:
+            continue
+        ratio = row["median"] / old["median"] if old["median"] > 0 else float("inf")
+        verdict = "same"
+        if ratio > 1 + threshold and row["ci_low"] > old["ci_high"]:
+            verdict = "regression"
+        elif ratio < 1 - threshold and row["ci_high"] < old["ci_low"]:
+            verdict = "improvement"
+        rows.append((key, old["median"], row["median"], ratio, verdict))
+    return rows
+
+
+def plot_results(results, path):
+    """
+    Saves median runtime and states explored against the size of G, one line per family,
+    algorithm and pattern kind. Needs matplotlib, which the benchmark itself does not.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    series = {}
+    for row in results:
+        label = f"{row['family']} {row['algorithm']} {row['pattern']} k={row['k']} d={row['density']}"
+        series.setdefault(label, []).append(row)
+    fig, (time_axis, states_axis) = plt.subplots(1, 2, figsize=(18, 8))
+    for label, rows in sorted(series.items()):
+        rows.sort(key=lambda row: row["n"])
+        sizes = [row["n"] for row in rows]
+        style = "--" if rows[0]["algorithm"] == "naive" else "-"
+        time_axis.errorbar(sizes, [row["median"] for row in rows], linestyle=style, marker="o", label=label,
+                           yerr=[[row["median"] - row["ci_low"] for row in rows],
+                                 [row["ci_high"] - row["median"] for row in rows]])
+        states_axis.plot(sizes, [max(row["states"], 1) for row in rows], linestyle=style, marker="o", label=label)
+    time_axis.set_xlabel("Size of G")
+    time_axis.set_ylabel("Median runtime (seconds)")
+    time_axis.set_yscale("log")
+    time_axis.grid(True)
+    states_axis.set_xlabel("Size of G")
+    states_axis.set_ylabel("States explored")
+    states_axis.set_yscale("log")
+    states_axis.grid(True)
+    states_axis.legend(fontsize="x-small", ncol=2)
+    fig.tight_layout()
+    fig.savefig(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproducible subgraph matching benchmarks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmark grid and write the results")
+    run.add_argument("output", help="results file (.json or .csv)")
+    run.add_argument("--grid", choices=sorted(GRIDS), default="default")
+    run.add_argument("--algorithms", default="ri,naive", help="comma-separated names from: " + ", ".join(ALGORITHMS))
+    run.add_argument("--repeats", type=int, default=7)
+    run.add_argument("--warmup", type=int, default=1)
+    run.add_argument("--seed", type=int, default=0)
+
+    check = commands.add_parser("compare", help="compare results with a baseline; exits 1 on a regression")
+    check.add_argument("results")
+    check.add_argument("baseline")
+    check.add_argument("--threshold", type=float, default=0.1, help="relative slowdown tolerated (default 0.1)")
+
+    layouts = commands.add_parser("layouts", help="time every adjacency layout and write the results")
+    layouts.add_argument("output", help="results file (.json or .csv)")
+    layouts.add_argument("--grid", choices=sorted(GRIDS), default="layouts")
+    layouts.add_argument("--repeats", type=int, default=5)
+    layouts.add_argument("--warmup", type=int, default=1)
+    layouts.add_argument("--seed", type=int, default=0)
+    layouts.add_argument("--limit", type=int, default=LAYOUT_LIMIT, help="embeddings counted per search")
+
+    plot = commands.add_parser("plot", help="plot results to an image (needs matplotlib)")
+    plot.add_argument("results")
+    plot.add_argument("output", help="image file, e.g. benchmark.png")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        report = run_benchmarks(GRIDS[args.grid], args.algorithms.split(","), args.repeats, args.warmup, args.seed,
+                                log=print)
+        write_results(report, args.output)
+        return 0
+    if args.command == "compare":
+        rows = compare(load_results(args.results), load_results(args.baseline), args.threshold)
+        for key, old, new, ratio, verdict in rows:
+            print(f"{verdict:11} {' '.join(map(str, key)):55} {old * 1e3:10.3f} ms -> {new * 1e3:10.3f} ms "
+                  f"({ratio:.2f}x)")
+        regressions = sum(verdict == "regression" for *_, verdict in rows)
+        print(f"{len(rows)} measurements compared, {regressions} regressions")
+        return 1 if regressions else 0
+    if args.command == "layouts":
+        report = compare_layouts(GRIDS[args.grid], args.repeats, args.warmup, args.seed, args.limit, log=print)
+        write_results(report, args.output)
+        names = ["ri"] + [f"ri-{layout}" for layout in LAYOUTS]
+        print(f"{'family':10}" + "".join(f"{name:>12}" for name in names))
+        for family, totals in layout_summary(report["results"]).items():
+            print(f"{family:10}" + "".join(f"{totals[name] * 1e3:9.2f} ms" for name in names))
+        return 0
+    plot_results(load_results(args.results), args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+import time
+import networkx as nx
+
+from ordering import greatest_constraint_first
+
+
+def greatest_constraint_first_reference(pattern_graph):
+    """
+    The original greatest_constraint_first, which rescans every pair of vertices each round.
+    Kept as the baseline for the benchmark below.
+    """
+    ordered_vertices = []
+    remaining_vertices = set(pattern_graph.nodes)
+    start_vertex = max(remaining_vertices, key=lambda v: pattern_graph.degree[v])
+    ordered_vertices.append(start_vertex)
+    remaining_vertices.remove(start_vertex)
+    while remaining_vertices:
+        next_vertex = max(
+            remaining_vertices,
+            key=lambda v: (
+                sum(1 for u in ordered_vertices if (u, v) in pattern_graph.edges or (v, u) in pattern_graph.edges),
+                sum(1 for u in remaining_vertices if (v, u) in pattern_graph.edges or (u, v) in pattern_graph.edges),
+                pattern_graph.degree[v]
+            )
+        )
+        ordered_vertices.append(next_vertex)
+        remaining_vertices.remove(next_vertex)
+    return ordered_vertices
+
+
+def benchmark_ordering():
+    patterns = {
+        "path": lambda size: nx.path_graph(size),
+        "random": lambda size: nx.gnp_random_graph(size, 0.05, seed=42),
+        "grid": lambda size: nx.grid_2d_graph(int(size ** 0.5), int(size ** 0.5)),
+    }
+    for name, make in patterns.items():
+        for size in (50, 100, 150, 200):
+            H = make(size)
+            start = time.perf_counter()
+            expected = greatest_constraint_first_reference(H)
+            reference_time = time.perf_counter() - start
+            start = time.perf_counter()
+            order = greatest_constraint_first(H)
+            incremental_time = time.perf_counter() - start
+            assert order == expected
+            print(f"{name:>6} |V_H|={len(H):4d}: reference {reference_time:8.4f}s, "
+                  f"incremental {incremental_time:8.5f}s, speedup {reference_time / incremental_time:7.1f}x")
+
+
+if __name__ == "__main__":
+    benchmark_ordering()
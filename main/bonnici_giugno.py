@@ -1,60 +1,648 @@
-def bonnici_giugno_subgraph_isomorphism(G, H):
+from contextlib import closing
+from time import perf_counter
+
+import numpy as np
+
+import native
+from compiled_graph import CompiledTarget, bits_to_indices, edge_label_tuple, intersect_rows, labels_fit, pack_bits
+from domains import compute_domains
+from ordering import matching_order
+from stats import phase
+
+# Candidates a depth scans between deadline and cancel checks; accepted states are checked every 1024.
+SCAN_CANDIDATES = 4096
+
+
+def compile_target(G, node_label=None, edge_label=None):
+    """
+    Returns G as a CompiledTarget, compiling it unless it already is one.
+    Raises:
+        ValueError: If G was compiled with other labels than the ones requested.
+    """
+    if not isinstance(G, CompiledTarget):
+        return CompiledTarget(G, node_label, edge_label)
+    if (node_label, edge_label) != (None, None) and (node_label, edge_label) != (G.node_label, G.edge_label):
+        raise ValueError("G was compiled with different node_label/edge_label")
+    return G
+
+
+def ri_search(target, pattern, order, domains, conditions=(), deadline=None, cancel=None, max_states=None,
+              prefix=(), roots=None, layout=None, edge_match=None, induced=False, report=None, stats=None):
+    """
+    Explicit-stack RI search over compiled graphs.
+    The mapping, the inverse mapping and the per-depth candidate cursors live in lists that
+    are allocated once, so the loop below neither recurses nor builds lists per state.
+    Args:
+        target: CompiledTarget for the larger graph.
+        pattern: CompiledTarget for the smaller graph.
+        order: Compiled pattern ids in matching order.
+        domains: Candidate bitsets per compiled pattern id (see compute_domains).
+        conditions: Pairs (u, v) of pattern ids whose images must satisfy image(u) < image(v).
+        deadline: Optional time.perf_counter() value after which the search stops.
+        cancel: Optional object with an is_set() method (e.g. an Event); the search stops once it is set.
+        max_states: Optional number of states after which the search stops and hands back the unexplored work.
+        prefix: Images of order[:len(prefix)], already known to form a feasible partial mapping.
+        roots: Optional candidates for order[len(prefix)]; each one is fully checked, so any superset will do.
+        layout: How candidates are found, defaulting to target.layout (see CompiledTarget). With "bits"
+            the candidates of each depth are computed at once by ANDing the packed adjacency rows of all
+            mapped neighbor images with the domain and the complement of the used nodes. With "csr" they
+            are the galloping intersection of the sorted rows of those images (successors or predecessors
+            in a directed graph). With "sets" the row of the image with the smallest degree is scanned
+            and each candidate is looked up in the neighbor sets of the other images.
+        edge_match: Optional callable edge_match(G_edge_attrs, H_edge_attrs) -> bool checked on every
+            pattern edge to a mapped neighbor; needs both graphs to be compiled from NetworkX.
+        induced: If True, also require non-edges of the pattern to map to non-edges of G. A candidate c
+            passes if its adjacency bitset restricted to the used images equals the images of its mapped
+            pattern neighbors, which checks all mapped nodes with one AND instead of a scan per node.
+        report: Optional dict, updated at every yield and when the search stops with "states" (states
+            explored so far), "deepest" (images of the longest feasible prefix of order reached) and
+            "stopped" (None, or "max_states", "deadline" or "cancelled" if the search was cut short).
+        stats: Optional SearchStats whose per-depth candidate and state counts are updated.
+    Yields:
+        The shared mapping list (pattern id -> target id) at every embedding found.
+        It is overwritten when the generator resumes, so callers must copy what they keep.
+    Returns:
+        When max_states is hit, the unexplored work as a list of (prefix, roots) pairs that can be
+        fed back into ri_search (the generator's StopIteration.value); otherwise None.
+    """
+    k, n = len(order), len(target)
+    layout = layout or target.layout
+    bits, degree = target.bits, target.degree_list
+    edge_labels, pattern_edge_labels = target.edge_labels, pattern.edge_labels
+    directed, out_bits, in_bits = target.directed, target.out_bits, target.in_bits
+
+    depth_of = [0] * k
+    for d, p in enumerate(order):
+        depth_of[p] = d
+    parents = [[q for q in pattern.neighbors_of(p).tolist() if depth_of[q] < d] for d, p in enumerate(order)]
+    if directed:
+        # Mapped pattern neighbors with an arc into p, and those p has an arc to.
+        into = [[q for q in parents[d] if pattern.out_bits[q] >> p & 1] for d, p in enumerate(order)]
+        outof = [[q for q in parents[d] if pattern.in_bits[q] >> p & 1] for d, p in enumerate(order)]
+    else:
+        into, outof = parents, [[] for _ in order]
+
+    def per_arc(value):
+        # (q, forward, value of the pattern arc) per mapped neighbor q; forward means q -> p.
+        return [[(q, True, value(q, p)) for q in into[d]] + [(q, False, value(p, q)) for q in outof[d]]
+                for d, p in enumerate(order)]
+
+    # With parallel edges on either side, labels are compared as tuples of the parallel edges' labels.
+    multi_labels = edge_labels is not None and (target.multiplicity is not None or pattern.multiplicity is not None)
+
+    def pattern_label(a, b):
+        label = pattern_edge_labels[a, b]
+        return edge_label_tuple(pattern, label) if multi_labels else label
+
+    def label_fits(have, want):
+        return labels_fit(edge_label_tuple(target, have), want, induced)
+
+    labelled = per_arc(pattern_label) if edge_labels is not None else [None] * k
+    matched = per_arc(pattern.edge_data) if edge_match is not None else [None] * k
+    edge_data = target.edge_data
+    weighted = [None] * k
+    if pattern.multiplicity is not None or induced and target.multiplicity is not None:
+        # Parallel edges: G needs at least (induced: exactly) as many as H on every mapped edge.
+        pattern_multiplicity, multiplicity = pattern.multiplicity or {}, target.multiplicity or {}
+        weighted = [[arc for arc in arcs if induced or arc[2] > 1] or None
+                    for arcs in per_arc(lambda a, b: pattern_multiplicity.get((a, b), 1))]
+    above = [[u for u, v in conditions if v == p and depth_of[u] < d] for d, p in enumerate(order)]
+    below = [[v for u, v in conditions if u == p and depth_of[v] < d] for d, p in enumerate(order)]
+    ordered = any(above) or any(below)
+    # One byte per target node; indexing beats shifting an n-bit int once n is large.
+    domain_bits = [np.unpackbits(np.frombuffer(domains[p].to_bytes((n + 7) // 8, "little"), dtype=np.uint8),
+                                 count=n, bitorder="little").tobytes() for p in order]
+    # Scanned only at depths without mapped neighbors, so built on first use.
+    domain_lists = [None] * k
+    # Adjacency each candidate must still be checked against, per depth: neighbor sets for "sets",
+    # int bitset rows otherwise. Directed arcs always need a check unless the rows were intersected.
+    set_checks = [()] * k
+    bit_checks = [()] * k
+    batched = layout == "bits"
+    if layout == "csr":
+        # The rows whose intersection holds the candidates of each depth.
+        if directed:
+            successors, predecessors = target.row_window("out"), target.row_window("in")
+            windows = [[(successors, q) for q in into[d]] + [(predecessors, q) for q in outof[d]] for d in range(k)]
+        else:
+            neighbor_row = target.row_window()
+            windows = [[(neighbor_row, q) for q in parents[d]] for d in range(k)]
+    elif layout == "sets":
+        adjacency, successor_sets, predecessor_sets = target.adjacency_sets()
+        neighbor_row = target.row_window()
+    if batched:
+        packed = target.packed_rows()
+        domain_rows = [pack_bits(domains[p], n) for p in order]
+        used_row = np.zeros(packed.shape[1], dtype=packed.dtype)
+        word_bits = np.array([1 << b for b in range(64)], dtype=packed.dtype)
+
+    # Self-loops of p (with multiplicity); checked when p has one, or always when induced.
+    loop_multiplicity = target.multiplicity or {}
+    loops = [(pattern.multiplicity or {}).get((p, p), 1) if pattern.out_bits[p] >> p & 1 else 0 for p in order]
+    # Label and attributes of the self-loop itself, which the per-arc checks above never see.
+    loop_checks = [((pattern_label(p, p),) if edge_labels is not None else None,
+                    pattern.edge_data(p, p) if edge_match is not None else None) if loops[d] else None
+                   for d, p in enumerate(order)]
+    if induced:
+        used = [0] * (k + 1)
+        wanted = [0] * k
+        wanted_out = [0] * k
+
+    mapping = [-1] * k
+    inverse = [-1] * n
+    source = [None] * k
+    checked = [False] * k
+    cursor = [0] * k
+    end = [0] * k
+    states = 0
+    watch = deadline is not None or cancel is not None
+    deepest, best = len(prefix), list(prefix)
+    counting = stats is not None
+    if counting:
+        tried, accepted = stats.depths(k)
+
+    def finish(stopped=None):
+        if report is not None:
+            report.update(states=states, deepest=best, stopped=stopped)
+
+    def stopped():
+        # Checks the deadline and the cancel flag; reports and returns True if the search must stop.
+        if deadline is not None and perf_counter() > deadline:
+            finish("deadline")
+            return True
+        if cancel is not None and cancel.is_set():
+            finish("cancelled")
+            return True
+        return False
+
+    def images(d):
+        wanted[d] = sum(1 << mapping[q] for q in into[d])
+        wanted_out[d] = sum(1 << mapping[q] for q in outof[d])
+
+    def enter(d, roots=None):
+        if induced:
+            images(d)
+        set_checks[d] = bit_checks[d] = ()
+        if not parents[d]:
+            if roots is not None:
+                source[d], checked[d], cursor[d], end[d] = roots, True, 0, len(roots)
+                return
+            if domain_lists[d] is None:
+                domain_lists[d] = bits_to_indices(domains[order[d]], n).tolist()
+            source[d], checked[d], cursor[d], end[d] = domain_lists[d], False, 0, len(domain_lists[d])
+            return
+        if layout == "csr":
+            rows = [window(mapping[q]) for window, q in windows[d]]
+            if len(rows) == 1 and roots is None:
+                source[d], cursor[d], end[d] = rows[0]
+                checked[d] = True
+                return
+            candidates = intersect_rows(rows)
+            if roots is not None:
+                adjacent = set(candidates)
+                candidates = [c for c in roots if c in adjacent]
+            source[d], checked[d], cursor[d], end[d] = candidates, True, 0, len(candidates)
+            return
+        if batched and roots is None:
+            row = domain_rows[d] & ~used_row
+            for q in parents[d]:
+                np.bitwise_and(row, packed[mapping[q]], out=row)
+            candidates = np.flatnonzero(np.unpackbits(row.view(np.uint8), bitorder="little")).tolist()
+            source[d], checked[d], cursor[d], end[d] = candidates, False, 0, len(candidates)
+            if directed and not induced:
+                bit_checks[d] = [out_bits[mapping[q]] for q in into[d]] + [in_bits[mapping[q]] for q in outof[d]]
+            return
+        pivot = -1
+        if roots is not None:
+            source[d], checked[d], cursor[d], end[d] = roots, True, 0, len(roots)
+        else:
+            # Scan the G-neighbors of the mapped neighbor image with the smallest degree.
+            for q in parents[d]:
+                image = mapping[q]
+                if pivot < 0 or degree[image] < degree[pivot]:
+                    pivot = image
+            source[d], cursor[d], end[d] = neighbor_row(pivot)
+            checked[d] = True
+        if induced:
+            # The induced check below covers adjacency in both directions.
+            return
+        if layout == "sets":
+            if directed:
+                set_checks[d] = ([successor_sets[mapping[q]] for q in into[d]] +
+                                 [predecessor_sets[mapping[q]] for q in outof[d]])
+            else:
+                set_checks[d] = [adjacency[mapping[q]] for q in parents[d] if mapping[q] != pivot]
+        elif directed:
+            bit_checks[d] = [out_bits[mapping[q]] for q in into[d]] + [in_bits[mapping[q]] for q in outof[d]]
+        else:
+            bit_checks[d] = [bits[mapping[q]] for q in parents[d] if mapping[q] != pivot]
+
+    base = len(prefix)
+    for d, image in enumerate(prefix):
+        mapping[order[d]] = image
+        inverse[image] = order[d]
+        if batched:
+            used_row[image >> 6] |= word_bits[image & 63]
+        if induced:
+            used[d + 1] = used[d] | 1 << image
+    if base == k:
+        finish()
+        if counting:
+            stats.embeddings += 1
+        yield mapping
+        return None
+
+    d = base
+    enter(d, roots)
+    while d >= base:
+        p = order[d]
+        check, adjacent_sets, adjacent_bits = checked[d], set_checks[d], bit_checks[d]
+        domain, labels, attrs, counts = domain_bits[d], labelled[d], matched[d], weighted[d]
+        loop, loop_check = loops[d], loop_checks[d]
+        if induced:
+            mapped, want, want_out = used[d], wanted[d], wanted_out[d]
+        src, i, e = source[d], cursor[d], end[d]
+        if watch and e - i > SCAN_CANDIDATES:
+            # Long scans are cut into chunks, so rejected candidates cannot hold up the deadline check.
+            e = i + SCAN_CANDIDATES
+        found = -1
+        while i < e:
+            c = src[i]
+            i += 1
+            if inverse[c] >= 0:
+                continue
+            if ordered and (any(c < mapping[u] for u in above[d]) or any(c > mapping[v] for v in below[d])):
+                continue
+            if loop or induced:
+                have = loop_multiplicity.get((c, c), 1) if out_bits[c] >> c & 1 else 0
+                if have < loop or induced and have != loop:
+                    continue
+                if loop_check is not None:
+                    loop_label, loop_data = loop_check
+                    if loop_label is not None and not (label_fits(edge_labels[c, c], loop_label[0]) if multi_labels
+                                                       else edge_labels[c, c] == loop_label[0]):
+                        continue
+                    if loop_data is not None and not edge_match(edge_data(c, c), loop_data):
+                        continue
+            if induced:
+                # Adjacent to exactly the images of the mapped pattern neighbors.
+                if directed:
+                    if in_bits[c] & mapped != want or out_bits[c] & mapped != want_out:
+                        continue
+                elif bits[c] & mapped != want:
+                    continue
+                if check and not domain[c]:
+                    continue
+            elif check and not domain[c]:
+                continue
+            # Candidates from a row still have to be adjacent to every other mapped neighbor's image.
+            if adjacent_sets:
+                adjacent = True
+                for neighbors in adjacent_sets:
+                    if c not in neighbors:
+                        adjacent = False
+                        break
+                if not adjacent:
+                    continue
+            elif adjacent_bits:
+                adjacent = True
+                for row in adjacent_bits:
+                    if not row >> c & 1:
+                        adjacent = False
+                        break
+                if not adjacent:
+                    continue
+            if labels is not None:
+                if multi_labels:
+                    if not all(label_fits(edge_labels[(mapping[q], c) if forward else (c, mapping[q])], label)
+                               for q, forward, label in labels):
+                        continue
+                elif not all(edge_labels[(mapping[q], c) if forward else (c, mapping[q])] == label
+                             for q, forward, label in labels):
+                    continue
+            if attrs is not None and not all(
+                    edge_match(edge_data(mapping[q], c) if forward else edge_data(c, mapping[q]), data)
+                    for q, forward, data in attrs):
+                continue
+            if counts is not None:
+                enough = True
+                for q, forward, count in counts:
+                    have = multiplicity.get((mapping[q], c) if forward else (c, mapping[q]), 1)
+                    if have < count or induced and have != count:
+                        enough = False
+                        break
+                if not enough:
+                    continue
+            found = c
+            break
+        if counting:
+            tried[d] += i - cursor[d]
+        cursor[d] = i
+        if found < 0 and i < end[d]:
+            if stopped():
+                return None
+            continue
+
+        if found < 0:
+            d -= 1
+            if d >= base:
+                image = mapping[order[d]]
+                inverse[image] = -1
+                mapping[order[d]] = -1
+                if batched:
+                    used_row[image >> 6] ^= word_bits[image & 63]
+            continue
+
+        states += 1
+        if max_states is not None and states > max_states:
+            # This state is handed back unexplored.
+            cursor[d], states = i - 1, max_states
+            finish("max_states")
+            return [([mapping[order[t]] for t in range(j)], source[j][cursor[j]:end[j]])
+                    for j in range(base, d + 1) if cursor[j] < end[j]]
+        if watch and not states & 1023 and stopped():
+            return None
+        if counting:
+            accepted[d] += 1
+
+        mapping[p] = found
+        inverse[found] = p
+        if d >= deepest:
+            deepest, best = d + 1, [mapping[order[t]] for t in range(d + 1)]
+        if d == k - 1:
+            finish()
+            if counting:
+                stats.embeddings += 1
+            yield mapping
+            inverse[found] = -1
+            mapping[p] = -1
+            continue
+        if batched:
+            used_row[found >> 6] |= word_bits[found & 63]
+        if induced:
+            used[d + 1] = mapped | 1 << found
+        d += 1
+        enter(d)
+    finish()
+    return None
+
+
+def prepare_search(G, H, node_label=None, edge_label=None, ordering="gcf", node_match=None, stats=None):
+    """
+    Compiles both graphs, computes the candidate domains and the matching order.
+    Args:
+        ordering: Matching-order strategy, a name from ordering.ORDERINGS or a callable.
+        node_match: Optional callable node_match(G_node_attrs, H_node_attrs) -> bool.
+        stats: Optional SearchStats that records the time of the "compile", "domains" and "ordering" phases.
+    Returns:
+        (target, pattern, order, domains); domains is None when some pattern node has no candidate.
+    """
+    with phase(stats, "compile"):
+        target = compile_target(G, node_label, edge_label)
+        if H.is_directed() != target.directed:
+            raise ValueError("G and H must both be directed or both be undirected")
+        pattern = CompiledTarget(H, target.node_label, target.edge_label)
+    if len(pattern) == 0 or len(pattern) > len(target):
+        return target, pattern, [], None
+
+    # Candidate domains are computed once up front; the search only ever walks
+    # these, so an empty domain ends the query before any backtracking.
+    with phase(stats, "domains"):
+        domains = compute_domains(target, pattern, node_match)
+    if domains is None:
+        return target, pattern, [], None
+    with phase(stats, "ordering"):
+        order = matching_order(H, pattern, target, domains, ordering)
+    return target, pattern, order, domains
+
+
+# Statuses of a SearchResult.
+FOUND = "found"
+NOT_FOUND = "not_found"
+BUDGET_EXHAUSTED = "budget_exhausted"
+
+
+class SearchResult:
+    """
+    Outcome of search_subgraph_isomorphism.
+    Attributes:
+        status: FOUND, NOT_FOUND (the whole search space was ruled out) or BUDGET_EXHAUSTED.
+        mapping: The embedding found (dict from H nodes to G nodes), or None.
+        partial: The largest partial mapping reached, over a prefix of the matching order; the
+            full mapping when found.
+        states: Number of search states explored.
+        stopped: With BUDGET_EXHAUSTED, what ran out: "max_states", "deadline" or "cancelled"; else None.
+    """
+
+    def __init__(self, status, mapping, partial, states, stopped=None):
+        self.status = status
+        self.mapping = mapping
+        self.partial = partial
+        self.states = states
+        self.stopped = stopped
+
+    def __repr__(self):
+        return (f"SearchResult(status={self.status!r}, mapping={self.mapping!r}, partial={self.partial!r}, "
+                f"states={self.states}, stopped={self.stopped!r})")
+
+
+def bonnici_giugno_subgraph_isomorphism(G, H, node_label=None, edge_label=None, parallel=False, workers=None,
+                                         ordering="gcf", node_match=None, edge_match=None, mode="monomorphism",
+                                         stats=None):
     """
     Checks if graph H is isomorphic to any subgraph of G using the RI algorithm.
     Args:
-        G: The larger graph (NetworkX Graph object).
+        G: The larger graph (NetworkX Graph object, or a CompiledTarget built from one).
         H: The smaller graph (NetworkX Graph object).
+        node_label: Optional node attribute that must be equal on matched nodes.
+        edge_label: Optional edge attribute that must be equal on matched edges.
+        parallel: If True, search on a process pool (see parallel.py); the first mapping found by any
+            worker is returned, which may differ from the sequential one. Every call starts the workers
+            and copies G into shared memory; a SubgraphMatcher keeps its pool for repeated queries.
+        workers: Number of worker processes; setting it implies parallel=True.
+        ordering: Matching-order strategy: "gcf" (greatest constraint first, the default), "bfs",
+            "domain", "auto" or a callable (see ordering.py).
+        node_match: Optional callable node_match(G_node_attrs, H_node_attrs) -> bool, as in NetworkX.
+            Categorical labels are faster through node_label, which uses G's label index.
+        edge_match: Optional callable edge_match(G_edge_attrs, H_edge_attrs) -> bool, as in NetworkX.
+        mode: "monomorphism" (the default) only requires the edges of H to be edges of G;
+            "induced" also requires non-adjacent nodes of H to map to non-adjacent nodes of G.
+        stats: Optional SearchStats (see stats.py) that records phase timings and, for sequential
+            searches, per-depth candidate and state counts.
     Returns:
         A mapping of nodes if an isomorphism exists, else None.
     """
+    induced = _is_induced(mode)
     if len(H.nodes) > len(G.nodes) or len(H.nodes) == 0 or len(G.nodes) == 0:
         return {}
-
-    def greatest_constraint_first(pattern_graph):
-        """
-        Orders the vertices of the pattern graph based on constraints.
-        """
-        ordered_vertices = []
-        remaining_vertices = set(pattern_graph.nodes)
-        start_vertex = max(remaining_vertices, key=lambda v: pattern_graph.degree[v])
-        ordered_vertices.append(start_vertex)
-        remaining_vertices.remove(start_vertex)
-        while remaining_vertices:
-            next_vertex = max(
-                remaining_vertices,
-                key=lambda v: (
-                    sum(1 for u in ordered_vertices if (u, v) in pattern_graph.edges or (v, u) in pattern_graph.edges),
-                    sum(1 for u in remaining_vertices if (v, u) in pattern_graph.edges or (u, v) in pattern_graph.edges),
-                    pattern_graph.degree[v]
-                )
-            )
-            ordered_vertices.append(next_vertex)
-            remaining_vertices.remove(next_vertex)
-        return ordered_vertices
-
-    def match_recursive(ordered_pattern, mapping, matched_vertices):
-        if len(mapping) == len(ordered_pattern):
-            return mapping
-
-        pattern_vertex = ordered_pattern[len(mapping)]
-        candidates = [
-            v for v in G.nodes if v not in matched_vertices and G.degree[v] >= H.degree[pattern_vertex]
-        ]
-        for candidate in candidates:
-            is_compatible = all(
-                (mapping[p_neighbor], candidate) in G.edges or (candidate, mapping[p_neighbor]) in G.edges
-                for p_neighbor in H.neighbors(pattern_vertex)
-                if p_neighbor in mapping
-            )
-            if is_compatible:
-                mapping[pattern_vertex] = candidate
-                matched_vertices.add(candidate)
-                result = match_recursive(ordered_pattern, mapping, matched_vertices)
-                if result is not None:
-                    return result
-                matched_vertices.remove(candidate)
-                del mapping[pattern_vertex]
+    target, pattern, order, domains = prepare_search(G, H, node_label, edge_label, ordering, node_match, stats)
+    if domains is None:
         return None
+    search = _search(target, pattern, order, domains, (), None, parallel, workers, "first", edge_match, induced,
+                     stats)
+    with phase(stats, "search"), closing(search):
+        for mapping in search:
+            return {pattern.nodes[p]: target.nodes[c] for p, c in enumerate(mapping)}
+    return None
+
+
+def search_subgraph_isomorphism(G, H, max_states=None, timeout=None, deadline=None, cancel=None, node_label=None,
+                                edge_label=None, ordering="gcf", node_match=None, edge_match=None, mode="monomorphism",
+                                stats=None):
+    """
+    Looks for one embedding of H in G within a budget, for callers that must bound the latency of
+    every query. The search stops at the first embedding, once the budget is spent, or when it has
+    ruled out every candidate.
+    Args:
+        G: The larger graph (NetworkX Graph object, or a CompiledTarget built from one).
+        H: The smaller graph (NetworkX Graph object).
+        max_states: Optional maximum number of search states (partial mappings) to explore.
+        timeout: Optional number of seconds to search for.
+        deadline: Optional time.perf_counter() value after which the search stops; the earlier of
+            deadline and timeout applies.
+        cancel: Optional cancellation token with an is_set() method, such as a threading.Event.
+        node_label, edge_label, ordering, node_match, edge_match, mode, stats: As for
+            bonnici_giugno_subgraph_isomorphism.
+    Returns:
+        A SearchResult. Unlike bonnici_giugno_subgraph_isomorphism, an H larger than G is reported
+        as NOT_FOUND rather than as an empty mapping.
+    """
+    induced = _is_induced(mode)
+    if timeout is not None:
+        limit = perf_counter() + timeout
+        deadline = limit if deadline is None else min(deadline, limit)
+    if len(H.nodes) == 0:
+        return SearchResult(FOUND, {}, {}, 0)
+    if len(H.nodes) > len(G.nodes):
+        return SearchResult(NOT_FOUND, None, {}, 0)
+    target, pattern, order, domains = prepare_search(G, H, node_label, edge_label, ordering, node_match, stats)
+    if domains is None:
+        return SearchResult(NOT_FOUND, None, {}, 0)
+
+    report = {}
+    search = ri_search(target, pattern, order, domains, (), deadline, cancel, max_states,
+                       edge_match=edge_match, induced=induced, report=report, stats=stats)
+    with phase(stats, "search"), closing(search):
+        mapping = next(search, None)
+    if mapping is not None:
+        found = {pattern.nodes[p]: target.nodes[c] for p, c in enumerate(mapping)}
+        return SearchResult(FOUND, found, found, report["states"])
+    partial = {pattern.nodes[order[d]]: target.nodes[c] for d, c in enumerate(report["deepest"])}
+    if report["stopped"] is not None:
+        return SearchResult(BUDGET_EXHAUSTED, None, partial, report["states"], report["stopped"])
+    return SearchResult(NOT_FOUND, None, partial, report["states"])
+
+
+def iter_subgraph_isomorphisms(G, H, limit=None, timeout=None, symmetry_breaking=False, node_label=None, edge_label=None,
+                               parallel=False, workers=None, ordering="gcf", node_match=None, edge_match=None,
+                               mode="monomorphism", stats=None):
+    """
+    Lazily yields every embedding of H into subgraphs of G, in the same RI order as
+    bonnici_giugno_subgraph_isomorphism (for the same ordering).
+    Args:
+        G: The larger graph (NetworkX Graph object, or a CompiledTarget built from one).
+        H: The smaller graph (NetworkX Graph object).
+        limit: Optional maximum number of mappings to yield.
+        timeout: Optional number of seconds after which the generator stops.
+        symmetry_breaking: If True, yield each distinct subgraph of G once instead of once per automorphism of H.
+        node_label: Optional node attribute that must be equal on matched nodes.
+        edge_label: Optional edge attribute that must be equal on matched edges.
+        parallel: If True, search on a process pool (see parallel.py); mappings then arrive in completion order.
+            Every call starts the workers and copies G (see bonnici_giugno_subgraph_isomorphism).
+        workers: Number of worker processes; setting it implies parallel=True.
+        ordering: Matching-order strategy (see bonnici_giugno_subgraph_isomorphism).
+        node_match, edge_match: Optional attribute predicates (see bonnici_giugno_subgraph_isomorphism).
+        mode: "monomorphism" or "induced" (see bonnici_giugno_subgraph_isomorphism).
+        stats: Optional SearchStats (see bonnici_giugno_subgraph_isomorphism). No "search" phase is
+            timed here, since the caller's work between mappings would be counted too.
+    Yields:
+        Mappings of nodes (dicts from H nodes to G nodes).
+    """
+    induced = _is_induced(mode)
+    if limit is not None and limit <= 0:
+        return
+    if len(H.nodes) == 0:
+        yield {}
+        return
+    deadline = perf_counter() + timeout if timeout is not None else None
+    target, pattern, order, domains = prepare_search(G, H, node_label, edge_label, ordering, node_match, stats)
+    if domains is None:
+        return
+    conditions = ()
+    if symmetry_breaking:
+        with phase(stats, "symmetry"):
+            conditions = _conditions(pattern, order, node_match, edge_match)
+    found = 0
+    search = _search(target, pattern, order, domains, conditions, deadline, parallel, workers, "all",
+                     edge_match, induced, stats)
+    with closing(search):
+        for mapping in search:
+            yield {pattern.nodes[p]: target.nodes[c] for p, c in enumerate(mapping)}
+            found += 1
+            if found == limit:
+                return
+
+
+def count_subgraph_isomorphisms(G, H, limit=None, timeout=None, symmetry_breaking=False, node_label=None, edge_label=None,
+                                parallel=False, workers=None, ordering="gcf", node_match=None, edge_match=None,
+                                mode="monomorphism", stats=None):
+    """
+    Counts the embeddings of H into subgraphs of G without building a mapping dict per embedding.
+    Takes the same arguments as iter_subgraph_isomorphisms.
+    Returns:
+        The number of embeddings found (capped at limit, and partial if the timeout elapsed).
+    """
+    induced = _is_induced(mode)
+    if limit is not None and limit <= 0:
+        return 0
+    if len(H.nodes) == 0:
+        return 1
+    deadline = perf_counter() + timeout if timeout is not None else None
+    target, pattern, order, domains = prepare_search(G, H, node_label, edge_label, ordering, node_match, stats)
+    if domains is None:
+        return 0
+    conditions = ()
+    if symmetry_breaking:
+        with phase(stats, "symmetry"):
+            conditions = _conditions(pattern, order, node_match, edge_match)
+    found = 0
+    search = _search(target, pattern, order, domains, conditions, deadline, parallel, workers, "count",
+                     edge_match, induced, stats)
+    with phase(stats, "search"), closing(search):
+        for counted in search:
+            found += counted
+            if limit is not None and found >= limit:
+                return limit
+    return found
+
+
+def _search(target, pattern, order, domains, conditions, deadline, parallel, workers, mode, edge_match=None,
+            induced=False, stats=None):
+    """
+    Runs the search sequentially or on a process pool. In mode "count" it yields counts
+    (1 per embedding when sequential), otherwise mapping lists. stats only gets per-depth
+    counts from a sequential search. Sequential searches without edge_match run on the
+    compiled kernel of native.py once native.warm_up has compiled it.
+    """
+    if not parallel and workers is None:
+        if edge_match is None and native.available():
+            return native.native_search(target, pattern, order, domains, conditions, deadline, induced=induced,
+                                        count=mode == "count", stats=stats)
+        search = ri_search(target, pattern, order, domains, conditions, deadline, edge_match=edge_match,
+                           induced=induced, stats=stats)
+        return (1 for _ in search) if mode == "count" else search
+    if edge_match is not None:
+        raise ValueError("edge_match needs the NetworkX graphs, which worker processes do not have")
+    from parallel import parallel_search
+    return parallel_search(target, pattern, order, domains, conditions, workers, mode, deadline, induced)
+
+
+def _is_induced(mode):
+    if mode not in ("monomorphism", "induced"):
+        raise ValueError(f"Unknown mode {mode!r}; expected 'monomorphism' or 'induced'")
+    return mode == "induced"
+
 
-    ordered_pattern = greatest_constraint_first(H)
-    return match_recursive(ordered_pattern, {}, set())
+def _conditions(pattern, order, node_match=None, edge_match=None):
+    from symmetry import symmetry_breaking_conditions
+    return symmetry_breaking_conditions(pattern, order, node_match, edge_match)
@@ -0,0 +1,624 @@
+from bisect import bisect_left
+from collections import Counter
+
+import numpy as np
+
+# Adjacency layouts the search can use (see CompiledTarget.layout).
+LAYOUTS = ("sets", "csr", "bits")
+
+# Targets with at least this average degree, and at most DENSE_NODES nodes, AND packed bit-matrix
+# rows; the matrix then stays below about 50 MB. Below that degree the rows cost more than they save.
+DENSE_DEGREE = 40
+DENSE_NODES = 20000
+
+# Other targets with at most this many nodes test adjacency against hash sets, which take two to
+# three times the memory of the CSR arrays; larger ones intersect CSR rows.
+SET_NODES = 20000
+
+
+def choose_layout(n, entries):
+    """
+    Picks the adjacency layout for a target with n nodes and the given number of CSR entries
+    (twice the edges of an undirected graph): "bits" for dense targets, "sets" for the other
+    targets of up to SET_NODES nodes and "csr" for larger ones.
+    """
+    if n <= DENSE_NODES and entries >= DENSE_DEGREE * n:
+        return "bits"
+    if n <= SET_NODES:
+        return "sets"
+    return "csr"
+
+
+def intersect_rows(rows):
+    """
+    Intersects sorted rows given as (sequence, start, stop) windows. The shortest row is taken
+    first, and each of its values is looked up in the longer rows by galloping from the previous
+    match (doubling the step, then bisecting), so a row of s values costs O(s log(l / s)) against
+    a row of l values.
+    Returns:
+        The sorted list of values in every row.
+    """
+    if len(rows) == 2:
+        first, second = rows
+        if first[2] - first[1] > second[2] - second[1]:
+            rows = second, first
+    else:
+        rows = sorted(rows, key=lambda row: row[2] - row[1])
+    sequence, start, stop = rows[0]
+    result = sequence[start:stop]
+    for sequence, start, stop in rows[1:]:
+        kept = []
+        for x in result:
+            if start < stop and sequence[start] < x:
+                step = 1
+                while start + step < stop and sequence[start + step] < x:
+                    step <<= 1
+                high = start + step
+                start = bisect_left(sequence, x, start + (step >> 1) + 1, high if high < stop else stop)
+            if start == stop:
+                break
+            if sequence[start] == x:
+                kept.append(x)
+                start += 1
+        result = kept
+        if not result:
+            break
+    return result
+
+
+def edge_label_tuple(graph, label):
+    """
+    Returns the label of an edge of graph as the tuple of labels of its parallel edges, the way
+    edge_labels holds them for a multigraph; other graphs have a single label per edge.
+    """
+    return label if graph.multiplicity is not None else (label,)
+
+
+def labels_fit(have, want, exact=False):
+    """
+    Compares the label tuples of the parallel edges between two target nodes (have) and two
+    pattern nodes (want). With exact (induced matches) they must be equal; otherwise every label
+    of want must occur in have at least as often, since a monomorphism may leave parallel edges
+    of G unused.
+    """
+    if exact:
+        return have == want
+    if len(want) > len(have):
+        return False
+    left = Counter(have)
+    for label in want:
+        if not left[label]:
+            return False
+        left[label] -= 1
+    return True
+
+
+def mask_to_bits(mask):
+    """
+    Packs a boolean NumPy array into a Python int bitset (bit i set iff mask[i]).
+    """
+    return int.from_bytes(np.packbits(mask, bitorder="little").tobytes(), "little")
+
+
+def bits_to_indices(bits, n):
+    """
+    Unpacks a Python int bitset over n nodes into a sorted NumPy array of set positions.
+    """
+    raw = np.frombuffer(bits.to_bytes((n + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(raw, bitorder="little")[:n])
+
+
+def pack_bits(bits, n):
+    """
+    Converts a Python int bitset over n nodes into a little-endian uint64 word array (bit i of
+    the bitset is bit i % 64 of word i // 64).
+    """
+    words = max(1, (n + 63) // 64)
+    return np.frombuffer(bits.to_bytes(words * 8, "little"), dtype="<u8").copy()
+
+
+def csr_arrays(rows):
+    """
+    Builds CSR offsets and neighbors arrays from a list of sorted neighbor id lists.
+    """
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(row) for row in rows])
+    neighbors = np.fromiter((u for row in rows for u in row), dtype=np.int64, count=int(offsets[-1]))
+    return offsets, neighbors
+
+
+def row_bits(offsets, neighbors, n):
+    """
+    Returns one Python int bitset per CSR row.
+    """
+    bits = []
+    mask = np.zeros(n, dtype=bool)
+    for i in range(n):
+        row = neighbors[offsets[i]:offsets[i + 1]]
+        mask[row] = True
+        bits.append(mask_to_bits(mask))
+        mask[row] = False
+    return bits
+
+
+class RowBits:
+    """
+    Sequence of CSR row bitsets like row_bits(), but built when a row is first read, for targets
+    too large to hold a bitset per node. Rows are cached until they take up about limit bytes,
+    then the cache is emptied.
+    """
+
+    def __init__(self, offsets, neighbors, limit=1 << 26):
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.limit = limit
+        self._rows = {}
+        self._size = 0
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        bits = self._rows.get(i)
+        if bits is None:
+            row = self.neighbors[self.offsets[i]:self.offsets[i + 1]]
+            bits = 0
+            if len(row):
+                # Rows are sorted, so the mask only needs to reach the last neighbor.
+                mask = np.zeros(int(row[-1]) + 1, dtype=bool)
+                mask[row] = True
+                bits = mask_to_bits(mask)
+            size = bits.bit_length() // 8 + 32
+            if self._size + size > self.limit:
+                self._rows.clear()
+                self._size = 0
+            self._rows[i] = bits
+            self._size += size
+        return bits
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class CSRValues:
+    """
+    Read-only mapping from (i, j) to a value stored per CSR entry, used instead of a dict for the
+    edge labels and multiplicities of targets built from arrays. Lookups binary-search row i.
+    Args:
+        offsets, neighbors: CSR arrays the values are aligned with.
+        values: NumPy array with one entry per neighbors entry.
+        vocabulary: Optional list; if given, values holds indices into it.
+    """
+
+    def __init__(self, offsets, neighbors, values, vocabulary=None):
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.values = values
+        self.vocabulary = vocabulary
+
+    def _position(self, key):
+        i, j = key
+        start, stop = int(self.offsets[i]), int(self.offsets[i + 1])
+        position = start + int(np.searchsorted(self.neighbors[start:stop], j))
+        return position if position < stop and self.neighbors[position] == j else -1
+
+    def __len__(self):
+        return len(self.values)
+
+    def __contains__(self, key):
+        return self._position(key) >= 0
+
+    def __getitem__(self, key):
+        position = self._position(key)
+        if position < 0:
+            raise KeyError(key)
+        value = int(self.values[position])
+        return self.vocabulary[value] if self.vocabulary is not None else value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+
+def entry_values(values, offsets, neighbors):
+    """
+    Returns (values per CSR entry, vocabulary) for a dict or CSRValues keyed by (i, j). A CSRValues
+    aligned with the CSR is used as is; otherwise the values are read entry by entry (vocabulary None).
+    """
+    if isinstance(values, CSRValues) and values.offsets is offsets and values.neighbors is neighbors:
+        return values.values, values.vocabulary
+    rows = offsets.tolist()
+    columns = neighbors.tolist()
+    return [values.get((i, j), 1) for i in range(len(rows) - 1) for j in columns[rows[i]:rows[i + 1]]], None
+
+
+class CompiledTarget:
+    """
+    Integer-indexed snapshot of a NetworkX graph, built once and reused across many queries.
+    Nodes are relabelled to 0..n-1 in G.nodes order, so results can be translated back.
+    For a DiGraph, offsets/neighbors/bits describe the underlying undirected graph (a superset
+    filter for everything that only needs adjacency), and the out_*/in_* attributes keep the
+    arc directions. For a MultiGraph the adjacency is simple and multiplicity holds the edge counts.
+    Attributes:
+        nodes: List of original node labels, indexed by compiled node id.
+        index: Dict from original node label to compiled node id.
+        offsets: NumPy array of length n + 1 with the CSR row offsets.
+        neighbors: NumPy array with the sorted neighbor ids of every node, row after row.
+        degrees: NumPy array with the degree of every node (in + out for a DiGraph, parallel edges counted).
+        degree_histogram: NumPy array; entry d is the number of nodes of degree d.
+        bits: List of Python ints; bit j of bits[i] is set iff i and j are adjacent (a RowBits when lazy
+            or when the layout is not "bits", where the search rarely needs them).
+        node_label: Name of the node attribute used as a label, or None.
+        edge_label: Name of the edge attribute used as a label, or None.
+        node_labels: List with the label of every node (None when node_label is None).
+        edge_labels: Dict from (i, j) to the edge label, both orientations (None when edge_label is None).
+        label_index: Dict from node label to the sorted NumPy array of nodes carrying it (None without node labels).
+        graph: The NetworkX graph this was compiled from, used for node_match/edge_match (None if built from arrays).
+        directed: True if compiled from a directed graph.
+        out_offsets, out_neighbors, out_degrees: CSR arrays of the successors and the out-degrees (None if undirected).
+        in_offsets, in_neighbors, in_degrees: CSR arrays of the predecessors and the in-degrees (None if undirected).
+        out_bits, in_bits: Bitsets; bit j of out_bits[i] (in_bits[i]) is set iff there is an arc i -> j (j -> i).
+            Both are bits for an undirected graph.
+        multiplicity: Dict from (i, j) to the number of parallel edges, both orientations when undirected
+            (None for graphs without parallel edges).
+        lazy: True if built with from_arrays(lazy=True); bitsets are then built per row on first use and
+            the search reads neighbor rows straight from the arrays (neighbor_list and offset_list are None).
+        path: The file the arrays are mapped from (see graph_file.open_graph), or None.
+        layout: How the search finds and checks candidates (one of LAYOUTS): "sets" tests adjacency
+            against a hash set per node, "csr" intersects the sorted neighbor rows of the mapped
+            neighbors by galloping, and "bits" ANDs their packed bit-matrix rows. Chosen from the
+            size and average degree by choose_layout unless given; it may also be reassigned.
+    """
+
+    def __init__(self, G, node_label=None, edge_label=None, layout=None):
+        nodes = list(G.nodes)
+        index = {v: i for i, v in enumerate(nodes)}
+        n = len(nodes)
+
+        arcs = None
+        if G.is_directed():
+            out_rows = [sorted({index[u] for u in G.successors(v)}) for v in nodes]
+            in_rows = [sorted({index[u] for u in G.predecessors(v)}) for v in nodes]
+            rows = [sorted(set(out_row).union(in_row)) for out_row, in_row in zip(out_rows, in_rows)]
+            arcs = (*csr_arrays(out_rows), np.array([G.out_degree[v] for v in nodes], dtype=np.int64),
+                    *csr_arrays(in_rows), np.array([G.in_degree[v] for v in nodes], dtype=np.int64))
+        else:
+            rows = [sorted({index[u] for u in G.neighbors(v)}) for v in nodes]
+        offsets, neighbors = csr_arrays(rows)
+        degrees = np.array([G.degree[v] for v in nodes], dtype=np.int64)
+        multiplicity = None
+        if G.is_multigraph():
+            multiplicity = {}
+            for u, v in G.edges():
+                i, j = index[u], index[v]
+                multiplicity[i, j] = multiplicity.get((i, j), 0) + 1
+                if not G.is_directed() and i != j:
+                    multiplicity[j, i] = multiplicity[i, j]
+
+        node_labels = None
+        edge_labels = None
+        if node_label is not None:
+            node_labels = [G.nodes[v].get(node_label) for v in nodes]
+        if edge_label is not None:
+            edge_labels = {}
+            for u, v, label in G.edges(data=edge_label):
+                i, j = index[u], index[v]
+                if multiplicity is not None:
+                    # Parallel edges are compared by their sorted tuple of labels.
+                    label = edge_labels.get((i, j), ()) + (label,)
+                    label = tuple(sorted(label, key=repr))
+                edge_labels[i, j] = label
+                if arcs is None:
+                    edge_labels[j, i] = label
+        self._setup(nodes, index, offsets, neighbors, degrees, node_label, node_labels, edge_label, edge_labels,
+                    arcs, multiplicity, layout=layout)
+        self.graph = G
+
+    @classmethod
+    def from_arrays(cls, offsets, neighbors, degrees, nodes=None, node_label=None, node_labels=None,
+                    edge_label=None, edge_labels=None, arcs=None, multiplicity=None, lazy=False, layout=None):
+        """
+        Builds a CompiledTarget directly from CSR arrays, without a NetworkX graph.
+        The arrays are used as given (no copy), so they may live in shared or mapped memory.
+        With lazy=True nothing proportional to the number of edges is built up front, which is
+        what a target mapped from a file needs; eager targets search somewhat faster.
+        Args:
+            offsets, neighbors, degrees: CSR arrays as described in the class docstring.
+            nodes: Optional original labels; defaults to the compiled ids themselves.
+            node_label, node_labels, edge_label, edge_labels: Optional labels as described in the class docstring.
+            arcs: For a directed graph, (out_offsets, out_neighbors, out_degrees, in_offsets, in_neighbors,
+                in_degrees); offsets/neighbors must then hold the underlying undirected graph.
+            multiplicity: Optional parallel edge counts as described in the class docstring.
+            lazy: If True, build bitsets per row on first use (see the lazy attribute).
+            layout: Optional adjacency layout (see the layout attribute).
+        Returns:
+            A CompiledTarget.
+        """
+        target = cls.__new__(cls)
+        nodes = range(len(offsets) - 1) if nodes is None else list(nodes)
+        target._setup(nodes, None, offsets, neighbors, degrees, node_label, node_labels, edge_label, edge_labels,
+                      arcs, multiplicity, lazy, layout)
+        target.graph = None
+        return target
+
+    def _setup(self, nodes, index, offsets, neighbors, degrees, node_label, node_labels, edge_label, edge_labels,
+               arcs, multiplicity, lazy=False, layout=None):
+        self.nodes = nodes
+        self._index = index
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.degrees = degrees
+        self.node_label = node_label
+        self.node_labels = node_labels
+        self.edge_label = edge_label
+        self.edge_labels = edge_labels
+        self.degree_histogram = np.bincount(degrees, minlength=1)
+        self.label_index = None
+        if node_labels is not None:
+            groups = {}
+            for i, label in enumerate(node_labels):
+                groups.setdefault(label, []).append(i)
+            self.label_index = {label: np.array(group, dtype=np.int64) for label, group in groups.items()}
+
+        n = len(nodes)
+        if layout is None:
+            layout = choose_layout(n, len(neighbors))
+        elif layout not in LAYOUTS:
+            raise ValueError(f"Unknown layout {layout!r}; expected one of {', '.join(LAYOUTS)}")
+        self.layout = layout
+        eager = not lazy and layout == "bits"
+        bitsets = (lambda offsets, neighbors: row_bits(offsets, neighbors, n)) if eager else RowBits
+        self.lazy = lazy
+        self.path = None
+        self.bits = bitsets(offsets, neighbors)
+        self.directed = arcs is not None
+        self.multiplicity = multiplicity
+        if arcs is not None:
+            (self.out_offsets, self.out_neighbors, self.out_degrees,
+             self.in_offsets, self.in_neighbors, self.in_degrees) = arcs
+            self.out_bits = bitsets(self.out_offsets, self.out_neighbors)
+            self.in_bits = bitsets(self.in_offsets, self.in_neighbors)
+        else:
+            self.out_offsets = self.out_neighbors = self.out_degrees = None
+            self.in_offsets = self.in_neighbors = self.in_degrees = None
+            self.out_bits = self.in_bits = self.bits
+
+        # Plain Python views of the arrays above; element access on these is much
+        # cheaper than on NumPy arrays inside the search loop.
+        self.degree_list = degrees.tolist()
+        self.neighbor_list = None if lazy else neighbors.tolist()
+        self.offset_list = None if lazy else offsets.tolist()
+        self._nds_width = -1
+        self._nds = None
+        self._packed = None
+        self._sets = None
+        self._rows = {}
+        self._arc_labels = None
+        self._label_degrees = {}
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = {v: i for i, v in enumerate(self.nodes)}
+        return self._index
+
+    def has_edge(self, i, j):
+        """
+        Returns True if compiled nodes i and j are adjacent (in either direction for a DiGraph).
+        """
+        return (self.bits[i] >> j) & 1 == 1
+
+    def has_arc(self, i, j):
+        """
+        Returns True if there is an edge from compiled node i to j; the same as has_edge when undirected.
+        """
+        return (self.out_bits[i] >> j) & 1 == 1
+
+    def arcs(self):
+        """
+        Returns the arrays passed as arcs to from_arrays (None if undirected).
+        """
+        if not self.directed:
+            return None
+        return (self.out_offsets, self.out_neighbors, self.out_degrees,
+                self.in_offsets, self.in_neighbors, self.in_degrees)
+
+    def node_data(self, i):
+        """
+        Returns the NetworkX attribute dict of compiled node i.
+        Raises:
+            ValueError: If the target was built from arrays, so there is no NetworkX graph.
+        """
+        if self.graph is None:
+            raise ValueError("node_match and edge_match need a target compiled from a NetworkX graph")
+        return self.graph.nodes[self.nodes[i]]
+
+    def edge_data(self, i, j):
+        """
+        Returns the NetworkX attribute dict of the edge between compiled nodes i and j (from i to j
+        for a DiGraph; the dict of parallel edges keyed by edge key for a MultiGraph).
+        """
+        if self.graph is None:
+            raise ValueError("node_match and edge_match need a target compiled from a NetworkX graph")
+        return self.graph[self.nodes[i]][self.nodes[j]]
+
+    def neighbors_of(self, i):
+        """
+        Returns the sorted neighbor ids of compiled node i as a NumPy array view.
+        """
+        return self.neighbors[self.offsets[i]:self.offsets[i + 1]]
+
+    def row_window(self, kind="all"):
+        """
+        Returns a function giving the sorted row of compiled node i as a (sequence, start, stop)
+        window, as intersect_rows takes it: its neighbors for kind "all", its successors for "out"
+        and its predecessors for "in" (the same as "all" when undirected). Rows of eager targets
+        are windows into one flat list, built on first use; lazy targets read each row from the arrays.
+        """
+        if not self.directed:
+            kind = "all"
+        offsets, neighbors = {"all": (self.offsets, self.neighbors), "out": (self.out_offsets, self.out_neighbors),
+                              "in": (self.in_offsets, self.in_neighbors)}[kind]
+        if self.lazy:
+            def window(i):
+                row = neighbors[offsets[i]:offsets[i + 1]].tolist()
+                return row, 0, len(row)
+            return window
+        if kind not in self._rows:
+            self._rows[kind] = (self.offset_list, self.neighbor_list) if kind == "all" else (
+                offsets.tolist(), neighbors.tolist())
+        offset_list, neighbor_list = self._rows[kind]
+        return lambda i: (neighbor_list, offset_list[i], offset_list[i + 1])
+
+    def adjacency_sets(self):
+        """
+        Returns (sets, out_sets, in_sets): one set of neighbors, successors and predecessors per
+        node (all three the same list when undirected). Built on first use and cached.
+        """
+        if self._sets is None:
+            rows = [set(self.neighbors_of(i).tolist()) for i in range(len(self))]
+            if self.directed:
+                out_rows = [set(self.out_neighbors[self.out_offsets[i]:self.out_offsets[i + 1]].tolist())
+                            for i in range(len(self))]
+                in_rows = [set(self.in_neighbors[self.in_offsets[i]:self.in_offsets[i + 1]].tolist())
+                           for i in range(len(self))]
+                self._sets = (rows, out_rows, in_rows)
+            else:
+                self._sets = (rows, rows, rows)
+        return self._sets
+
+    def packed_rows(self):
+        """
+        Returns the adjacency matrix as an (n, ceil(n / 64)) array of uint64 words, row i being
+        bits[i] in the layout of pack_bits. Built on first use and cached.
+        """
+        if self._packed is None:
+            n = len(self)
+            self._packed = np.zeros((n, max(1, (n + 63) // 64)), dtype="<u8")
+            for i, row in enumerate(self.bits):
+                self._packed[i] = pack_bits(row, n)
+        return self._packed
+
+    def neighbor_degree_matrix(self, width):
+        """
+        Returns an (n, width) array whose row i holds the degrees of the neighbors of i
+        (self-loops excluded) in descending order, padded with -1.
+        The matrix is cached, so repeated queries with the same or a smaller width are free.
+        """
+        if width > self._nds_width:
+            n = len(self)
+            row_of = np.repeat(np.arange(n), np.diff(self.offsets))
+            keep = row_of != self.neighbors
+            rows, nbr_degrees = row_of[keep], self.degrees[self.neighbors[keep]]
+            order = np.lexsort((-nbr_degrees, rows))
+            rows, nbr_degrees = rows[order], nbr_degrees[order]
+            starts = np.searchsorted(rows, np.arange(n))
+            position = np.arange(len(rows)) - starts[rows]
+            inside = position < width
+            matrix = np.full((n, width), -1, dtype=np.int64)
+            matrix[rows[inside], position[inside]] = nbr_degrees[inside]
+            self._nds, self._nds_width = matrix, width
+        return self._nds[:, :width]
+
+    def arc_label_codes(self):
+        """
+        Codes the edge labels per entry of the arc CSR (out_offsets/out_neighbors when directed,
+        offsets/neighbors otherwise). Built once, without looking labels up edge by edge when
+        they are stored per entry (see CSRValues).
+        Returns:
+            (label_offsets, labels, vocabulary): vocabulary maps every label to its code. In a
+            multigraph, labels[label_offsets[e]:label_offsets[e + 1]] are the sorted codes of the
+            parallel edges of entry e; otherwise label_offsets is empty and labels[e] is the code
+            of entry e.
+        """
+        if self._arc_labels is None:
+            arc_offsets, arc_neighbors = (self.out_offsets, self.out_neighbors) if self.directed else (
+                self.offsets, self.neighbors)
+            codes, values = entry_values(self.edge_labels, arc_offsets, arc_neighbors)
+            if values is None:
+                # Distinct entry values, coded in order of appearance.
+                coded = {}
+                codes = np.fromiter((coded.setdefault(label, len(coded)) for label in codes), dtype=np.int64,
+                                    count=len(codes))
+                values = list(coded)
+            # A copy even of mapped codes, so that the arrays have one dtype and are writable.
+            codes = np.array(codes, dtype=np.int64)
+            if self.multiplicity is None:
+                self._arc_labels = (np.empty(0, dtype=np.int64), codes,
+                                    {label: code for code, label in enumerate(values)})
+            else:
+                # Every entry value is the tuple of labels of parallel edges; each label gets its own
+                # code and the entry its sorted codes.
+                vocabulary = {}
+                expanded = [sorted(vocabulary.setdefault(label, len(vocabulary)) for label in value)
+                            for value in values]
+                sizes = np.array([len(value) for value in expanded], dtype=np.int64)
+                starts = np.zeros(len(expanded) + 1, dtype=np.int64)
+                starts[1:] = np.cumsum(sizes)
+                flat = np.array([code for value in expanded for code in value], dtype=np.int64)
+                lengths = sizes[codes]
+                label_offsets = np.zeros(len(codes) + 1, dtype=np.int64)
+                label_offsets[1:] = np.cumsum(lengths)
+                labels = flat[np.repeat(starts[codes] - label_offsets[:-1], lengths) + np.arange(label_offsets[-1])]
+                self._arc_labels = (label_offsets, labels, vocabulary)
+        return self._arc_labels
+
+    def edge_label_degrees(self, key):
+        """
+        Returns an array with, for every node, the number of incident edges carrying an edge label,
+        every parallel edge counted. key is the label, or for a directed graph (True, label) for
+        outgoing and (False, label) for incoming arcs, as in domains.edge_label_counts.
+        Arrays are cached per key, so later queries on the same labels are free.
+        """
+        degrees = self._label_degrees.get(key)
+        if degrees is None:
+            n = len(self)
+            label_offsets, labels, vocabulary = self.arc_label_codes()
+            code = vocabulary.get(key[1] if self.directed else key)
+            if code is None:
+                return np.zeros(n, dtype=np.int64)
+            offsets, neighbors = (self.out_offsets, self.out_neighbors) if self.directed else (
+                self.offsets, self.neighbors)
+            # Per arc entry: its source row, its target and how many of its edges carry the label.
+            rows = np.repeat(np.arange(n), np.diff(offsets))
+            if len(label_offsets):
+                hits = np.zeros(len(labels) + 1, dtype=np.int64)
+                np.cumsum(labels == code, out=hits[1:])
+                matches = hits[label_offsets[1:]] - hits[label_offsets[:-1]]
+            else:
+                matches = (labels == code).astype(np.int64)
+            ends = neighbors if self.directed and not key[0] else rows
+            degrees = np.bincount(ends, weights=matches, minlength=n).astype(np.int64)
+            self._label_degrees[key] = degrees
+        return degrees
+
+    def can_host_degrees(self, degrees):
+        """
+        Cheap necessary condition for any embedding: for every d, the graph has at least as many
+        nodes of degree >= d as there are values >= d in degrees.
+        Args:
+            degrees: Degrees of the pattern nodes.
+        """
+        if len(degrees) == 0:
+            return True
+        needed = np.bincount(np.asarray(degrees, dtype=np.int64))
+        available = self.degree_histogram
+        if len(needed) > len(available):
+            return False
+        at_least_needed = np.cumsum(needed[::-1])[::-1]
+        at_least_available = np.cumsum(available[::-1])[::-1][:len(needed)]
+        return bool((at_least_available >= at_least_needed).all())
+
+    def translate(self, mapping):
+        """
+        Translates a mapping whose values are compiled node ids back to the original labels.
+        Args:
+            mapping: Dict from pattern nodes to compiled node ids, or None.
+        Returns:
+            The same mapping with original node labels as values, or None.
+        """
+        if mapping is None:
+            return None
+        return {p: self.nodes[i] for p, i in mapping.items()}
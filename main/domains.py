@@ -0,0 +1,112 @@
+from collections import Counter, deque
+
+import numpy as np
+
+from compiled_graph import bits_to_indices, edge_label_tuple, mask_to_bits
+
+
+def edge_label_counts(graph, i):
+    """
+    Returns a Counter of the labels on the edges incident to compiled node i.
+    For a directed graph the keys are (True, label) for outgoing and (False, label) for incoming arcs.
+    Every parallel edge of a multigraph counts with its own label.
+    """
+    labels = graph.edge_labels
+    if graph.directed:
+        successors = graph.out_neighbors[graph.out_offsets[i]:graph.out_offsets[i + 1]].tolist()
+        predecessors = graph.in_neighbors[graph.in_offsets[i]:graph.in_offsets[i + 1]].tolist()
+        counts = Counter((True, label) for j in successors for label in edge_label_tuple(graph, labels[i, j]))
+        counts.update((False, label) for j in predecessors for label in edge_label_tuple(graph, labels[j, i]))
+        return counts
+    return Counter(label for j in graph.neighbors_of(i).tolist() for label in edge_label_tuple(graph, labels[i, j]))
+
+
+def compute_domains(target, pattern, node_match=None):
+    """
+    Computes the candidate domain of every pattern node once, before the search starts.
+    A target node c stays in the domain of pattern node p only if it has at least p's degree,
+    the same node label, a superset of p's incident edge labels, a neighborhood degree sequence
+    that dominates p's and passes node_match. With node labels, candidates are taken from the
+    target's label index instead of the whole graph. The domains are then refined to arc
+    consistency: c is dropped when some pattern neighbor q of p has no candidate adjacent to c.
+    For directed graphs c also needs at least p's in- and out-degree, and in multigraphs every
+    parallel edge counts with its own label.
+    Args:
+        target: CompiledTarget for the larger graph.
+        pattern: CompiledTarget for the smaller graph, compiled with the same labels.
+        node_match: Optional callable node_match(G_node_attrs, H_node_attrs) -> bool.
+    Returns:
+        A list of Python int bitsets indexed by compiled pattern node, or None if a domain is empty.
+    """
+    n, k = len(target), len(pattern)
+    width = max((len(pattern.neighbors_of(p)) for p in range(k)), default=0)
+    nds = target.neighbor_degree_matrix(width)
+
+    domains = []
+    for p in range(k):
+        if pattern.node_labels is not None:
+            mask = np.zeros(n, dtype=bool)
+            with_label = target.label_index.get(pattern.node_labels[p], np.empty(0, dtype=np.int64))
+            mask[with_label] = target.degrees[with_label] >= pattern.degrees[p]
+        else:
+            mask = target.degrees >= pattern.degrees[p]
+        if pattern.directed:
+            mask &= (target.out_degrees >= pattern.out_degrees[p]) & (target.in_degrees >= pattern.in_degrees[p])
+        sequence = sorted((pattern.degree_list[q] for q in pattern.neighbors_of(p).tolist() if q != p), reverse=True)
+        if sequence:
+            mask &= (nds[:, :len(sequence)] >= np.array(sequence)).all(axis=1)
+        if pattern.edge_labels is not None:
+            for label, count in edge_label_counts(pattern, p).items():
+                mask &= target.edge_label_degrees(label) >= count
+        if node_match is not None:
+            attrs = pattern.node_data(p)
+            for c in np.flatnonzero(mask).tolist():
+                if not node_match(target.node_data(c), attrs):
+                    mask[c] = False
+        if not mask.any():
+            return None
+        domains.append(mask_to_bits(mask))
+
+    return arc_consistency(target, pattern, domains)
+
+
+def arc_consistency(target, pattern, domains):
+    """
+    Refines domains in place until every candidate of p has a neighbor in the domain of each
+    pattern neighbor of p (AC-3). Each revision counts, for every target node at once, its
+    neighbors inside the other domain with one pass over the CSR arrays, so no per-node bitsets
+    are needed.
+    Returns:
+        The refined domains, or None as soon as one becomes empty.
+    """
+    n = len(target)
+    offsets, neighbors = target.offsets, target.neighbors
+    rows = [[q for q in pattern.neighbors_of(p).tolist() if q != p] for p in range(len(pattern))]
+    masks = {}
+
+    def mask_of(p):
+        if p not in masks:
+            masks[p] = np.zeros(n, dtype=bool)
+            masks[p][bits_to_indices(domains[p], n)] = True
+        return masks[p]
+
+    arcs = deque((p, q) for p in range(len(pattern)) for q in rows[p])
+    queued = set(arcs)
+    while arcs:
+        p, q = arcs.popleft()
+        queued.discard((p, q))
+        hits = np.zeros(len(neighbors) + 1, dtype=np.int64)
+        np.cumsum(mask_of(q)[neighbors], out=hits[1:])
+        mask = mask_of(p)
+        removed = mask & (hits[offsets[1:]] == hits[offsets[:-1]])
+        if not removed.any():
+            continue
+        mask &= ~removed
+        if not mask.any():
+            return None
+        domains[p] = mask_to_bits(mask)
+        for r in rows[p]:
+            if r != q and (r, p) not in queued:
+                arcs.append((r, p))
+                queued.add((r, p))
+    return domains
@@ -0,0 +1,173 @@
+import csv
+import warnings
+from itertools import islice
+
+import numpy as np
+
+from graph_file import compile_arrays, edge_arrays, write_arrays
+
+# Edges read per chunk; only one chunk is held as Python objects at a time.
+CHUNK_EDGES = 1 << 18
+
+
+def iter_edge_chunks(path, delimiter=None, comments="#", skiprows=0, names=False, chunk_size=CHUNK_EDGES):
+    """
+    Reads an edge file chunk by chunk.
+    Text and CSV files hold one edge per line: the first two fields are its endpoints and any further
+    fields (weights, timestamps) are ignored. Blank lines and lines starting with comments are skipped.
+    A .npy file holds an (m, 2) integer array and is read through a memory map.
+    Args:
+        path: Edge file.
+        delimiter: Field separator; defaults to "," for .csv files and whitespace otherwise.
+        comments: Prefix (or tuple of prefixes) of comment lines.
+        skiprows: Number of leading lines to skip, e.g. 1 for a CSV header.
+        names: If True, endpoints are returned as strings instead of being parsed as integers.
+        chunk_size: Number of lines (rows of a .npy file) read per chunk.
+    Yields:
+        (u, v) per chunk: int64 arrays, or lists of strings when names is True.
+    Raises:
+        ValueError: If a line has fewer than two fields or an endpoint is not an integer.
+    """
+    path = str(path)
+    if path.endswith(".npy"):
+        edges = np.load(path, mmap_mode="r")
+        if edges.ndim != 2 or edges.shape[1] < 2:
+            raise ValueError("a .npy edge file must hold an (m, 2) array")
+        for start in range(0, len(edges), chunk_size):
+            chunk = np.asarray(edges[start:start + chunk_size, :2], dtype=np.int64)
+            if names:
+                yield [str(u) for u in chunk[:, 0].tolist()], [str(v) for v in chunk[:, 1].tolist()]
+            else:
+                yield chunk[:, 0].copy(), chunk[:, 1].copy()
+        return
+
+    if delimiter is None and path.endswith(".csv"):
+        delimiter = ","
+    with open(path, newline="") as f:
+        for _ in islice(f, skiprows):
+            pass
+        while True:
+            lines = list(islice(f, chunk_size))
+            if not lines:
+                return
+            lines = [line for line in lines if line.strip() and not line.lstrip().startswith(comments)]
+            if delimiter is None and not names:
+                # Fast path for plain "u v" lines: let NumPy parse the whole chunk at once.
+                text = "".join(lines)
+                values = _parse_ints(text)
+                if values is not None and len(values) == 2 * len(lines) and _two_fields(text, len(lines)):
+                    yield values[0::2].copy(), values[1::2].copy()
+                    continue
+            if delimiter is None:
+                rows = [line.split(None, 2) for line in lines]
+            else:
+                rows = list(csv.reader(lines, delimiter=delimiter))
+            if any(len(row) < 2 for row in rows):
+                raise ValueError("every edge line needs two endpoints")
+            u = [row[0].strip() for row in rows]
+            v = [row[1].strip() for row in rows]
+            if names:
+                yield u, v
+            else:
+                yield np.array(u, dtype=np.int64), np.array(v, dtype=np.int64)
+
+
+def _parse_ints(text):
+    """
+    Returns the whitespace-separated integers in text as an int64 array, or None if some field is not one.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        try:
+            return np.fromstring(text, dtype=np.int64, sep=" ")
+        except (DeprecationWarning, ValueError):
+            return None
+
+
+def _two_fields(text, count):
+    """
+    Returns True if each of the count lines of text, whose fields _parse_ints has read, holds exactly
+    two of them. Lines end with "\n", "\r\n" or "\r", as read with newline="".
+    """
+    data = np.frombuffer(text.encode(), dtype=np.uint8)
+    space = data <= ord(" ")
+    starts = np.flatnonzero(~space & np.concatenate(([True], space[:-1])))
+    newline = data == ord("\n")
+    ends = np.flatnonzero(newline | (data == ord("\r")) & ~np.concatenate((newline[1:], [False])))
+    return len(starts) == 2 * count and np.array_equal(np.searchsorted(ends, starts), np.arange(count).repeat(2))
+
+
+def load_edge_arrays(path, directed=False, names=False, relabel=True, num_nodes=None, deduplicate=True,
+                     self_loops=True, delimiter=None, comments="#", skiprows=0, chunk_size=CHUNK_EDGES,
+                     progress=None):
+    """
+    Streams an edge file into the arrays of a graph file (see graph_file.py), keeping only integer
+    arrays and, with names, one dict entry per node; no per-edge Python objects outlive a chunk.
+    Args:
+        path, delimiter, comments, skiprows, chunk_size: As for iter_edge_chunks.
+        directed: If True, each line is an arc from the first endpoint to the second.
+        names: If True, endpoints are arbitrary strings, numbered in order of first appearance.
+        relabel: For integer endpoints, if True the distinct ids are renumbered 0..n-1 in increasing
+            order (the original ids are kept as node names); if False they are used as compiled ids.
+        num_nodes: With relabel=False, the number of nodes; defaults to the largest id plus one.
+        deduplicate: If True, repeated edges are stored once; otherwise they become parallel edges.
+        self_loops: If False, self-loops are dropped while reading.
+        progress: Optional callable progress(edges_read), called after every chunk.
+    Returns:
+        (header, arrays) as taken by graph_file.write_arrays and graph_file.compile_arrays.
+    Raises:
+        ValueError: If the file is malformed or, with relabel=False, an id is negative or too large.
+    """
+    index = {}
+    sources, targets = [], []
+    read = 0
+    for u, v in iter_edge_chunks(path, delimiter, comments, skiprows, names, chunk_size):
+        read += len(u)
+        if names:
+            u = np.fromiter((index.setdefault(name, len(index)) for name in u), dtype=np.int64, count=len(u))
+            v = np.fromiter((index.setdefault(name, len(index)) for name in v), dtype=np.int64, count=len(v))
+        if not self_loops:
+            keep = u != v
+            u, v = u[keep], v[keep]
+        sources.append(u)
+        targets.append(v)
+        if progress is not None:
+            progress(read)
+
+    u = np.concatenate(sources) if sources else np.empty(0, dtype=np.int64)
+    v = np.concatenate(targets) if targets else np.empty(0, dtype=np.int64)
+    del sources, targets
+    header = {"directed": directed, "node_label": None, "edge_label": None}
+    nodes = None
+    if names:
+        n = len(index)
+        header["nodes"] = list(index)
+    elif relabel:
+        ids, inverse = np.unique(np.concatenate([u, v]), return_inverse=True)
+        n, nodes = len(ids), ids
+        u, v = inverse[:len(u)], inverse[len(u):]
+    else:
+        n = int(max(u.max(), v.max())) + 1 if num_nodes is None and len(u) else num_nodes or 0
+        if len(u) and (min(u.min(), v.min()) < 0 or max(u.max(), v.max()) >= n):
+            raise ValueError("edge endpoints must be in 0..num_nodes-1")
+    header["n"] = n
+    arrays = edge_arrays(u, v, n, directed, deduplicate=deduplicate)
+    if nodes is not None and not (nodes == np.arange(n)).all():
+        arrays["node_ids"] = nodes
+    return header, arrays
+
+
+def read_edge_list(path, **options):
+    """
+    Builds a CompiledTarget from an edge file without NetworkX; the keyword options are those of
+    load_edge_arrays. The result is lazy, like a target opened with graph_file.open_graph.
+    """
+    return compile_arrays(*load_edge_arrays(path, **options))
+
+
+def convert_edge_list(path, out, **options):
+    """
+    Streams an edge file into a graph file at out that graph_file.open_graph can map; the keyword
+    options are those of load_edge_arrays.
+    """
+    write_arrays(out, *load_edge_arrays(path, **options))
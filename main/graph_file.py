@@ -0,0 +1,306 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+from compiled_graph import CompiledTarget, CSRValues
+
+# File layout: MAGIC, a little-endian uint32 format version and uint32 header length, the JSON
+# header, then the flat arrays, each starting on an ALIGN-byte boundary. The header records the
+# dtype, byte offset and length of every array, so a reader can map them without parsing anything else.
+MAGIC = b"CSRGRAPH"
+VERSION = 1
+ALIGN = 64
+
+
+def _encode(value):
+    # JSON has no tuples; they are written as lists and turned back into tuples by _decode.
+    if isinstance(value, (tuple, list)):
+        return [_encode(item) for item in value]
+    return value
+
+
+def _decode(value):
+    if isinstance(value, list):
+        return tuple(_decode(item) for item in value)
+    return value
+
+
+def _codes(values):
+    """
+    Returns (codes, vocabulary): an int32 array of indices into the list of distinct values.
+    """
+    vocabulary, code_of = [], {}
+    codes = np.empty(len(values), dtype=np.int32)
+    for position, value in enumerate(values):
+        code = code_of.get(value)
+        if code is None:
+            code = code_of[value] = len(vocabulary)
+            vocabulary.append(value)
+        codes[position] = code
+    return codes, vocabulary
+
+
+def write_arrays(path, header, arrays):
+    """
+    Writes header and the named arrays in the layout described at the top of this module.
+    The header holds "n", "directed", "node_label" and "edge_label", plus "nodes", "node_values"
+    and "edge_values" when used; the array names are those listed in compile_arrays.
+    Raises:
+        ValueError: If the header (node names or labels) cannot be encoded as JSON.
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items() if array is not None}
+    header = dict(header, version=VERSION, arrays={})
+    try:
+        # Array offsets depend on the header length and the header holds the offsets, so grow
+        # the header until it fits; shorter encodings are padded with spaces.
+        encoded = b""
+        while True:
+            position = len(MAGIC) + 8 + len(encoded)
+            position += -position % ALIGN
+            for name, array in arrays.items():
+                header["arrays"][name] = [array.dtype.str, position, len(array)]
+                position += array.nbytes + -array.nbytes % ALIGN
+            fitted = json.dumps(header).encode()
+            if len(fitted) <= len(encoded):
+                encoded = fitted.ljust(len(encoded))
+                break
+            encoded = fitted
+    except TypeError as error:
+        raise ValueError("node names and labels must be JSON serializable") from error
+
+    with open(path, "wb") as f:
+        f.write(MAGIC + struct.pack("<II", VERSION, len(encoded)) + encoded)
+        for name, array in arrays.items():
+            f.write(b"\0" * (header["arrays"][name][1] - f.tell()))
+            f.write(array.tobytes())
+        # Pad the end too, so every recorded offset (even of a trailing empty array) lies inside the file.
+        f.write(b"\0" * (-f.tell() % ALIGN))
+
+
+def write_graph(path, G, node_label=None, edge_label=None):
+    """
+    Writes G to path in the binary graph format read by open_graph.
+    Args:
+        path: Output file.
+        G: NetworkX graph (any of Graph, DiGraph, MultiGraph, MultiDiGraph) or a CompiledTarget.
+        node_label, edge_label: Names of the attributes to store as labels; ignored for a CompiledTarget.
+    Raises:
+        ValueError: If node names or labels cannot be encoded as JSON.
+    """
+    target = G if isinstance(G, CompiledTarget) else CompiledTarget(G, node_label, edge_label)
+    n = len(target)
+    header = {"n": n, "directed": target.directed, "node_label": target.node_label,
+              "edge_label": target.edge_label}
+    arrays = {"offsets": target.offsets, "neighbors": target.neighbors, "degrees": target.degrees}
+    if target.directed:
+        arrays.update(zip(("out_offsets", "out_neighbors", "out_degrees", "in_offsets", "in_neighbors",
+                           "in_degrees"), target.arcs()))
+
+    nodes = list(target.nodes)
+    if nodes != list(range(n)):
+        if all(type(v) is int for v in nodes):
+            arrays["node_ids"] = np.array(nodes, dtype=np.int64)
+        else:
+            header["nodes"] = _encode(nodes)
+    if target.node_labels is not None:
+        arrays["node_label_codes"], vocabulary = _codes(target.node_labels)
+        header["node_values"] = _encode(vocabulary)
+
+    # Edge values are stored per entry of the rows the arcs are read from (successors when directed).
+    offsets, neighbors = (target.out_offsets, target.out_neighbors) if target.directed else (
+        target.offsets, target.neighbors)
+    entries = [(i, j) for i in range(n) for j in neighbors[offsets[i]:offsets[i + 1]].tolist()]
+    if target.edge_labels is not None:
+        arrays["edge_label_codes"], vocabulary = _codes([target.edge_labels[entry] for entry in entries])
+        header["edge_values"] = _encode(vocabulary)
+    if target.multiplicity is not None:
+        arrays["multiplicity"] = np.array([target.multiplicity.get(entry, 1) for entry in entries], dtype=np.int64)
+    write_arrays(path, header, arrays)
+
+
+def _csr(sources, targets, n):
+    """
+    Returns (offsets, neighbors, order) for the arcs sources[t] -> targets[t], where order sorts
+    the arcs by (source, target) so that values aligned with the arcs can be permuted the same way.
+    """
+    order = np.argsort(sources * n + targets, kind="stable")
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=offsets[1:])
+    return offsets, targets[order], order
+
+
+def edge_arrays(u, v, n, directed=False, labels=None, deduplicate=True):
+    """
+    Builds the CSR arrays of a graph file from integer edge endpoints with NumPy only.
+    Args:
+        u, v: int64 arrays; edge t joins u[t] and v[t] (is an arc u[t] -> v[t] when directed).
+        n: Number of nodes; ids must be in 0..n-1.
+        directed: If True, build the in/out arrays as well.
+        labels: Optional int array of edge label codes aligned with u and v.
+        deduplicate: If True, repeated edges are stored once (the last label wins); otherwise they
+            are kept as parallel edges with a multiplicity array (labels are then not supported).
+    Returns:
+        Dict from array name to array, as written by write_arrays.
+    """
+    if not directed:
+        u, v = np.minimum(u, v), np.maximum(u, v)
+    counts = None
+    if deduplicate:
+        # Keep the last occurrence of every edge.
+        _, last = np.unique((u * n + v)[::-1], return_index=True)
+        keep = len(u) - 1 - last
+        u, v = u[keep], v[keep]
+        if labels is not None:
+            labels = labels[keep]
+    else:
+        keys, counts = np.unique(u * n + v, return_counts=True)
+        u, v = keys // n, keys % n
+        if (counts == 1).all():
+            counts = None
+    weights = counts if counts is not None else np.ones(len(u), dtype=np.int64)
+
+    arrays = {}
+    if directed:
+        out_offsets, out_neighbors, out_order = _csr(u, v, n)
+        in_offsets, in_neighbors, _ = _csr(v, u, n)
+        out_degrees = np.bincount(u, weights, minlength=n).astype(np.int64)
+        in_degrees = np.bincount(v, weights, minlength=n).astype(np.int64)
+        # The underlying undirected rows: every arc in both orientations, repeated pairs removed.
+        pairs = np.unique(np.stack([np.minimum(u, v), np.maximum(u, v)], axis=1), axis=0)
+        loop = pairs[:, 0] == pairs[:, 1]
+        sources = np.concatenate([pairs[:, 0], pairs[~loop, 1]])
+        targets = np.concatenate([pairs[:, 1], pairs[~loop, 0]])
+        offsets, neighbors, _ = _csr(sources, targets, n)
+        arrays.update(offsets=offsets, neighbors=neighbors, degrees=out_degrees + in_degrees,
+                      out_offsets=out_offsets, out_neighbors=out_neighbors, out_degrees=out_degrees,
+                      in_offsets=in_offsets, in_neighbors=in_neighbors, in_degrees=in_degrees)
+        if labels is not None:
+            arrays["edge_label_codes"] = labels[out_order]
+        if counts is not None:
+            arrays["multiplicity"] = counts[out_order]
+    else:
+        loop = u == v
+        sources = np.concatenate([u, v[~loop]])
+        targets = np.concatenate([v, u[~loop]])
+        offsets, neighbors, order = _csr(sources, targets, n)
+        # A self-loop adds 2 to the degree, as in NetworkX.
+        degrees = np.bincount(u, weights, minlength=n) + np.bincount(v, weights, minlength=n)
+        arrays.update(offsets=offsets, neighbors=neighbors, degrees=degrees.astype(np.int64))
+        if labels is not None:
+            arrays["edge_label_codes"] = np.concatenate([labels, labels[~loop]])[order]
+        if counts is not None:
+            arrays["multiplicity"] = np.concatenate([counts, counts[~loop]])[order]
+    return arrays
+
+
+def write_edge_list(path, edges, num_nodes=None, directed=False, node_labels=None, edge_labels=None,
+                    node_label="label", edge_label="label"):
+    """
+    Writes a simple graph given as integer edges to path in the format read by open_graph,
+    without building a NetworkX graph. Nodes are 0..num_nodes-1; repeated edges are stored once
+    (the last edge label wins) and self-loops are kept. See edge_list.py for reading edge files.
+    Args:
+        path: Output file.
+        edges: Array-like of shape (m, 2) with node ids.
+        num_nodes: Number of nodes; defaults to the largest id plus one.
+        directed: If True, (u, v) is an arc from u to v.
+        node_labels: Optional sequence with the label of every node.
+        edge_labels: Optional sequence with the label of every edge, aligned with edges.
+        node_label, edge_label: Attribute names recorded for the labels, as passed to the matchers.
+    Raises:
+        ValueError: If an id is out of range or labels cannot be encoded as JSON.
+    """
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    n = int(edges.max()) + 1 if num_nodes is None and len(edges) else num_nodes or 0
+    if len(edges) and (edges.min() < 0 or edges.max() >= n):
+        raise ValueError("edge endpoints must be in 0..num_nodes-1")
+    header = {"n": n, "directed": directed, "node_label": None, "edge_label": None}
+    codes = None
+    if edge_labels is not None:
+        codes, vocabulary = _codes(list(edge_labels))
+        header.update(edge_label=edge_label, edge_values=_encode(vocabulary))
+    arrays = edge_arrays(edges[:, 0], edges[:, 1], n, directed, codes)
+    if node_labels is not None:
+        if len(node_labels) != n:
+            raise ValueError("node_labels must have one entry per node")
+        arrays["node_label_codes"], vocabulary = _codes(list(node_labels))
+        header.update(node_label=node_label, node_values=_encode(vocabulary))
+    write_arrays(path, header, arrays)
+
+
+def read_header(path):
+    """
+    Returns the JSON header of a graph file as a dict.
+    Raises:
+        ValueError: If path is not a graph file of a supported version.
+    """
+    with open(path, "rb") as f:
+        start = f.read(len(MAGIC) + 8)
+        if len(start) < len(MAGIC) + 8 or start[:len(MAGIC)] != MAGIC:
+            raise ValueError("%s is not a graph file" % os.fspath(path))
+        version, size = struct.unpack("<II", start[len(MAGIC):])
+        if version != VERSION:
+            raise ValueError("unsupported graph file version %d" % version)
+        return json.loads(f.read(size))
+
+
+def open_graph(path):
+    """
+    Maps a graph file written by write_graph or write_edge_list into memory and returns it as a
+    lazy CompiledTarget whose arrays are read-only views of the mapping: nothing is copied and no
+    NetworkX graph is built, and processes that open the same file share its pages.
+    The result can be passed as G to the matchers (node_match and edge_match need NetworkX, so
+    they are not available).
+    Args:
+        path: File to open.
+    Returns:
+        A CompiledTarget with path set.
+    Raises:
+        ValueError: If path is not a graph file of a supported version.
+    """
+    header = read_header(path)
+    buffer = np.memmap(path, dtype=np.uint8, mode="r")
+    arrays = {name: np.frombuffer(buffer, dtype=dtype, count=length, offset=offset)
+              for name, (dtype, offset, length) in header["arrays"].items()}
+    target = compile_arrays(header, arrays)
+    target.path = os.fspath(path)
+    return target
+
+
+def compile_arrays(header, arrays):
+    """
+    Returns a lazy CompiledTarget over the arrays of a graph file, used as given.
+    Args:
+        header: Dict as described in write_arrays.
+        arrays: Dict with "offsets", "neighbors" and "degrees"; for a directed graph "out_offsets",
+            "out_neighbors", "out_degrees", "in_offsets", "in_neighbors" and "in_degrees"; and optionally
+            "node_ids", "node_label_codes", "edge_label_codes" and "multiplicity".
+    """
+    nodes = header.get("nodes")
+    if nodes is not None:
+        nodes = [_decode(v) for v in nodes]
+    elif "node_ids" in arrays:
+        nodes = arrays["node_ids"].tolist()
+    node_labels = None
+    if "node_label_codes" in arrays:
+        values = [_decode(value) for value in header["node_values"]]
+        node_labels = [values[code] for code in arrays["node_label_codes"].tolist()]
+
+    arcs = None
+    offsets, neighbors = arrays["offsets"], arrays["neighbors"]
+    if header["directed"]:
+        arcs = tuple(arrays[name] for name in ("out_offsets", "out_neighbors", "out_degrees",
+                                               "in_offsets", "in_neighbors", "in_degrees"))
+        offsets, neighbors = arcs[0], arcs[1]
+    edge_labels = multiplicity = None
+    if "edge_label_codes" in arrays:
+        values = [_decode(value) for value in header["edge_values"]]
+        edge_labels = CSRValues(offsets, neighbors, arrays["edge_label_codes"], values)
+    if "multiplicity" in arrays:
+        multiplicity = CSRValues(offsets, neighbors, arrays["multiplicity"])
+    return CompiledTarget.from_arrays(arrays["offsets"], arrays["neighbors"], arrays["degrees"], nodes=nodes,
+                                      node_label=header.get("node_label"), node_labels=node_labels,
+                                      edge_label=header.get("edge_label"), edge_labels=edge_labels, arcs=arcs,
+                                      multiplicity=multiplicity, lazy=True)
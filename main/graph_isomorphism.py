@@ -0,0 +1,318 @@
+from collections import Counter
+
+from stats import phase
+
+
+def graph_isomorphism(G1, G2, node_label=None, edge_label=None, stats=None):
+    """
+    Checks whether G1 and G2 are isomorphic. Unlike an induced subgraph search with |H| == |G|,
+    most non-isomorphic pairs never reach a search: they are told apart first by their node and
+    edge counts, sorted degree sequences and label counts (linear time), then by their per-node
+    triangle counts, and finally by colour refinement (1-dimensional Weisfeiler-Leman) run on both
+    graphs together, which gives up as soon as the two colour histograms differ. Pairs that
+    survive are searched by individualization and refinement: a node of G2 from the smallest
+    colour class is given a fresh colour together with one candidate of G1 from the same class,
+    and both graphs are refined again, so each choice usually fixes many more nodes. At every
+    step the mapping that pairs up the current colour classes is tried first, which settles
+    isomorphic regular or highly symmetric graphs without backtracking.
+    Args:
+        G1, G2: NetworkX graphs, both directed or both undirected. Multigraphs need the same
+            number of parallel edges between mapped nodes.
+        node_label, edge_label: Optional attributes that must be equal on mapped nodes and edges.
+        stats: Optional SearchStats (see stats.py). Candidates tried and accepted are counted per
+            individualization depth, and rejections by the invariant or refinement that failed
+            ("nodes", "edges", "degrees", "labels", "triangles", "refinement").
+    Returns:
+        A mapping from the nodes of G2 to the nodes of G1, as the matchers map H into G, or None
+        if the graphs are not isomorphic.
+    Raises:
+        ValueError: If one graph is directed and the other is not.
+    """
+    if G1.is_directed() != G2.is_directed():
+        raise ValueError("G1 and G2 must both be directed or both be undirected")
+    with phase(stats, "invariants"):
+        reason = _compare_invariants(G1, G2, node_label, edge_label)
+        if reason is None:
+            codes = {}
+            first = _Graph(G1, node_label, edge_label, codes)
+            second = _Graph(G2, node_label, edge_label, codes)
+            if Counter(first.triangles) != Counter(second.triangles):
+                reason = "triangles"
+    if reason is not None:
+        return _rejected(stats, reason)
+    with phase(stats, "refinement"):
+        colours = _refine(first, second, first.colours, second.colours)
+    if colours is None:
+        return _rejected(stats, "refinement")
+    with phase(stats, "search"):
+        found = _search(first, second, *colours, stats)
+    if found is None:
+        return None
+    if stats is not None:
+        stats.embeddings += 1
+    return {second.nodes[p]: first.nodes[x] for p, x in enumerate(found)}
+
+
+class _Graph:
+    """
+    One of the two graphs over integer node ids, in G.nodes order.
+    Attributes:
+        directed: Whether G is directed.
+        nodes: List of original nodes, indexed by id.
+        arcs: Dict from (i, j) to the sorted tuple of labels of the edges between them (i <= j for
+            undirected graphs); its length is the number of parallel edges.
+        items: List; entry i holds (code, j) for every neighbour j of i, where code stands for the
+            direction and labels of the edges between them.
+        triangles: List with the number of triangles through every node, ignoring directions,
+            parallel edges and self-loops.
+        colours: Initial colours from the node label, self-loops and triangle count.
+    Codes and colours come from the codes dict shared by both graphs, so they can be compared.
+    """
+
+    def __init__(self, G, node_label, edge_label, codes):
+        self.directed = directed = G.is_directed()
+        self.nodes = list(G.nodes)
+        n = len(self.nodes)
+        index = {v: i for i, v in enumerate(self.nodes)}
+        grouped = {}
+        for u, v, data in G.edges(data=True):
+            i, j = index[u], index[v]
+            if not directed and i > j:
+                i, j = j, i
+            grouped.setdefault((i, j), []).append(data.get(edge_label) if edge_label is not None else None)
+        self.arcs = {}
+        self.items = [[] for _ in range(n)]
+        bits = [0] * n
+        loops = [()] * n
+        for (i, j), labels in grouped.items():
+            labels = tuple(sorted(labels, key=repr))
+            self.arcs[i, j] = labels
+            if i == j:
+                loops[i] = labels
+                continue
+            if directed:
+                self.items[i].append((codes.setdefault(("out", labels), len(codes)), j))
+                self.items[j].append((codes.setdefault(("in", labels), len(codes)), i))
+            else:
+                code = codes.setdefault(("edge", labels), len(codes))
+                self.items[i].append((code, j))
+                self.items[j].append((code, i))
+            bits[i] |= 1 << j
+            bits[j] |= 1 << i
+        self.triangles = [sum((bits[u] & bits[v]).bit_count() for u in _members(bits[v])) // 2 for v in range(n)]
+        labels = [G.nodes[v].get(node_label) for v in self.nodes] if node_label is not None else [None] * n
+        self.colours = [codes.setdefault(("node", labels[v], loops[v], self.triangles[v]), len(codes))
+                        for v in range(n)]
+
+
+def _members(bits):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def _compare_invariants(G1, G2, node_label, edge_label):
+    """
+    Returns the name of the first cheap invariant that differs between G1 and G2, or None.
+    """
+    if len(G1) != len(G2):
+        return "nodes"
+    if G1.number_of_edges() != G2.number_of_edges():
+        return "edges"
+    if G1.is_directed():
+        degrees = [sorted(zip((d for _, d in G.in_degree), (d for _, d in G.out_degree))) for G in (G1, G2)]
+    else:
+        degrees = [sorted(d for _, d in G.degree) for G in (G1, G2)]
+    if degrees[0] != degrees[1]:
+        return "degrees"
+    if node_label is not None and Counter(d.get(node_label) for _, d in G1.nodes(data=True)) != Counter(
+            d.get(node_label) for _, d in G2.nodes(data=True)):
+        return "labels"
+    if edge_label is not None and Counter(d.get(edge_label) for *_, d in G1.edges(data=True)) != Counter(
+            d.get(edge_label) for *_, d in G2.edges(data=True)):
+        return "labels"
+    return None
+
+
+def _refine(first, second, colours1, colours2, changed=None):
+    """
+    Colour refinement of both graphs together: each round recolours a node by its colour and the
+    multiset of (edge code, neighbour colour) around it, with new colours numbered the same way in
+    both graphs, until no colour changes. Only nodes next to a node whose colour changed in the
+    previous round can get a new colour, so a round costs the degrees of those nodes rather than
+    the whole graphs; the members of a class that are not re-examined keep its colour, together
+    with those found to have the same signature.
+    Args:
+        first, second: The _Graph of G1 and of G2.
+        colours1, colours2: Colour lists to refine; they are not modified.
+        changed: Optional list of (graph, node) pairs (graph 0 for G1, 1 for G2) recoloured since
+            colours1 and colours2 were last stable; None refines from scratch.
+    Returns:
+        The stable (colours1, colours2), or None as soon as the two colour histograms differ,
+        in which case no isomorphism preserves the colours.
+    """
+    graphs = (first, second)
+    colours = (list(colours1), list(colours2))
+    if changed is None:
+        if Counter(colours1) != Counter(colours2):
+            return None
+        dirty = {(g, v) for g in (0, 1) for v in range(len(colours1))}
+    else:
+        dirty = {(g, u) for g, v in changed for _, u in graphs[g].items[v]}
+    members = {}
+    for g in (0, 1):
+        for v, colour in enumerate(colours[g]):
+            members.setdefault(colour, set()).add((g, v))
+    fresh = max(members, default=-1) + 1
+    # balance[c] is the number of nodes coloured c in G1 minus that in G2.
+    balance = {}
+    unbalanced = 0
+
+    def signature(g, v):
+        own = colours[g]
+        return tuple(sorted([(code, own[u]) for code, u in graphs[g].items[v]]))
+
+    while dirty and len(members) < len(colours1):
+        by_class = {}
+        for g, v in dirty:
+            by_class.setdefault(colours[g][v], []).append((g, v))
+        recoloured = []
+        for colour, nodes in by_class.items():
+            signatures = {}
+            clean = next((node for node in members[colour] if node not in dirty), None)
+            if clean is not None:
+                signatures[signature(*clean)] = colour
+            for g, v in nodes:
+                key = signature(g, v)
+                new = signatures.get(key)
+                if new is None:
+                    new = signatures[key] = fresh if signatures else colour
+                    if new == fresh:
+                        fresh += 1
+                if new != colour:
+                    recoloured.append((g, v, colour, new))
+        for g, v, old, new in recoloured:
+            colours[g][v] = new
+            members[old].discard((g, v))
+            members.setdefault(new, set()).add((g, v))
+            for colour, step in ((old, -1), (new, 1)):
+                before = balance.get(colour, 0)
+                balance[colour] = after = before + (step if g == 0 else -step)
+                unbalanced += (after != 0) - (before != 0)
+        if unbalanced:
+            return None
+        dirty = {(g, u) for g, v, _, _ in recoloured for _, u in graphs[g].items[v]}
+    return colours
+
+
+def _search(first, second, colours1, colours2, stats):
+    """
+    Individualization-refinement search from the stable colourings. Each stack entry holds a
+    colouring, the node of G2 individualized below it and the candidates of G1 left for it.
+    Returns:
+        A list mapping each node id of G2 to a node id of G1, or None.
+    """
+    found = _pair_classes(first, second, colours1, colours2)
+    if found is not None:
+        return found
+    branch = _split(colours1, colours2)
+    stack = [branch] if branch is not None else []
+    while stack:
+        colours1, colours2, p, candidates = stack[-1]
+        if not candidates:
+            stack.pop()
+            continue
+        x = candidates.pop()
+        if stats is not None:
+            tried, accepted = stats.depths(len(stack))
+            tried[len(stack) - 1] += 1
+        fresh = max(colours1) + 1
+        individualized1, individualized2 = list(colours1), list(colours2)
+        individualized1[x] = individualized2[p] = fresh
+        refined = _refine(first, second, individualized1, individualized2, [(0, x), (1, p)])
+        if refined is None:
+            if stats is not None:
+                stats.reject("refinement")
+            continue
+        if stats is not None:
+            accepted[len(stack) - 1] += 1
+        found = _pair_classes(first, second, *refined)
+        if found is not None:
+            return found
+        branch = _split(*refined)
+        if branch is not None:
+            stack.append(branch)
+    return None
+
+
+def _split(colours1, colours2):
+    """
+    Returns (colours1, colours2, p, candidates) for the smallest colour class with more than one
+    node: p is its first node in G2 and candidates its nodes in G1, last to be tried first.
+    Returns None when every class is a single node.
+    """
+    sizes = Counter(colours2)
+    cells = [(size, colour) for colour, size in sizes.items() if size > 1]
+    if not cells:
+        return None
+    colour = min(cells)[1]
+    candidates = [x for x in reversed(range(len(colours1))) if colours1[x] == colour]
+    return colours1, colours2, colours2.index(colour), candidates
+
+
+def _pair_classes(first, second, colours1, colours2):
+    """
+    Grows a mapping breadth-first through G2 that keeps the colours: a node reached from p goes to
+    an unused node of G1 with its colour, joined to the image of p by edges with the same code; a
+    node starting a new component goes to the next unused node of its colour. Returns the mapping
+    if it is an isomorphism, else None. This is the only candidate once every class is a single
+    node, and it already succeeds for trees and many symmetric graphs whose classes are larger.
+    """
+    n = len(colours1)
+    pools = {}
+    for x in reversed(range(n)):
+        pools.setdefault(colours1[x], []).append(x)
+    mapping = [-1] * n
+    used = [False] * n
+
+    def take(pool):
+        while pool and used[pool[-1]]:
+            pool.pop()
+        if not pool:
+            return -1
+        x = pool.pop()
+        used[x] = True
+        return x
+
+    for root in range(n):
+        if mapping[root] >= 0:
+            continue
+        mapping[root] = take(pools[colours2[root]])
+        if mapping[root] < 0:
+            return None
+        queue = [root]
+        for p in queue:
+            pools_around = {}
+            for code, y in first.items[mapping[p]]:
+                if not used[y]:
+                    pools_around.setdefault((code, colours1[y]), []).append(y)
+            for code, q in second.items[p]:
+                if mapping[q] < 0:
+                    mapping[q] = take(pools_around.get((code, colours2[q]), []))
+                    if mapping[q] < 0:
+                        return None
+                    queue.append(q)
+    arcs = first.arcs
+    for (i, j), labels in second.arcs.items():
+        x, y = mapping[i], mapping[j]
+        if arcs.get((x, y) if first.directed or x <= y else (y, x)) != labels:
+            return None
+    # Every edge of G2 has its counterpart and both graphs have as many edges, so none are left over.
+    return mapping
+
+
+def _rejected(stats, reason):
+    if stats is not None:
+        stats.reject(reason)
+    return None
@@ -0,0 +1,272 @@
+from itertools import permutations
+
+import networkx as nx
+
+from bonnici_giugno import _is_induced, iter_subgraph_isomorphisms, ri_search
+from compiled_graph import CompiledTarget
+from domains import compute_domains
+from ordering import greatest_constraint_first
+
+
+class ContinuousMatcher:
+    """
+    Keeps the full set of embeddings of standing patterns up to date while edges of G are
+    inserted and deleted. Each batch of changes is searched only near the changed edges: every
+    new embedding must map some pattern edge onto an inserted edge (or, in induced mode, some
+    pattern non-edge onto a deleted one, or an isolated pattern node onto a new node), so the
+    search runs on the ball of radius diameter(H) around the changed endpoints with those
+    pattern nodes pinned; disconnected patterns are searched on all of G. Embeddings that may have
+    broken are found through an index from target edges (and nodes) to embeddings and rechecked.
+    Args:
+        G: NetworkX Graph or DiGraph; it is modified in place by the update methods.
+        node_label, edge_label: Optional attributes that must be equal on matched nodes and edges.
+        mode: "monomorphism" or "induced" (see bonnici_giugno_subgraph_isomorphism).
+    Raises:
+        ValueError: For a multigraph or an unknown mode.
+    """
+
+    def __init__(self, G, node_label=None, edge_label=None, mode="monomorphism"):
+        if G.is_multigraph():
+            raise ValueError("continuous queries support Graph and DiGraph targets")
+        self.G = G
+        self.node_label = node_label
+        self.edge_label = edge_label
+        self.mode = mode
+        self.induced = _is_induced(mode)
+        self._queries = {}
+
+    def register(self, H, name=None):
+        """
+        Adds a standing pattern and enumerates its current embeddings.
+        Args:
+            H: Pattern graph, directed like G.
+            name: Key for the pattern; defaults to the next free integer.
+        Returns:
+            The name.
+        """
+        if H.is_directed() != self.G.is_directed() or H.is_multigraph():
+            raise ValueError("H must be a simple graph, directed like G")
+        if name is None:
+            name = len(self._queries)
+            while name in self._queries:
+                name += 1
+        query = _Query(H, self.node_label, self.edge_label)
+        self._queries[name] = query
+        for mapping in iter_subgraph_isomorphisms(self.G, H, node_label=self.node_label,
+                                                  edge_label=self.edge_label, mode=self.mode):
+            query.add(mapping)
+        return name
+
+    def unregister(self, name):
+        del self._queries[name]
+
+    def embeddings(self, name):
+        """
+        Returns the current embeddings of a registered pattern as a list of mappings.
+        """
+        query = self._queries[name]
+        return [query.mapping(key) for key in query.embeddings]
+
+    def count(self, name):
+        return len(self._queries[name].embeddings)
+
+    def insert_edge(self, u, v, **attrs):
+        """
+        Inserts one edge; see update.
+        """
+        return self.update(inserted=[(u, v, attrs)])
+
+    def delete_edge(self, u, v):
+        """
+        Deletes one edge; see update.
+        """
+        return self.update(deleted=[(u, v)])
+
+    def update(self, inserted=(), deleted=()):
+        """
+        Applies a batch of edge changes to G (deletions first) and updates every pattern once for
+        the whole batch, so high-rate streams pay for one local search per batch instead of one
+        per edge. Inserting an existing edge only updates its attributes and deleting a missing
+        one is ignored.
+        Args:
+            inserted: Iterable of (u, v) or (u, v, attrs) edges to add; new nodes are created as needed.
+            deleted: Iterable of (u, v) edges to remove.
+        Returns:
+            Dict from pattern name to (added, removed), lists of the embeddings that appeared and
+            disappeared.
+        """
+        G = self.G
+        removed_edges, added_edges, added_nodes = [], [], []
+        for u, v in deleted:
+            if G.has_edge(u, v):
+                G.remove_edge(u, v)
+                removed_edges.append((u, v))
+        for edge in inserted:
+            u, v = edge[0], edge[1]
+            attrs = edge[2] if len(edge) > 2 else {}
+            added_nodes += [x for x in dict.fromkeys((u, v)) if x not in G]
+            if not G.has_edge(u, v):
+                added_edges.append((u, v))
+            elif self.edge_label is not None and self.edge_label in attrs and (
+                    attrs[self.edge_label] != G[u][v].get(self.edge_label)):
+                # A relabelled edge is rechecked and searched like a new one.
+                added_edges.append((u, v))
+            G.add_edge(u, v, **attrs)
+        # An edge deleted and inserted again within the batch may have changed its label.
+        added_edges = [(u, v) for u, v in added_edges if G.has_edge(u, v)] + [
+            (u, v) for u, v in removed_edges if G.has_edge(u, v)]
+        removed_edges = [(u, v) for u, v in removed_edges if not G.has_edge(u, v)]
+
+        changes = {}
+        for name, query in self._queries.items():
+            removed = self._recheck(query, removed_edges, added_edges)
+            added = self._extend(query, removed_edges, added_edges, added_nodes)
+            changes[name] = ([query.mapping(key) for key in added], [query.mapping(key) for key in removed])
+        return changes
+
+    def _recheck(self, query, removed_edges, added_edges):
+        """
+        Drops and returns the embeddings no longer valid in G.
+        """
+        suspects = set()
+        for u, v in removed_edges + added_edges:
+            suspects |= query.by_edge.get(query.edge_key(u, v), set())
+        if self.induced:
+            # A new edge breaks induced embeddings that contain both endpoints.
+            for u, v in added_edges:
+                suspects |= query.by_node.get(u, set()) & query.by_node.get(v, set())
+        broken = [key for key in suspects if not query.valid(self.G, key, self.induced)]
+        for key in broken:
+            query.discard(key)
+        return broken
+
+    def _extend(self, query, removed_edges, added_edges, added_nodes):
+        """
+        Searches the neighbourhood of the changed edges for new embeddings, adds and returns them.
+        """
+        # Each anchor pins one or two pattern nodes to target nodes.
+        anchors = [((a, u), (b, v)) for u, v in added_edges for a, b in query.edge_pairs if (a == b) == (u == v)]
+        if self.induced:
+            anchors += [((a, u), (b, v)) for u, v in removed_edges for a, b in query.non_edge_pairs
+                        if (a == b) == (u == v)]
+        # Only an isolated pattern node can map to a new node without also using a new edge.
+        anchors += [((a, x),) for x in added_nodes for a in query.isolated]
+        if not anchors:
+            return []
+        ends = {x for pins in anchors for _, x in pins}
+        local = self._ball(ends, query.radius)
+        target = CompiledTarget(local, self.node_label, self.edge_label)
+        domains = compute_domains(target, query.pattern)
+        if domains is None:
+            return []
+        added = []
+        for pins in anchors:
+            pinned = list(domains)
+            for a, x in pins:
+                pinned[a] &= 1 << target.index[x]
+            if not all(pinned[a] for a, _ in pins):
+                continue
+            for found in ri_search(target, query.pattern, query.order(*(a for a, _ in pins)), pinned,
+                                   induced=self.induced):
+                key = tuple(target.nodes[found[p]] for p in range(len(found)))
+                if key not in query.embeddings:
+                    query.embeddings.add(key)
+                    query.index(key)
+                    added.append(key)
+        return added
+
+    def _ball(self, ends, radius):
+        """
+        Returns the subgraph of G induced by the nodes within radius hops of ends (ignoring
+        directions), or G itself when radius is None.
+        """
+        if radius is None:
+            return self.G
+        G = self.G
+        seen, frontier = set(ends), list(ends)
+        for _ in range(radius):
+            reached = []
+            for x in frontier:
+                around = nx.all_neighbors(G, x) if G.is_directed() else G.neighbors(x)
+                for y in around:
+                    if y not in seen:
+                        seen.add(y)
+                        reached.append(y)
+            frontier = reached
+        return G.subgraph(seen)
+
+
+class _Query:
+    """
+    A registered pattern with its embeddings and the indexes used to update them. Embeddings are
+    kept as tuples of target nodes in compiled pattern order.
+    """
+
+    def __init__(self, H, node_label, edge_label):
+        self.H = H
+        self.node_label = node_label
+        self.edge_label = edge_label
+        self.pattern = CompiledTarget(H, node_label, edge_label)
+        nodes = self.pattern.nodes
+        k = len(nodes)
+        self.edges = [(self.pattern.index[a], self.pattern.index[b]) for a, b in H.edges()]
+        self.edge_pairs = [(a, b) for a, b in self.edges] + (
+            [] if H.is_directed() else [(b, a) for a, b in self.edges if a != b])
+        self.non_edge_pairs = [(a, b) for a, b in permutations(range(k), 2) if not H.has_edge(nodes[a], nodes[b])]
+        self.non_edge_pairs += [(a, a) for a in range(k) if not H.has_edge(nodes[a], nodes[a])]
+        self.isolated = [a for a in range(k) if H.degree[nodes[a]] == 0]
+        undirected = H.to_undirected(as_view=True)
+        self.radius = nx.diameter(undirected) if k and nx.is_connected(undirected) else None
+        self.embeddings = set()
+        self.by_edge = {}
+        self.by_node = {}
+        self._orders = {}
+
+    def edge_key(self, u, v):
+        return (u, v) if self.H.is_directed() else frozenset((u, v))
+
+    def mapping(self, key):
+        return dict(zip(self.pattern.nodes, key))
+
+    def order(self, *pinned):
+        # Matching order starting with the pinned pattern nodes.
+        pinned = tuple(dict.fromkeys(pinned))
+        if pinned not in self._orders:
+            start = [self.pattern.nodes[a] for a in pinned]
+            self._orders[pinned] = [self.pattern.index[v] for v in greatest_constraint_first(self.H, start)]
+        return self._orders[pinned]
+
+    def add(self, mapping):
+        key = tuple(mapping[v] for v in self.pattern.nodes)
+        self.embeddings.add(key)
+        self.index(key)
+
+    def index(self, key):
+        for a, b in self.edges:
+            self.by_edge.setdefault(self.edge_key(key[a], key[b]), set()).add(key)
+        for x in key:
+            self.by_node.setdefault(x, set()).add(key)
+
+    def discard(self, key):
+        self.embeddings.discard(key)
+        for a, b in self.edges:
+            self.by_edge.get(self.edge_key(key[a], key[b]), set()).discard(key)
+        for x in key:
+            self.by_node.get(x, set()).discard(key)
+
+    def valid(self, G, key, induced):
+        """
+        Rechecks an embedding against the current G.
+        """
+        labels = self.pattern.edge_labels
+        for a, b in self.edges:
+            u, v = key[a], key[b]
+            if not G.has_edge(u, v):
+                return False
+            if labels is not None and G[u][v].get(self.edge_label) != labels[a, b]:
+                return False
+        if induced:
+            for a, b in self.non_edge_pairs:
+                if G.has_edge(key[a], key[b]):
+                    return False
+        return True
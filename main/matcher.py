@@ -0,0 +1,204 @@
+from contextlib import ExitStack
+
+from networkx.algorithms import isomorphism
+
+from bonnici_giugno import (NOT_FOUND, SearchResult, bonnici_giugno_subgraph_isomorphism, compile_target,
+                            search_subgraph_isomorphism)
+from result_cache import graph_stamp, multiedge_label_match
+
+
+class SubgraphMatcher:
+    """
+    Answers many subgraph queries against one target graph G.
+    G is indexed once (CSR arrays, adjacency bitsets, degree histogram and label index, see
+    CompiledTarget) and every query reuses that index.
+    Args:
+        G: The larger graph (NetworkX Graph object, or a CompiledTarget built from one).
+        node_label: Optional node attribute that must be equal on matched nodes.
+        edge_label: Optional edge attribute that must be equal on matched edges.
+        ordering: Matching-order strategy used for every query (see ordering.py).
+        node_match: Optional callable node_match(G_node_attrs, H_node_attrs) -> bool.
+        edge_match: Optional callable edge_match(G_edge_attrs, H_edge_attrs) -> bool.
+        mode: "monomorphism" or "induced" (see bonnici_giugno_subgraph_isomorphism).
+        cache: Optional ResultCache consulted by match and match_many. Not used with node_match or
+            edge_match, whose callables cannot be part of a cache key.
+        stamp: Version of G for the cache; defaults to graph_stamp of the compiled G. Pass your own
+            (e.g. a revision counter) to skip hashing a large G.
+    A matcher that searched on worker processes keeps them (see pool); use it as a context
+    manager, or call close, to shut them down.
+    """
+
+    def __init__(self, G, node_label=None, edge_label=None, ordering="gcf", node_match=None, edge_match=None,
+                 mode="monomorphism", cache=None, stamp=None):
+        self.target = compile_target(G, node_label, edge_label)
+        self.ordering = ordering
+        self.node_match = node_match
+        self.edge_match = edge_match
+        self.mode = mode
+        self.cache = cache if node_match is None and edge_match is None else None
+        self.stamp = None
+        if self.cache is not None:
+            self.stamp = (stamp if stamp is not None else graph_stamp(self.target), mode)
+        self._pool = None
+        self._stack = None
+        self._workers = None
+
+    def pool(self, workers=None):
+        """
+        Returns a process pool whose workers share the compiled target (see parallel.worker_pool).
+        It is started on first use and kept for later calls, so parallel queries start the workers
+        and copy the target only once; asking for another number of workers replaces it.
+        """
+        if self._pool is not None and workers != self._workers:
+            self.close()
+        if self._pool is None:
+            from parallel import worker_pool
+            self._stack = ExitStack()
+            self._pool = self._stack.enter_context(worker_pool(self.target, workers))
+            self._workers = workers
+        return self._pool
+
+    def close(self):
+        """
+        Shuts down the pool started by pool, if any.
+        """
+        if self._pool is not None:
+            stack, self._pool = self._stack, None
+            stack.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def match(self, H):
+        """
+        Finds one embedding of H, like bonnici_giugno_subgraph_isomorphism.
+        """
+        hit, mapping = self._lookup(H)
+        if hit:
+            return mapping
+        if 0 < len(H.nodes) <= len(self.target) and not self.target.can_host_degrees([d for _, d in H.degree]):
+            mapping = None
+        else:
+            mapping = bonnici_giugno_subgraph_isomorphism(self.target, H, ordering=self.ordering,
+                                                          node_match=self.node_match, edge_match=self.edge_match,
+                                                          mode=self.mode)
+        self._remember(H, mapping)
+        return mapping
+
+    def search(self, H, max_states=None, timeout=None, deadline=None, cancel=None):
+        """
+        Looks for one embedding of H within a budget, like search_subgraph_isomorphism.
+        Returns:
+            A SearchResult.
+        """
+        if 0 < len(H.nodes) <= len(self.target) and not self.target.can_host_degrees([d for _, d in H.degree]):
+            return SearchResult(NOT_FOUND, None, {}, 0)
+        return search_subgraph_isomorphism(self.target, H, max_states, timeout, deadline, cancel,
+                                           ordering=self.ordering, node_match=self.node_match,
+                                           edge_match=self.edge_match, mode=self.mode)
+
+    def match_many(self, patterns, workers=None):
+        """
+        Finds one embedding for each of several patterns.
+        Patterns that are isomorphic to an earlier one (labels included) are not searched again;
+        they get the earlier result, relabelled through the isomorphism.
+        Args:
+            patterns: Iterable of NetworkX graphs.
+            workers: Number of worker processes sharing the target; None searches in this process.
+                Ignored with node_match or edge_match, which need G's attributes. The workers are
+                kept for the next call (see pool).
+        Returns:
+            A list of mappings (or None), in the same order as patterns.
+        """
+        patterns = list(patterns)
+        representatives, links = self._deduplicate(patterns)
+        if workers is None or self.node_match is not None or self.edge_match is not None:
+            solved = [self.match(patterns[r]) for r in representatives]
+        else:
+            solved = [self._lookup(patterns[r]) for r in representatives]
+            missing = [slot for slot, (hit, _) in enumerate(solved) if not hit]
+            solved = [mapping for _, mapping in solved]
+            if missing:
+                from parallel import match_pattern
+                pool = self.pool(workers)
+                futures = [pool.submit(match_pattern, patterns[representatives[slot]], self.ordering, self.mode)
+                           for slot in missing]
+                for slot, future in zip(missing, futures):
+                    solved[slot] = self.target.translate(future.result())
+                    self._remember(patterns[representatives[slot]], solved[slot])
+
+        results = []
+        for slot, relabel in links:
+            mapping = solved[slot]
+            results.append({h: mapping[relabel[h]] for h in relabel} if mapping else mapping)
+        return results
+
+    def _lookup(self, H):
+        if self.cache is None:
+            return False, None
+        return self.cache.get(H, self.stamp, self.target.node_label, self.target.edge_label)
+
+    def _remember(self, H, mapping):
+        if self.cache is not None:
+            self.cache.put(H, self.stamp, mapping, self.target.node_label, self.target.edge_label)
+
+    def _deduplicate(self, patterns):
+        """
+        Groups patterns by isomorphism class. With node_match or edge_match, isomorphic
+        patterns must also have equal attribute dicts on corresponding nodes or edges.
+        Returns:
+            (representatives, links): the indices of the patterns to solve, and per pattern a pair
+            (slot in representatives, mapping from its nodes to the representative's nodes).
+        """
+        node_label, edge_label = self.target.node_label, self.target.edge_label
+        node_match = isomorphism.categorical_node_match(node_label, None) if node_label is not None else None
+        edge_match = multiedge_match = None
+        if edge_label is not None:
+            edge_match = isomorphism.categorical_edge_match(edge_label, None)
+            multiedge_match = multiedge_label_match(edge_label)
+        if self.node_match is not None:
+            node_match = _equal_attributes
+        if self.edge_match is not None:
+            edge_match = multiedge_match = _equal_attributes
+        buckets = {}
+        representatives, links = [], []
+        for i, H in enumerate(patterns):
+            key = _invariants(H, node_label, edge_label)
+            for slot in buckets.get(key, []):
+                matcher = _matcher_class(H)(H, patterns[representatives[slot]], node_match,
+                                            multiedge_match if H.is_multigraph() else edge_match)
+                if matcher.is_isomorphic():
+                    links.append((slot, dict(matcher.mapping)))
+                    break
+            else:
+                buckets.setdefault(key, []).append(len(representatives))
+                links.append((len(representatives), {v: v for v in H.nodes}))
+                representatives.append(i)
+        return representatives, links
+
+
+def _invariants(H, node_label, edge_label):
+    """
+    Isomorphism-invariant key used to bucket patterns before the exact check.
+    """
+    key = (len(H), H.number_of_edges(), H.is_directed(), H.is_multigraph(), tuple(sorted(d for _, d in H.degree)))
+    if H.is_directed():
+        key += (tuple(sorted(zip((d for _, d in H.in_degree), (d for _, d in H.out_degree)))),)
+    if node_label is not None:
+        key += (tuple(sorted(map(repr, (data.get(node_label) for _, data in H.nodes(data=True))))),)
+    if edge_label is not None:
+        key += (tuple(sorted(map(repr, (data.get(edge_label) for _, _, data in H.edges(data=True))))),)
+    return key
+
+
+def _matcher_class(H):
+    if H.is_multigraph():
+        return isomorphism.MultiDiGraphMatcher if H.is_directed() else isomorphism.MultiGraphMatcher
+    return isomorphism.DiGraphMatcher if H.is_directed() else isomorphism.GraphMatcher
+
+
+def _equal_attributes(first, second):
+    return first == second
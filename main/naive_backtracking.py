@@ -1,18 +1,136 @@
-def naive_subgraph_isomorphism(G, H):
+def naive_subgraph_isomorphism(G, H, node_match=None, edge_match=None, mode="monomorphism", stats=None):
     """
     Checks if graph H is isomorphic to any subgraph of G using a naive backtracking approach.
+    Directed graphs match arcs in their direction; for multigraphs G needs at least (induced: exactly)
+    as many parallel edges as H between mapped nodes.
     Args:
         G: The larger graph (NetworkX Graph object).
         H: The smaller graph (NetworkX Graph object).
+        node_match: Optional callable node_match(G_node_attrs, H_node_attrs) -> bool, as in NetworkX.
+        edge_match: Optional callable edge_match(G_edge_attrs, H_edge_attrs) -> bool, as in NetworkX.
+        mode: "monomorphism" (the default) or "induced", which also maps non-edges of H to non-edges of G.
+        stats: Optional SearchStats (see stats.py). Candidates tried and accepted are counted per
+            depth, and rejected candidates by the check that rejected them.
     Returns:
-        A mapping of nodes if an isomorphism exists, else None.
+        A mapping of nodes if an isomorphism exists, else None. An empty H maps trivially ({}).
     """
-    from itertools import permutations
-    if len(H.nodes) > len(G.nodes):
-        return None
-    
-    for mapping in permutations(G.nodes, len(H.nodes)):
-        node_map = dict(zip(H.nodes, mapping))
-        if all((node_map[u], node_map[v]) in G.edges for u, v in H.edges):
-            return node_map
+    from stats import phase
+    search = iter_naive_subgraph_isomorphisms(G, H, node_match, edge_match, mode, stats)
+    with phase(stats, "search"):
+        for mapping in search:
+            return mapping
     return None
+
+
+def iter_naive_subgraph_isomorphisms(G, H, node_match=None, edge_match=None, mode="monomorphism", stats=None):
+    """
+    Yields every embedding of H in G, in the order of itertools.permutations(G.nodes, len(H)).
+    The nodes of H are assigned in their own order, with no ordering heuristics or domain
+    filtering; a partial assignment is dropped as soon as its newest node breaks an edge (or, in
+    induced mode, a non-edge) with the nodes already assigned, using an adjacency matrix of G
+    over integer node indices.
+    Args:
+        G, H, node_match, edge_match, mode, stats: As for naive_subgraph_isomorphism.
+    Yields:
+        Mappings from the nodes of H to nodes of G.
+    """
+    if mode not in ("monomorphism", "induced"):
+        raise ValueError(f"Unknown mode {mode!r}; expected 'monomorphism' or 'induced'")
+    induced = mode == "induced"
+    directed = H.is_directed()
+    pattern_nodes = list(H.nodes)
+    nodes = list(G.nodes)
+    k, n = len(pattern_nodes), len(nodes)
+    if k > n:
+        return
+    if k == 0:
+        if stats is not None:
+            stats.embeddings += 1
+        yield {}
+        return
+
+    # matrix[x][y] is the number of edges from node x to node y of G.
+    index = {v: i for i, v in enumerate(nodes)}
+    matrix = [[0] * n for _ in range(n)]
+    for u, v in G.edges():
+        x, y = index[u], index[v]
+        matrix[x][y] += 1
+        if not directed and x != y:
+            matrix[y][x] += 1
+
+    # At depth d, checks[d] lists (e, into, out of): the edge counts required between the nodes of
+    # H at depths e <= d (e == d for a self-loop). Monomorphisms skip pairs that need no edge.
+    checks = []
+    matches = []
+    for d, u in enumerate(pattern_nodes):
+        pairs = []
+        for e, w in enumerate(pattern_nodes[:d + 1]):
+            into = H.number_of_edges(w, u)
+            out = H.number_of_edges(u, w) if directed else into
+            if induced or into or out:
+                pairs.append((e, into, out))
+        checks.append(pairs)
+        if edge_match is not None:
+            edges = [(e, True, H[w][u]) for e, w in enumerate(pattern_nodes[:d + 1]) if H.has_edge(w, u)]
+            if directed:
+                edges += [(e, False, H[u][w]) for e, w in enumerate(pattern_nodes[:d]) if H.has_edge(u, w)]
+            matches.append(edges)
+    node_data = [G.nodes[v] for v in nodes] if node_match is not None else None
+    pattern_data = [H.nodes[u] for u in pattern_nodes]
+
+    if stats is not None:
+        tried, accepted = stats.depths(k)
+    assignment = [0] * k
+    used = [False] * n
+    next_candidate = [0] * k
+    d = 0
+    while d >= 0:
+        x = next_candidate[d]
+        if x == n:
+            d -= 1
+            if d >= 0:
+                used[assignment[d]] = False
+            continue
+        next_candidate[d] = x + 1
+        if used[x]:
+            continue
+        assignment[d] = x
+        reason = None
+        row = matrix[x]
+        for e, into, out in checks[d]:
+            y = assignment[e]
+            have = (matrix[y][x], row[y]) if directed else (row[y], row[y])
+            if have != (into, out):
+                if not have[0] and into or not have[1] and out:
+                    reason = "edges"
+                elif have[0] < into or have[1] < out:
+                    reason = "multiplicity"
+                elif induced:
+                    reason = "induced"
+                else:
+                    continue
+                break
+        if reason is None and node_match is not None and not node_match(node_data[x], pattern_data[d]):
+            reason = "node_match"
+        if reason is None and edge_match is not None:
+            for e, forward, data in matches[d]:
+                y = nodes[assignment[e]]
+                if not edge_match(G[y][nodes[x]] if forward else G[nodes[x]][y], data):
+                    reason = "edge_match"
+                    break
+        if stats is not None:
+            tried[d] += 1
+            if reason is not None:
+                stats.reject(reason)
+            else:
+                accepted[d] += 1
+        if reason is not None:
+            continue
+        if d == k - 1:
+            if stats is not None:
+                stats.embeddings += 1
+            yield {u: nodes[y] for u, y in zip(pattern_nodes, assignment)}
+        else:
+            used[x] = True
+            d += 1
+            next_candidate[d] = 0
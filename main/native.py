@@ -0,0 +1,405 @@
+import weakref
+from time import perf_counter
+
+import numpy as np
+
+from compiled_graph import CompiledTarget, bits_to_indices, edge_label_tuple, entry_values, pack_bits
+
+# States explored per kernel call when there is no deadline or cancel flag to check between calls.
+CHUNK_STATES = 1 << 16
+# With one, calls return after this many states, or after a depth has scanned this many candidates
+# without accepting one, as ri_search checks its clock.
+CHECK_STATES = 1024
+CHECK_CANDIDATES = 4096
+
+# Kernel return codes.
+EXHAUSTED, FOUND, PAUSED = 0, 1, 2
+
+# Per-entry arrays of compiled targets (see target_arrays), built once per target.
+_target_cache = weakref.WeakKeyDictionary()
+
+
+def _find(offsets, neighbors, i, j):
+    """
+    Returns the position of j in the sorted CSR row i, or -1.
+    """
+    low, high = offsets[i], offsets[i + 1]
+    while low < high:
+        middle = (low + high) >> 1
+        if neighbors[middle] < j:
+            low = middle + 1
+        else:
+            high = middle
+    if low < offsets[i + 1] and neighbors[low] == j:
+        return low
+    return -1
+
+
+def _labels_fit(labels, start, stop, wanted, low, high, exact):
+    """
+    Compares the sorted label codes labels[start:stop] of the parallel edges between two target
+    nodes with the sorted codes wanted[low:high] the pattern needs: equal when exact, else contained.
+    """
+    if exact:
+        if stop - start != high - low:
+            return False
+        for t in range(high - low):
+            if labels[start + t] != wanted[low + t]:
+                return False
+        return True
+    for t in range(low, high):
+        while start < stop and labels[start] < wanted[t]:
+            start += 1
+        if start == stop or labels[start] != wanted[t]:
+            return False
+        start += 1
+    return True
+
+
+def _arc_fits(arc_offsets, arc_neighbors, label_offsets, labels, counts, a, b, spec, spec_counts,
+              spec_offsets, spec_labels, induced):
+    """
+    Checks the edges from target node a to b against the pattern edges described by spec (their
+    number and label codes, see edge_specs).
+    """
+    need = spec_counts[spec]
+    position = _find(arc_offsets, arc_neighbors, a, b)
+    if position < 0:
+        return need == 0
+    if need == 0:
+        return not induced
+    have = counts[position] if len(counts) else 1
+    if have < need or induced and have != need:
+        return False
+    if not len(labels):
+        return True
+    if len(label_offsets):
+        start, stop = label_offsets[position], label_offsets[position + 1]
+    else:
+        start, stop = position, position + 1
+    return _labels_fit(labels, start, stop, spec_labels, spec_offsets[spec], spec_offsets[spec + 1], induced)
+
+
+def run_kernel(offsets, neighbors, arc_offsets, arc_neighbors, label_offsets, labels, counts, degrees, order,
+               parent_offsets, parents, into_specs, outof_specs, loop_specs, spec_counts, spec_offsets, spec_labels,
+               above_offsets, above, below_offsets, below, domain_words, domain_offsets, domain_values, directed,
+               induced, count_only, budget, scan, mapping, inverse, parent_marks, from_row, cursor, end, tried,
+               accepted, state):
+    """
+    The RI search loop of bonnici_giugno.ri_search over plain integer arrays, so that Numba can
+    compile it. All search state lives in the arrays passed in, so a call returns after an
+    embedding (FOUND), after budget states (PAUSED) or when the search space is exhausted
+    (EXHAUSTED), and the next call resumes where it stopped.
+    Args:
+        offsets, neighbors: Undirected CSR of the target.
+        arc_offsets, arc_neighbors: CSR of the arcs (the same arrays when undirected).
+        label_offsets, labels: Sorted edge label codes per arc entry: labels[label_offsets[e]:label_offsets[e + 1]]
+            for entry e of a multigraph, labels[e] alone when label_offsets is empty (labels empty if unused).
+        counts: Parallel edge counts per arc entry (empty if unused).
+        degrees: Target degrees.
+        order: Matching order (compiled pattern ids).
+        parent_offsets, parents: Per depth, the pattern neighbors mapped at earlier depths.
+        into_specs, outof_specs: Per parents entry q, the edge spec of the pattern edges from q to the
+            node of the depth and from it to q (outof_specs is only read when directed).
+        loop_specs: Per depth, the edge spec of the self-loops of its node.
+        spec_counts, spec_offsets, spec_labels: Edge specs (see edge_specs).
+        above_offsets, above, below_offsets, below: Per depth, the pattern nodes mapped at earlier
+            depths whose images must be smaller (above) or larger (below) than the candidate.
+        domain_words: Per depth, the domain bitset as int64 words (bit c % 64 of word c // 64).
+        domain_offsets, domain_values: Per depth without mapped parents, the sorted candidates of
+            the domain (empty rows elsewhere).
+        directed, induced, count_only: Flags; in count_only mode embeddings are counted in state[2]
+            instead of being returned.
+        budget: Number of states after which the call pauses.
+        scan: Number of candidates a depth scans without accepting one before the call pauses.
+        mapping, inverse, from_row, cursor, end: Search state, as in ri_search.
+        parent_marks: Scratch array of k zeros, used to tell parents apart in the induced check.
+        tried, accepted: Per-depth candidate and state counters.
+        state: [depth, resume flag, embeddings counted, states explored].
+    Returns:
+        EXHAUSTED, FOUND or PAUSED.
+    """
+    k = len(order)
+    d = state[0]
+    if state[1] == 1:
+        # Resuming after an embedding was returned.
+        mapping[order[d]] = -1
+    states = 0
+    while d >= 0:
+        p = order[d]
+        i, e = cursor[d], min(end[d], cursor[d] + scan)
+        found = -1
+        if induced:
+            for t in range(parent_offsets[d], parent_offsets[d + 1]):
+                parent_marks[parents[t]] = 1
+        while i < e:
+            c = neighbors[i] if from_row[d] else domain_values[i]
+            i += 1
+            if inverse[c] >= 0 or not domain_words[d, c >> 6] >> (c & 63) & 1:
+                continue
+            fits = True
+            for t in range(above_offsets[d], above_offsets[d + 1]):
+                if c < mapping[above[t]]:
+                    fits = False
+                    break
+            for t in range(below_offsets[d], below_offsets[d + 1]):
+                if c > mapping[below[t]]:
+                    fits = False
+                    break
+            if not fits:
+                continue
+            loop = loop_specs[d]
+            if (spec_counts[loop] > 0 or induced) and not _arc_fits(
+                    arc_offsets, arc_neighbors, label_offsets, labels, counts, c, c, loop, spec_counts, spec_offsets,
+                    spec_labels, induced):
+                continue
+            fits = True
+            for t in range(parent_offsets[d], parent_offsets[d + 1]):
+                a = mapping[parents[t]]
+                if not _arc_fits(arc_offsets, arc_neighbors, label_offsets, labels, counts, a, c, into_specs[t],
+                                 spec_counts, spec_offsets, spec_labels, induced):
+                    fits = False
+                    break
+                if directed and not _arc_fits(arc_offsets, arc_neighbors, label_offsets, labels, counts, c, a,
+                                              outof_specs[t], spec_counts, spec_offsets, spec_labels, induced):
+                    fits = False
+                    break
+            if not fits:
+                continue
+            if induced:
+                # Mapped pattern nodes that are not neighbors of p must not be adjacent to c.
+                for t in range(d):
+                    q = order[t]
+                    if not parent_marks[q] and _find(offsets, neighbors, mapping[q], c) >= 0:
+                        fits = False
+                        break
+                if not fits:
+                    continue
+            found = c
+            break
+        if induced:
+            for t in range(parent_offsets[d], parent_offsets[d + 1]):
+                parent_marks[parents[t]] = 0
+        tried[d] += i - cursor[d]
+        cursor[d] = i
+
+        if found < 0 and i < end[d]:
+            # The scan limit was hit; the next call goes on with the rest of the candidates.
+            state[0], state[1] = d, 0
+            return PAUSED
+        if found < 0:
+            d -= 1
+            if d >= 0:
+                inverse[mapping[order[d]]] = -1
+                mapping[order[d]] = -1
+            continue
+
+        accepted[d] += 1
+        states += 1
+        state[3] += 1
+        mapping[p] = found
+        if d == k - 1:
+            if not count_only:
+                state[0], state[1] = d, 1
+                return FOUND
+            state[2] += 1
+            mapping[p] = -1
+        else:
+            inverse[found] = p
+            d += 1
+            # Scan the neighbors of the mapped parent image with the smallest degree, or the domain.
+            pivot = -1
+            for t in range(parent_offsets[d], parent_offsets[d + 1]):
+                image = mapping[parents[t]]
+                if pivot < 0 or degrees[image] < degrees[pivot]:
+                    pivot = image
+            if pivot >= 0:
+                from_row[d], cursor[d], end[d] = 1, offsets[pivot], offsets[pivot + 1]
+            else:
+                from_row[d], cursor[d], end[d] = 0, domain_offsets[d], domain_offsets[d + 1]
+        if states >= budget:
+            state[0], state[1] = d, 0
+            return PAUSED
+    state[0], state[1] = d, 0
+    return EXHAUSTED
+
+
+# The compiled run_kernel, set by warm_up.
+kernel = None
+
+
+def warm_up():
+    """
+    Compiles the kernel with Numba (or loads it from Numba's cache) and runs it on a tiny search,
+    for targets held in memory and for read-only mapped ones, so that no query pays for
+    compilation. Until this is called, searches use the pure-Python ri_search and Numba is not
+    even imported. Calling it again does nothing.
+    Returns:
+        True if the kernel is available, False if Numba is not installed.
+    """
+    global kernel, _find, _labels_fit, _arc_fits
+    if kernel is not None:
+        return True
+    try:
+        import numba
+    except ImportError:
+        return False
+    jit = numba.njit(cache=True)
+    _find, _labels_fit, _arc_fits = jit(_find), jit(_labels_fit), jit(_arc_fits)
+    compiled = jit(run_kernel)
+    # A single edge, once with writable arrays and once with read-only ones, as mapped files have.
+    arrays = [np.array([0, 1, 2], dtype=np.int64), np.array([1, 0], dtype=np.int64), np.array([1, 1], dtype=np.int64)]
+    frozen = [array.copy() for array in arrays]
+    for array in frozen:
+        array.setflags(write=False)
+    targets = [CompiledTarget.from_arrays(*arrays), CompiledTarget.from_arrays(*frozen)]
+    for target in targets:
+        for _ in native_search(target, target, [0, 1], [3, 3], run=compiled):
+            pass
+    kernel = compiled
+    return True
+
+
+def available():
+    """
+    Returns True if the compiled kernel can be used, i.e. warm_up has compiled it (and kernel has
+    not been set to None again to force the pure-Python search).
+    """
+    return kernel is not None
+
+
+def target_arrays(target):
+    """
+    Returns (arc_offsets, arc_neighbors, label_offsets, labels, counts, vocabulary) for a CompiledTarget:
+    the arc CSR (the undirected one unless directed), edge label codes per arc entry as described for
+    run_kernel, the vocabulary from label to code, and parallel edge counts per arc entry. Unused
+    arrays are empty. Cached per target.
+    """
+    arrays = _target_cache.get(target)
+    if arrays is not None:
+        return arrays
+    arc_offsets, arc_neighbors = (target.out_offsets, target.out_neighbors) if target.directed else (
+        target.offsets, target.neighbors)
+    empty = np.empty(0, dtype=np.int64)
+    label_offsets, labels, counts, vocabulary = empty, empty, empty, {}
+    if target.edge_labels is not None:
+        label_offsets, labels, vocabulary = target.arc_label_codes()
+    if target.multiplicity is not None:
+        counts, _ = entry_values(target.multiplicity, arc_offsets, arc_neighbors)
+        # A copy even of mapped counts, so that the kernel sees the same array types as in warm_up.
+        counts = np.array(counts, dtype=np.int64)
+    arrays = (arc_offsets, arc_neighbors, label_offsets, labels, counts, vocabulary)
+    _target_cache[target] = arrays
+    return arrays
+
+
+def edge_specs(target, pattern, order, parent_rows, vocabulary):
+    """
+    Describes the pattern edges the kernel checks as edge specs: spec s stands for spec_counts[s]
+    parallel edges whose sorted label codes are spec_labels[spec_offsets[s]:spec_offsets[s + 1]]
+    (no codes without labels, and -2 for a label G does not have). Spec 0 means no edge.
+    Returns:
+        (into_specs, outof_specs, loop_specs, spec_counts, spec_offsets, spec_labels) as run_kernel takes them.
+    """
+    multiplicity = pattern.multiplicity or {}
+    labelled = target.edge_labels is not None
+    specs = {(0, ()): 0}
+
+    def spec(a, b):
+        if not pattern.out_bits[a] >> b & 1:
+            return 0
+        codes = ()
+        if labelled:
+            codes = tuple(sorted(vocabulary.get(label, -2)
+                                 for label in edge_label_tuple(pattern, pattern.edge_labels[a, b])))
+        return specs.setdefault((multiplicity.get((a, b), 1), codes), len(specs))
+
+    into_specs = np.array([spec(q, p) for d, p in enumerate(order) for q in parent_rows[d]], dtype=np.int64)
+    outof_specs = np.array([spec(p, q) for d, p in enumerate(order) for q in parent_rows[d]], dtype=np.int64)
+    loop_specs = np.array([spec(p, p) for p in order], dtype=np.int64)
+    spec_counts = np.array([count for count, _ in specs], dtype=np.int64)
+    spec_offsets = np.zeros(len(specs) + 1, dtype=np.int64)
+    spec_offsets[1:] = np.cumsum([len(codes) for _, codes in specs])
+    spec_labels = np.array([code for _, codes in specs for code in codes], dtype=np.int64)
+    return into_specs, outof_specs, loop_specs, spec_counts, spec_offsets, spec_labels
+
+
+def _rows(rows):
+    """
+    Packs a list of integer lists into (offsets, values) arrays, CSR style.
+    """
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(row) for row in rows])
+    values = np.concatenate([np.asarray(row, dtype=np.int64) for row in rows] + [np.empty(0, dtype=np.int64)])
+    return offsets, values
+
+
+def native_search(target, pattern, order, domains, conditions=(), deadline=None, cancel=None, induced=False,
+                  count=False, stats=None, run=None):
+    """
+    Runs the RI search of ri_search with the compiled kernel and yields the same embeddings in the
+    same order. Arguments are as for ri_search (edge_match is not supported).
+    Args:
+        count: If True, yield the number of embeddings found per kernel call instead of mappings.
+        run: The kernel function; defaults to the compiled kernel. run_kernel runs the same loop as
+            plain Python, which is only useful for testing.
+    Yields:
+        Mapping lists (pattern id -> target id), or counts when count is True.
+    """
+    run = run or kernel
+    k, n = len(order), len(target)
+    arc_offsets, arc_neighbors, label_offsets, labels, counts, vocabulary = target_arrays(target)
+    # Plain ndarray views, so that mapped arrays do not make Numba compile another specialisation.
+    offsets, neighbors, degrees, arc_offsets, arc_neighbors = (
+        np.asarray(array) for array in (target.offsets, target.neighbors, target.degrees, arc_offsets,
+                                        arc_neighbors))
+    order_array = np.array(order, dtype=np.int64)
+    depth_of = np.empty(k, dtype=np.int64)
+    depth_of[order_array] = np.arange(k)
+
+    parent_rows = [[q for q in pattern.neighbors_of(p).tolist() if depth_of[q] < d] for d, p in enumerate(order)]
+    parent_offsets, parents = _rows(parent_rows)
+    specs = edge_specs(target, pattern, order, parent_rows, vocabulary)
+    above_offsets, above = _rows([[u for u, v in conditions if v == p and depth_of[u] < d]
+                                  for d, p in enumerate(order)])
+    below_offsets, below = _rows([[v for u, v in conditions if u == p and depth_of[v] < d]
+                                  for d, p in enumerate(order)])
+    domain_words = np.stack([pack_bits(domains[p], n) for p in order]).view(np.int64)
+    domain_offsets, domain_values = _rows([() if row else bits_to_indices(domains[p], n)
+                                           for p, row in zip(order, parent_rows)])
+
+    mapping = np.full(k, -1, dtype=np.int64)
+    inverse = np.full(n, -1, dtype=np.int64)
+    parent_marks = np.zeros(k, dtype=np.int64)
+    from_row = np.zeros(k, dtype=np.int64)
+    cursor = np.zeros(k, dtype=np.int64)
+    end = np.zeros(k, dtype=np.int64)
+    cursor[0], end[0] = domain_offsets[0], domain_offsets[1]
+    tried = np.zeros(k, dtype=np.int64)
+    accepted = np.zeros(k, dtype=np.int64)
+    state = np.zeros(4, dtype=np.int64)
+    watch = deadline is not None or cancel is not None
+    budget, scan = (CHECK_STATES, CHECK_CANDIDATES) if watch else (CHUNK_STATES, len(domain_values) + len(neighbors))
+    try:
+        while True:
+            code = run(offsets, neighbors, arc_offsets, arc_neighbors, label_offsets, labels, counts, degrees,
+                       order_array, parent_offsets, parents, *specs, above_offsets, above, below_offsets, below,
+                       domain_words, domain_offsets, domain_values, target.directed, induced, count, budget, scan,
+                       mapping, inverse, parent_marks, from_row, cursor, end, tried, accepted, state)
+            if count and state[2]:
+                yield int(state[2])
+                state[2] = 0
+            if code == FOUND:
+                yield mapping.tolist()
+            elif code == EXHAUSTED:
+                return
+            if watch and (deadline is not None and perf_counter() > deadline
+                          or cancel is not None and cancel.is_set()):
+                return
+    finally:
+        if stats is not None:
+            stats_tried, stats_accepted = stats.depths(k)
+            for d in range(k):
+                stats_tried[d] += int(tried[d])
+                stats_accepted[d] += int(accepted[d])
+            stats.embeddings += int(accepted[k - 1]) if k else 0
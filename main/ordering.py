@@ -0,0 +1,178 @@
+import heapq
+import math
+
+
+def greatest_constraint_first(pattern_graph, start=()):
+    """
+    Orders the vertices of the pattern graph based on constraints.
+    After the vertex of highest degree (or the vertices in start, in that order), each round takes the vertex with the most ordered
+    neighbors, then the most unordered neighbors, then the highest degree. Ties go to the vertex
+    met first when iterating set(pattern_graph.nodes).
+    Neighbor counts are updated as vertices are ordered and the next vertex comes off a heap,
+    so this runs in O((|V| + |E|) log |V|) instead of rescanning every pair each round.
+    """
+    remaining = set(pattern_graph.nodes)
+    if not remaining:
+        return []
+    rank = {v: i for i, v in enumerate(remaining)}
+    neighbors = {v: set() for v in remaining}
+    for u, v in pattern_graph.edges():
+        neighbors[u].add(v)
+        neighbors[v].add(u)
+    degree = dict(pattern_graph.degree)
+    connected = dict.fromkeys(remaining, 0)
+
+    def entry(v):
+        return -connected[v], connected[v] - len(neighbors[v]), -degree[v], rank[v], v
+
+    heap = [entry(v) for v in remaining]
+    heapq.heapify(heap)
+    ordered_vertices = []
+
+    def place(v):
+        ordered_vertices.append(v)
+        remaining.remove(v)
+        for u in neighbors[v]:
+            if u in remaining:
+                connected[u] += 1
+                heapq.heappush(heap, entry(u))
+
+    for v in start:
+        place(v)
+    if remaining and not start:
+        place(min(remaining, key=lambda v: (-degree[v], rank[v])))
+    while remaining:
+        key = heapq.heappop(heap)
+        v = key[-1]
+        if v in remaining and -key[0] == connected[v]:
+            place(v)
+    return ordered_vertices
+
+
+def gcf_order(H, pattern, target, domains):
+    """
+    The RI ordering, greatest_constraint_first. Looks at H only.
+    """
+    return greatest_constraint_first(H)
+
+
+def bfs_order(H, pattern, target, domains):
+    """
+    VF2++-style ordering: breadth-first from the node whose label is rarest in G (then highest
+    degree). Within each BFS level, repeatedly takes the node with the most ordered neighbors,
+    then the highest degree, then the rarest label. Each component gets its own root.
+    """
+    k = len(pattern)
+    neighbors = _neighbor_sets(pattern)
+    degree = pattern.degree_list
+    if target.label_index is not None:
+        rarity = [len(target.label_index.get(label, ())) for label in pattern.node_labels]
+    else:
+        rarity = [0] * k
+    connected = [0] * k
+    placed = [False] * k
+    order = []
+    while len(order) < k:
+        root = min((p for p in range(k) if not placed[p]), key=lambda p: (rarity[p], -degree[p], p))
+        level = [root]
+        seen = {root}
+        while level:
+            pending = set(level)
+            while pending:
+                p = min(pending, key=lambda p: (-connected[p], -degree[p], rarity[p], p))
+                pending.remove(p)
+                placed[p] = True
+                order.append(p)
+                for q in neighbors[p]:
+                    connected[q] += 1
+            next_level = []
+            for p in level:
+                for q in sorted(neighbors[p]):
+                    if q not in seen:
+                        seen.add(q)
+                        next_level.append(q)
+            level = next_level
+    return [pattern.nodes[p] for p in order]
+
+
+def domain_order(H, pattern, target, domains):
+    """
+    Orders by the expected number of candidates: the domain size of p, shrunk by the edge
+    probability of G once for every ordered neighbor of p. Starts from the smallest domain and
+    always takes the node with the fewest expected candidates given what is already ordered.
+    """
+    k, n = len(pattern), len(target)
+    neighbors = _neighbor_sets(pattern)
+    degree = pattern.degree_list
+    density = len(target.neighbors) / (n * (n - 1)) if n > 1 else 1.0
+    shrink = math.log(min(max(density, 1e-12), 1.0))
+    size = [math.log(max(domain.bit_count(), 1)) for domain in domains]
+    connected = [0] * k
+
+    def entry(p):
+        return size[p] + connected[p] * shrink, -degree[p], p
+
+    heap = [entry(p) for p in range(k)]
+    heapq.heapify(heap)
+    placed = [False] * k
+    order = []
+    while heap:
+        score, _, p = heapq.heappop(heap)
+        if placed[p] or score != entry(p)[0]:
+            continue
+        placed[p] = True
+        order.append(p)
+        for q in neighbors[p]:
+            if not placed[q]:
+                connected[q] += 1
+                heapq.heappush(heap, entry(q))
+    return [pattern.nodes[p] for p in order]
+
+
+def auto_order(H, pattern, target, domains):
+    """
+    Picks an ordering from cheap statistics of G and H: domain_order when the domain sizes or
+    G's degrees are strongly skewed, bfs_order for labelled graphs, and gcf_order otherwise.
+    """
+    sizes = [domain.bit_count() for domain in domains]
+    degrees = target.degrees
+    skewed_degrees = len(degrees) > 0 and degrees.max() >= 10 * max(degrees.mean(), 1)
+    if max(sizes) >= 4 * min(sizes) or skewed_degrees:
+        return domain_order(H, pattern, target, domains)
+    if target.node_labels is not None:
+        return bfs_order(H, pattern, target, domains)
+    return gcf_order(H, pattern, target, domains)
+
+
+# Built-in strategies by name. A strategy is called as strategy(H, pattern, target, domains),
+# where pattern and target are CompiledTargets and domains come from compute_domains, and
+# returns the nodes of H in matching order.
+ORDERINGS = {
+    "gcf": gcf_order,
+    "bfs": bfs_order,
+    "domain": domain_order,
+    "auto": auto_order,
+}
+
+
+def matching_order(H, pattern, target, domains, ordering="gcf"):
+    """
+    Runs an ordering strategy and converts its result to compiled pattern ids.
+    Args:
+        ordering: Name of a built-in strategy (see ORDERINGS) or a callable with the same signature.
+    Returns:
+        A list of compiled pattern ids.
+    Raises:
+        ValueError: If the name is unknown or the strategy does not return every node of H once.
+    """
+    strategy = ordering if callable(ordering) else ORDERINGS.get(ordering)
+    if strategy is None:
+        raise ValueError(f"Unknown ordering: {ordering}")
+    order = [pattern.index[v] for v in strategy(H, pattern, target, domains)]
+    if sorted(order) != list(range(len(pattern))):
+        raise ValueError("The ordering must list every node of H exactly once")
+    return order
+
+
+def _neighbor_sets(pattern):
+    return [set(pattern.neighbors_of(p).tolist()) - {p} for p in range(len(pattern))]
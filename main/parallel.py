@@ -0,0 +1,287 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import ExitStack, contextmanager
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from time import perf_counter
+
+import numpy as np
+
+import native
+from bonnici_giugno import (_is_induced, bonnici_giugno_subgraph_isomorphism, prepare_search, ri_search,
+                            search_subgraph_isomorphism)
+from compiled_graph import CompiledTarget, bits_to_indices
+from graph_file import open_graph
+from symmetry import symmetry_breaking_conditions
+
+# States a worker explores before it hands the rest of its subtree back to the parent,
+# which splits it into new tasks. This keeps unbalanced search trees spread over all workers.
+SPLIT_STATES = 20000
+
+# Per-process state of a worker: the attached shared blocks, the target built on them,
+# the cancellation event and the per-query cancellation flags.
+_worker = {}
+
+
+class QueryCancel:
+    """
+    Cancellation token of one query of a target_pool: set once the pool's event or the query's
+    entry of the shared flags array is set.
+    """
+
+    def __init__(self, event, flags, slot):
+        self.event = event
+        self.flags = flags
+        self.slot = slot
+
+    def is_set(self):
+        return self.flags[self.slot] != 0 or self.event.is_set()
+
+
+class SharedTarget:
+    """
+    Copies the CSR arrays of a CompiledTarget (and the in/out arrays of a directed one) into
+    shared memory once, so worker processes attach to them at start-up instead of receiving a
+    pickled copy with every task.
+    Use as a context manager; the shared blocks are released on exit.
+    """
+
+    def __init__(self, target):
+        self.blocks = []
+        self.spec = []
+        for array in (target.offsets, target.neighbors, target.degrees) + (target.arcs() or ()):
+            block = SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[:] = array
+            self.blocks.append(block)
+            self.spec.append((block.name, array.dtype.str, array.shape))
+        self.labels = (target.node_label, target.node_labels, target.edge_label, target.edge_labels,
+                       target.multiplicity)
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach_targets(sources, cancel, compiled=False, flags=None):
+    """
+    Process-pool initializer: attaches every target once per worker. sources maps each target name
+    to (source, layout), where source is the path of its graph file, which is mapped again, or the
+    (spec, labels) of a SharedTarget, whose blocks are attached and compiled; layout is the
+    adjacency layout of the original target, so a manual choice carries over to the workers.
+    With compiled=True the worker warms up the compiled kernel (see native.warm_up) before its
+    first task. flags is the shared array of per-query cancellation flags, if any (see target_pool).
+    """
+    if compiled:
+        native.warm_up()
+    blocks, targets = [], {}
+    for name, (source, layout) in sources.items():
+        if not isinstance(source, tuple):
+            targets[name] = open_graph(source)
+            targets[name].layout = layout
+            continue
+        spec, labels = source
+        attached = [SharedMemory(name=block) for block, _, _ in spec]
+        arrays = [np.ndarray(shape, dtype, buffer=block.buf) for block, (_, dtype, shape) in zip(attached, spec)]
+        node_label, node_labels, edge_label, edge_labels, multiplicity = labels
+        targets[name] = CompiledTarget.from_arrays(*arrays[:3], node_label=node_label, node_labels=node_labels,
+                                                   edge_label=edge_label, edge_labels=edge_labels,
+                                                   arcs=tuple(arrays[3:]) or None, multiplicity=multiplicity,
+                                                   layout=layout)
+        blocks += attached
+    _worker.update(blocks=blocks, targets=targets, target=targets.get(None), cancel=cancel,
+                   flags=flags)
+
+
+@contextmanager
+def worker_pool(target, workers=None, cancel=None):
+    """
+    Starts a process pool whose workers share one copy of target: a target opened from a graph file
+    is mapped again by each worker (the operating system keeps one copy of its pages), any other is
+    copied into shared memory (see SharedTarget).
+    Args:
+        target: CompiledTarget to share.
+        workers: Number of worker processes; defaults to os.cpu_count().
+        cancel: Optional multiprocessing Event the workers watch; a new one is made if omitted.
+    Yields:
+        The ProcessPoolExecutor. Outstanding futures are cancelled on exit. Its workers use the
+        compiled kernel if this process has warmed it up.
+    """
+    with target_pool({None: target}, workers, cancel, native.available()) as pool:
+        yield pool
+
+
+@contextmanager
+def target_pool(targets, workers=None, cancel=None, compiled=False, flags=None):
+    """
+    Like worker_pool for several targets at once; worker functions look them up by name in
+    _worker["targets"].
+    Args:
+        targets: Dict from name to CompiledTarget.
+        workers, cancel: As for worker_pool.
+        compiled: If True, every worker warms up the compiled kernel when it starts.
+        flags: Optional shared array (such as a multiprocessing RawArray) of per-query cancellation
+            flags; search_pattern, start_task and run_task given a slot stop once flags[slot] is set.
+    Yields:
+        The ProcessPoolExecutor. Outstanding futures are cancelled on exit.
+    """
+    context = get_context()
+    cancel = cancel if cancel is not None else context.Event()
+    with ExitStack() as stack:
+        sources = {}
+        for name, target in targets.items():
+            if target.path is None:
+                shared = stack.enter_context(SharedTarget(target))
+                sources[name] = ((shared.spec, shared.labels), target.layout)
+            else:
+                sources[name] = (target.path, target.layout)
+        pool = ProcessPoolExecutor(workers or os.cpu_count() or 1, mp_context=context, initializer=attach_targets,
+                                   initargs=(sources, cancel, compiled, flags))
+        try:
+            yield pool
+        finally:
+            cancel.set()
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def match_pattern(H, ordering="gcf", mode="monomorphism"):
+    """
+    Finds one embedding of H in the worker's shared target.
+    Returns:
+        The mapping with compiled target ids as values, as from bonnici_giugno_subgraph_isomorphism.
+    """
+    return bonnici_giugno_subgraph_isomorphism(_worker["target"], H, ordering=ordering, mode=mode)
+
+
+def search_pattern(name, H, remaining=None, ordering="gcf", mode="monomorphism", slot=None):
+    """
+    Looks for one embedding of H in the worker's target called name within remaining seconds, or
+    until the pool or the query with the given slot of the pool's flags is cancelled.
+    Returns:
+        A SearchResult, with compiled target ids as the values of its mappings.
+    """
+    return search_subgraph_isomorphism(_worker["targets"][name], H, timeout=remaining, cancel=_cancel(slot),
+                                       ordering=ordering, mode=mode)
+
+
+def start_task(name, H, remaining=None, ordering="gcf", mode="monomorphism", symmetry_breaking=False,
+               task_mode="all", slot=None):
+    """
+    Plans a search for H in the worker's target called name and runs its first subtree (see run_task).
+    Returns:
+        (plan, mappings or count, unexplored (prefix, roots) pairs); plan is None when H has no
+        embedding that the domains allow.
+    """
+    start = perf_counter()
+    target, pattern, order, domains = prepare_search(_worker["targets"][name], H, ordering=ordering)
+    if domains is None:
+        return None, 0 if task_mode == "count" else [], []
+    conditions = symmetry_breaking_conditions(pattern, order) if symmetry_breaking else ()
+    plan = (pattern, order, domains, conditions, _is_induced(mode))
+    roots = bits_to_indices(domains[order[0]], len(target)).tolist()
+    if remaining is not None:
+        remaining = max(remaining - (perf_counter() - start), 0)
+    return (plan,) + run_task(plan, [], roots, task_mode, remaining, name, slot)
+
+
+def run_task(plan, prefix, roots, mode, remaining, name=None, slot=None):
+    """
+    Runs one subtree of the search inside a worker.
+    Args:
+        plan: (pattern, order, domains, conditions, induced) as used by ri_search.
+        prefix, roots: The subtree to explore (see ri_search).
+        mode: "first" to stop at the first mapping, "all" to collect mappings, "count" to count them.
+        remaining: Seconds left before the overall deadline, or None.
+        name: Name of the target in a target_pool; None for the target of a worker_pool.
+        slot: Index of the query's flag in the flags of a target_pool; None to watch only the pool's event.
+    Returns:
+        (mappings or count, unexplored (prefix, roots) pairs).
+    """
+    pattern, order, domains, conditions, induced = plan
+    deadline = perf_counter() + remaining if remaining is not None else None
+    target = _worker["targets"][name]
+    search = ri_search(target, pattern, order, domains, conditions, deadline, _cancel(slot),
+                       SPLIT_STATES, prefix, roots, induced=induced)
+    found = 0 if mode == "count" else []
+    while True:
+        try:
+            mapping = next(search)
+        except StopIteration as stop:
+            return found, stop.value or []
+        if mode == "count":
+            found += 1
+        else:
+            found.append(list(mapping))
+            if mode == "first":
+                return found, []
+
+
+def _cancel(slot):
+    # The token a task watches: the pool's event, or that and the flag of its query.
+    if slot is None:
+        return _worker["cancel"]
+    return QueryCancel(_worker["cancel"], _worker["flags"], slot)
+
+
+def split(prefix, roots, parts):
+    """
+    Splits a (prefix, roots) task into at most parts tasks with contiguous slices of roots.
+    """
+    size = max(1, -(-len(roots) // parts))
+    return [(prefix, roots[i:i + size]) for i in range(0, len(roots), size)]
+
+
+def parallel_search(target, pattern, order, domains, conditions=(), workers=None, mode="all", deadline=None,
+                    induced=False, pool=None):
+    """
+    Runs ri_search on a process pool. The domain of order[0] is split across the workers, and
+    subtrees that run longer than SPLIT_STATES states are handed back and split again.
+    Closing the generator (or leaving a for loop early) cancels all outstanding work.
+    Without pool, every call starts its own worker_pool, i.e. starts the worker processes and
+    copies target into shared memory, which takes far longer than a small search; pass the
+    pool of a SubgraphMatcher (see SubgraphMatcher.pool) to pay that once per target.
+    Args:
+        target, pattern, order, domains, conditions, deadline, induced: As for ri_search.
+        workers: Number of worker processes; defaults to os.cpu_count().
+        mode: "first", "all" or "count" (see run_task).
+        pool: Optional running worker_pool of target. Its workers are not stopped on exit: tasks
+            that have not started are cancelled, running ones end within SPLIT_STATES states.
+    Yields:
+        Copied mapping lists in modes "first" and "all" (in completion order), or partial counts in mode "count".
+    """
+    if pool is None:
+        with worker_pool(target, workers) as pool:
+            yield from parallel_search(target, pattern, order, domains, conditions, workers, mode, deadline,
+                                       induced, pool)
+        return
+    workers = workers or os.cpu_count() or 1
+    plan = (pattern, order, domains, conditions, induced)
+    roots = bits_to_indices(domains[order[0]], len(target)).tolist()
+
+    def submit(prefix, roots):
+        remaining = max(deadline - perf_counter(), 0) if deadline is not None else None
+        return pool.submit(run_task, plan, prefix, roots, mode, remaining)
+
+    pending = {submit(*task) for task in split([], roots, workers * 4)}
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                found, unexplored = future.result()
+                if deadline is None or perf_counter() < deadline:
+                    for prefix, roots in unexplored:
+                        pending.update(submit(*task) for task in split(prefix, roots, workers))
+                if mode == "count":
+                    yield found
+                else:
+                    yield from found
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,185 @@
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+
+import numpy as np
+from networkx.algorithms import isomorphism
+
+
+def graph_stamp(target):
+    """
+    Returns a content hash of a CompiledTarget (adjacency, directions, parallel edge counts, node
+    names and labels), used as its version: recompiling an unchanged G gives the same stamp, any
+    change to what the matchers see gives a new one. Costs one pass over the graph.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for array in (target.offsets, target.neighbors, target.degrees) + (target.arcs() or ()):
+        digest.update(np.ascontiguousarray(array, dtype=np.int64).tobytes())
+    digest.update(repr((list(target.nodes), target.node_label, target.node_labels, target.edge_label)).encode())
+    if target.edge_labels is not None or target.multiplicity is not None:
+        offsets, neighbors = (target.out_offsets, target.out_neighbors) if target.directed else (
+            target.offsets, target.neighbors)
+        for i in range(len(target)):
+            for j in neighbors[offsets[i]:offsets[i + 1]].tolist():
+                labels = target.edge_labels[i, j] if target.edge_labels is not None else None
+                count = target.multiplicity.get((i, j), 1) if target.multiplicity is not None else 1
+                digest.update(repr((labels, count)).encode())
+    return digest.hexdigest()
+
+
+def pattern_hash(H, node_label=None, edge_label=None, rounds=3):
+    """
+    Weisfeiler-Lehman style hash of H that is equal for isomorphic patterns (labels included) and
+    stable across processes. Different patterns may share a hash, so hits are confirmed exactly.
+    """
+    def digest(text):
+        return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+    def incident(v):
+        if H.is_directed():
+            return ([(True, u, label) for _, u, label in H.out_edges(v, data=edge_label)]
+                    + [(False, u, label) for u, _, label in H.in_edges(v, data=edge_label)])
+        return [(None, u, label) for _, u, label in H.edges(v, data=edge_label)]
+
+    rows = {v: [(forward, u, repr(label) if edge_label is not None else "") for forward, u, label in incident(v)]
+            for v in H}
+    colors = {v: digest(repr(data.get(node_label)) if node_label is not None else "")
+              for v, data in H.nodes(data=True)}
+    for _ in range(rounds):
+        colors = {v: digest(colors[v] + repr(sorted([(forward, label, colors[u]) for forward, u, label in rows[v]],
+                                                    key=repr)))
+                  for v in H}
+    summary = (len(H), H.number_of_edges(), H.is_directed(), H.is_multigraph(), sorted(colors.values()))
+    return digest(repr(summary))
+
+
+def _signature(H, node_label, edge_label):
+    # Exact form of H, so repeating the very same pattern skips the isomorphism check.
+    return (H.is_directed(), H.is_multigraph(),
+            tuple((v, data.get(node_label) if node_label is not None else None) for v, data in H.nodes(data=True)),
+            tuple((u, v, label if edge_label is not None else None) for u, v, label in H.edges(data=edge_label)))
+
+
+def multiedge_label_match(edge_label):
+    """
+    Returns an edge_match for NetworkX multigraph matchers that compares the labels of the parallel
+    edges between two nodes as multisets (sorted tuples), as the matcher does. NetworkX's
+    categorical_multiedge_match compares them as sets, which merges "a, a, b" with "a, b, b".
+    """
+    def labels(edges):
+        return tuple(sorted((data.get(edge_label) for data in edges.values()), key=repr))
+
+    return lambda first, second: labels(first) == labels(second)
+
+
+def _isomorphism(H, other, node_label, edge_label):
+    """
+    Returns a mapping from the nodes of H to those of other preserving edges and labels, or None.
+    """
+    node_match = isomorphism.categorical_node_match(node_label, None) if node_label is not None else None
+    edge_match = None
+    if edge_label is not None:
+        edge_match = (multiedge_label_match(edge_label) if H.is_multigraph() else
+                      isomorphism.categorical_edge_match(edge_label, None))
+    if H.is_multigraph():
+        matcher_class = isomorphism.MultiDiGraphMatcher if H.is_directed() else isomorphism.MultiGraphMatcher
+    else:
+        matcher_class = isomorphism.DiGraphMatcher if H.is_directed() else isomorphism.GraphMatcher
+    matcher = matcher_class(H, other, node_match, edge_match)
+    return dict(matcher.mapping) if matcher.is_isomorphic() else None
+
+
+class ResultCache:
+    """
+    Bounded LRU cache of subgraph query results, keyed by a version stamp of G (see graph_stamp)
+    and the isomorphism class of H. A pattern isomorphic to a cached one (labels included) hits
+    and gets the cached mapping relabelled through the isomorphism; "not found" is cached too.
+    Use with SubgraphMatcher(G, cache=ResultCache()), or call get/put directly.
+    Args:
+        maxsize: Maximum number of cached pattern classes; the least recently used is evicted first.
+        path: Optional file; the cache is loaded from it if it exists, and save() writes it back.
+    Attributes:
+        hits, misses: Lookup counters.
+    """
+
+    def __init__(self, maxsize=1024, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        # (stamp, pattern hash) -> list of (signature, pattern, mapping), most recently used last.
+        self._entries = OrderedDict()
+        # (stamp, signature) -> key in _entries, so repeating the very same pattern skips hashing it.
+        self._exact = {}
+        if path is not None and os.path.exists(path):
+            with open(path, "rb") as f:
+                self._entries.update(pickle.load(f))
+            for key, bucket in self._entries.items():
+                self._exact.update(((key[0], signature), key) for signature, _, _ in bucket)
+            self._evict()
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self._entries.values())
+
+    def get(self, H, stamp, node_label=None, edge_label=None):
+        """
+        Looks up a query.
+        Args:
+            H: The pattern, a NetworkX graph.
+            stamp: Version of G and of the query options (e.g. (graph_stamp(target), mode)).
+            node_label, edge_label: Labels the query matches on.
+        Returns:
+            (hit, mapping): hit is False on a miss; otherwise mapping is the cached result for H
+            (None if no embedding exists).
+        """
+        signature = _signature(H, node_label, edge_label)
+        key = self._exact.get((stamp, signature))
+        if key is None:
+            key = (stamp, pattern_hash(H, node_label, edge_label))
+        bucket = self._entries.get(key)
+        if bucket is not None:
+            for cached_signature, pattern, mapping in bucket:
+                if cached_signature == signature:
+                    relabel = {v: v for v in H}
+                else:
+                    relabel = _isomorphism(H, pattern, node_label, edge_label)
+                if relabel is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, {h: mapping[relabel[h]] for h in relabel} if mapping else mapping
+        self.misses += 1
+        return False, None
+
+    def put(self, H, stamp, mapping, node_label=None, edge_label=None):
+        """
+        Stores the result (a mapping or None) of a query; arguments as for get.
+        """
+        key = (stamp, pattern_hash(H, node_label, edge_label))
+        signature = _signature(H, node_label, edge_label)
+        self._entries.setdefault(key, []).append((signature, H.copy(), dict(mapping) if mapping is not None else None))
+        self._entries.move_to_end(key)
+        self._exact[stamp, signature] = key
+        self._evict()
+
+    def clear(self):
+        self._entries.clear()
+        self._exact.clear()
+
+    def save(self, path=None):
+        """
+        Writes the cache to path (default: the path given at construction), replacing the file atomically.
+        """
+        path = path or self.path
+        if path is None:
+            raise ValueError("no path to save the cache to")
+        partial = os.fspath(path) + ".tmp"
+        with open(partial, "wb") as f:
+            pickle.dump(list(self._entries.items()), f)
+        os.replace(partial, path)
+
+    def _evict(self):
+        while len(self._entries) > self.maxsize:
+            key, bucket = self._entries.popitem(last=False)
+            for signature, _, _ in bucket:
+                self._exact.pop((key[0], signature), None)
@@ -0,0 +1,94 @@
+import json
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+
+
+class SearchStats:
+    """
+    Opt-in counters and timings for the matchers. Pass an instance as stats= to a matcher
+    function; it is filled in during the call and may be reused to accumulate several calls.
+    Without a SearchStats the search loop only pays for one flag test per state.
+    Attributes:
+        phases: Dict from phase name ("compile", "domains", "ordering", "symmetry", "search"; graph_isomorphism
+            uses "invariants", "refinement" and "search") to seconds.
+        tried: List; entry d counts the candidates examined for the node at depth d of the matching order.
+        accepted: List; entry d counts the candidates at depth d that passed every check (search states).
+        rejected: Dict from reason to count, for the naive matcher, which applies its checks one by one,
+            and for graph_isomorphism, by the invariant or refinement that told the graphs apart.
+        embeddings: Number of embeddings reported.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.tried = []
+        self.accepted = []
+        self.rejected = {}
+        self.embeddings = 0
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Context manager adding the time spent inside it to phases[name].
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + perf_counter() - start
+
+    def depths(self, k):
+        """
+        Makes room for k depths and returns the (tried, accepted) lists for the search loop to update.
+        """
+        for counts in (self.tried, self.accepted):
+            counts.extend([0] * (k - len(counts)))
+        return self.tried, self.accepted
+
+    def reject(self, reason):
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+
+    @property
+    def states(self):
+        return sum(self.accepted)
+
+    def branching(self):
+        """
+        Returns the average branching factor per depth: the states at depth d per state at depth d - 1
+        (per search at depth 0).
+        """
+        factors = []
+        for d, count in enumerate(self.accepted):
+            parents = self.accepted[d - 1] if d else 1
+            factors.append(count / parents if parents else 0.0)
+        return factors
+
+    def pruning(self):
+        """
+        Returns the fraction of the candidates examined at each depth that were rejected.
+        """
+        return [1 - accepted / tried if tried else 0.0 for tried, accepted in zip(self.tried, self.accepted)]
+
+    def as_dict(self):
+        return {
+            "phases": dict(self.phases),
+            "states": self.states,
+            "embeddings": self.embeddings,
+            "tried": list(self.tried),
+            "accepted": list(self.accepted),
+            "branching": self.branching(),
+            "pruning": self.pruning(),
+            "rejected": dict(self.rejected),
+        }
+
+    def to_json(self, **kwargs):
+        """
+        Returns as_dict() encoded as JSON; keyword arguments go to json.dumps.
+        """
+        return json.dumps(self.as_dict(), **kwargs)
+
+
+def phase(stats, name):
+    """
+    Returns stats.phase(name), or a no-op context manager when stats is None.
+    """
+    return stats.phase(name) if stats is not None else nullcontext()
@@ -0,0 +1,66 @@
+from bonnici_giugno import ri_search
+from domains import arc_consistency, compute_domains
+
+
+def find_automorphism(pattern, order, domains, fixed, source, image, edge_match=None):
+    """
+    Returns an automorphism of the compiled pattern that fixes every node in fixed and
+    maps source to image, or None if there is none.
+    """
+    restricted = list(domains)
+    for v in fixed:
+        restricted[v] &= 1 << v
+    restricted[source] &= 1 << image
+    if any(domain == 0 for domain in restricted) or arc_consistency(pattern, pattern, restricted) is None:
+        return None
+    # Injective and edge-preserving on |V(H)| nodes, hence a bijection on the edges too.
+    search = ri_search(pattern, pattern, order, restricted, edge_match=edge_match)
+    return next((list(mapping) for mapping in search), None)
+
+
+def symmetry_breaking_conditions(pattern, order, node_match=None, edge_match=None):
+    """
+    Computes symmetry-breaking conditions for the compiled pattern (Grochow and Kellis, 2007).
+    Repeatedly takes the largest orbit of the automorphisms that fix the nodes chosen so far,
+    requires its first node to have the smallest image, and fixes that node.
+    Counting embeddings under these conditions reports each subgraph of G once.
+    Args:
+        pattern: CompiledTarget for the pattern graph.
+        order: Compiled pattern ids in matching order, reused for the automorphism searches.
+        node_match, edge_match: Optional attribute predicates; automorphisms must respect them too.
+    Returns:
+        A list of pairs (u, v) of compiled pattern ids meaning image(u) < image(v).
+    """
+    k = len(pattern)
+    domains = compute_domains(pattern, pattern, node_match)
+    conditions, fixed = [], []
+    while True:
+        orbit_of = list(range(k))
+
+        def find(v):
+            while orbit_of[v] != v:
+                orbit_of[v] = orbit_of[orbit_of[v]]
+                v = orbit_of[v]
+            return v
+
+        for a in range(k):
+            if a in fixed:
+                continue
+            for b in range(a + 1, k):
+                if b in fixed or find(a) == find(b):
+                    continue
+                automorphism = find_automorphism(pattern, order, domains, fixed, a, b, edge_match)
+                if automorphism is not None:
+                    # Every cycle of the automorphism lies inside one orbit.
+                    for v, w in enumerate(automorphism):
+                        orbit_of[find(v)] = find(w)
+
+        orbits = {}
+        for v in range(k):
+            orbits.setdefault(find(v), []).append(v)
+        orbit = max(orbits.values(), key=len)
+        if len(orbit) == 1:
+            return conditions
+        anchor = orbit[0]
+        conditions.extend((anchor, v) for v in orbit[1:])
+        fixed.append(anchor)
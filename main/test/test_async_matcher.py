@@ -0,0 +1,97 @@
+import pytest
+import asyncio
+import networkx as nx
+import os
+import sys
+
+# Add the parent directory to sys.path, import the matcher to be tested
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_matcher import AsyncSubgraphMatcher, Overloaded
+from bonnici_giugno import BUDGET_EXHAUSTED, FOUND, NOT_FOUND, iter_subgraph_isomorphisms
+
+def test_match_and_stream_named_targets():
+    G = nx.relabel_nodes(nx.gnp_random_graph(30, 0.2, seed=1), lambda v: f"v{v}")
+    T = nx.path_graph(6)
+    H = nx.cycle_graph(4)
+
+    async def run():
+        async with AsyncSubgraphMatcher({"random": G, "path": T}, workers=2) as matcher:
+            found = await matcher.match(H, "random")
+            missing = await matcher.match(H, "path")
+            streamed = [mapping async for mapping in matcher.embeddings(H, "random")]
+            return found, missing, streamed, matcher.metrics()
+
+    # Expected: Results use G's node names and the stream follows iter_subgraph_isomorphisms
+    found, missing, streamed, metrics = asyncio.run(run())
+    assert found.status == FOUND and all(G.has_edge(found.mapping[u], found.mapping[v]) for u, v in H.edges)
+    assert missing.status == NOT_FOUND
+    assert streamed == list(iter_subgraph_isomorphisms(G, H))
+    assert metrics["outcomes"]["completed"] == 3
+    assert metrics["latency"]["count"] == 3 and metrics["in_flight"] == 0
+
+def test_deadlines():
+    # Enumerating every path in K12 would take far too long
+    G = nx.complete_graph(12)
+    H = nx.path_graph(9)
+
+    async def run():
+        targets = {"complete": G, "bipartite": nx.complete_bipartite_graph(6, 7)}
+        async with AsyncSubgraphMatcher(targets, workers=1, timeout=0.2) as matcher:
+            stream = matcher.embeddings(H, "complete")
+            count = 0
+            async for _ in stream:
+                count += 1
+            # K6,7 has no Hamiltonian cycle, which takes millions of states to rule out
+            result = await matcher.match(nx.cycle_graph(13), "bipartite")
+            return stream.stopped, count, result, matcher.metrics()
+
+    # Expected: Both queries end at the deadline, the stream with what it found so far
+    stopped, count, result, metrics = asyncio.run(run())
+    assert stopped == "deadline" and count > 0
+    assert result.status == BUDGET_EXHAUSTED and result.stopped == "deadline"
+    assert metrics["outcomes"]["timed_out"] == 2
+
+def test_backpressure_and_early_close():
+    G = nx.complete_graph(12)
+    H = nx.path_graph(9)
+
+    async def run():
+        async with AsyncSubgraphMatcher(G, workers=1, max_in_flight=1, max_queued=0) as matcher:
+            stream = matcher.embeddings(H)
+            first = await stream.__anext__()
+            with pytest.raises(Overloaded):
+                await matcher.match(nx.path_graph(3))
+            await stream.aclose()
+            # The slot comes back once the worker has noticed the cancellation
+            while matcher.in_flight:
+                await asyncio.sleep(0.01)
+            after = await matcher.match(nx.path_graph(3))
+            return first, after, matcher.metrics()
+
+    # Expected: A full matcher rejects, and closing the stream frees its slot
+    first, after, metrics = asyncio.run(run())
+    assert len(first) == 9 and after.status == FOUND
+    assert metrics["rejected"] == 1
+    assert metrics["outcomes"]["cancelled"] == 1 and metrics["in_flight"] == 0
+
+def test_abandoned_searches_stop_before_their_slot_is_freed():
+    G = nx.complete_bipartite_graph(6, 7)
+
+    async def run():
+        async with AsyncSubgraphMatcher(G, workers=1, max_in_flight=1) as matcher:
+            # Without a deadline, ruling out a Hamiltonian cycle keeps the only worker busy for minutes
+            query = asyncio.ensure_future(matcher.match(nx.cycle_graph(13)))
+            await asyncio.sleep(0.3)
+            query.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await query
+            held = matcher.in_flight
+            after = await asyncio.wait_for(matcher.match(nx.path_graph(3)), 10)
+            return held, after, matcher.metrics()
+
+    # Expected: The cancelled query holds its slot until its worker stops, which it does promptly
+    held, after, metrics = asyncio.run(run())
+    assert held == 1 and after.status == FOUND
+    assert metrics["outcomes"] == {"completed": 1, "timed_out": 0, "cancelled": 1, "failed": 0}
+    assert metrics["in_flight"] == 0
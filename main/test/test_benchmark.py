@@ -0,0 +1,88 @@
+import pytest
+import networkx as nx
+import os
+import sys
+
+# Add the parent directory to sys.path, import the harness to be tested
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compiled_graph
+from benchmark import (absent_pattern, compare, compare_layouts, confidence_interval, layout_summary, load_results,
+                       make_graph, main, planted_pattern, run_benchmarks, write_results)
+from bonnici_giugno import bonnici_giugno_subgraph_isomorphism
+
+TINY_GRID = {"families": ["er", "grid"], "sizes": [12], "densities": [0.3], "pattern_sizes": [4]}
+
+def test_graphs_are_reproducible():
+    # Expected: The same seed gives the same graph for every family
+    for family in ("er", "grid", "scale_free", "regular", "path", "cycle", "complete"):
+        assert sorted(make_graph(family, 40, 0.1, 3).edges) == sorted(make_graph(family, 40, 0.1, 3).edges)
+
+def test_planted_and_absent_patterns():
+    G = make_graph("er", 30, 0.2, 1)
+
+    # Expected: The planted pattern occurs in G, the absent one does not
+    planted = planted_pattern(G, 6, 1)
+    assert nx.is_connected(planted)
+    assert bonnici_giugno_subgraph_isomorphism(G, planted) is not None
+    absent = absent_pattern(G, 6, 1)
+    assert bonnici_giugno_subgraph_isomorphism(G, absent) is None
+
+def test_run_and_round_trip(tmp_path):
+    report = run_benchmarks(TINY_GRID, ("ri",), repeats=3, warmup=1)
+
+    # Expected: One measurement per case, found exactly for the planted patterns
+    results = report["results"]
+    assert {(row["family"], row["pattern"]) for row in results} <= {(f, p) for f in ("er", "grid")
+                                                                      for p in ("planted", "absent")}
+    assert all(row["found"] == (row["pattern"] == "planted") for row in results)
+    assert all(row["ci_low"] <= row["median"] <= row["ci_high"] for row in results)
+    for name in ("results.json", "results.csv"):
+        path = str(tmp_path / name)
+        write_results(report, path)
+        assert [row["median"] for row in load_results(path)] == [row["median"] for row in results]
+
+def test_compare_flags_only_clear_regressions():
+    base = {"family": "er", "n": 10, "density": 0.3, "k": 4, "pattern": "planted", "algorithm": "ri",
+            "median": 1.0, "ci_low": 0.9, "ci_high": 1.1}
+    slower = dict(base, median=2.0, ci_low=1.8, ci_high=2.2)
+    noisy = dict(base, median=1.2, ci_low=0.8, ci_high=1.5)
+
+    # Expected: Only a slowdown whose interval clears the baseline's counts as a regression
+    assert compare([slower], [base])[0][-1] == "regression"
+    assert compare([noisy], [base])[0][-1] == "same"
+    assert compare([base], [slower])[0][-1] == "improvement"
+
+def test_confidence_interval_is_seeded():
+    samples = [1.0, 1.2, 0.9, 1.1, 1.3]
+
+    # Expected: Same interval on every call, around the median
+    assert confidence_interval(samples) == confidence_interval(samples)
+    low, high = confidence_interval(samples)
+    assert low <= 1.1 <= high
+
+def test_compare_command_exit_code(tmp_path):
+    report = run_benchmarks(TINY_GRID, ("ri",), repeats=2, warmup=0)
+    path = str(tmp_path / "run.json")
+    write_results(report, path)
+
+    # Expected: A run compared with itself has no regressions
+    assert main(["compare", path, path]) == 0
+
+def test_compare_layouts(monkeypatch):
+    # Small enough that the 80-node path gets CSR rows, so that every layout is chosen once
+    monkeypatch.setattr(compiled_graph, "SET_NODES", 50)
+    grid = {"families": ["path", "complete"], "sizes": [12, 80], "densities": [0.4], "pattern_sizes": [4]}
+    report = compare_layouts(grid, repeats=2, warmup=1, limit=100)
+
+    # Expected: Every layout finds the same embeddings, and "ri" repeats the chosen layout
+    results = report["results"]
+    for case in {(row["family"], row["n"], row["pattern"]) for row in results}:
+        rows = {row["algorithm"]: row for row in results if (row["family"], row["n"], row["pattern"]) == case}
+        assert sorted(rows) == ["ri", "ri-bits", "ri-csr", "ri-sets"]
+        assert len({(row["found"], row["states"]) for row in rows.values()}) == 1
+        assert rows["ri"]["median"] == rows["ri-" + rows["ri"]["layout"]]["median"]
+    assert {row["layout"] for row in results if row["algorithm"] == "ri"} == {"sets", "csr", "bits"}
+    totals = layout_summary(results)
+    assert list(totals) == ["path", "complete", "all"]
+    assert totals["all"]["ri"] == pytest.approx(totals["path"]["ri"] + totals["complete"]["ri"])
@@ -2,11 +2,20 @@ import pytest
 import networkx as nx
 import os
 import sys
+import threading
+from itertools import islice
+from time import perf_counter
 
 # Add the parent directory to sys.path, import the algorithm to be tested
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from bonnici_giugno import bonnici_giugno_subgraph_isomorphism
+from bonnici_giugno import (BUDGET_EXHAUSTED, FOUND, NOT_FOUND, bonnici_giugno_subgraph_isomorphism,
+                            count_subgraph_isomorphisms, iter_subgraph_isomorphisms, ri_search,
+                            search_subgraph_isomorphism)
+from domains import compute_domains
+from ordering import greatest_constraint_first
+from benchmark_ordering import greatest_constraint_first_reference
+from compiled_graph import CompiledTarget
     
 def test_empty_graphs():
     # Both G and H are empty
@@ -226,3 +235,342 @@ def test_partial_graph_isomorphism():
     assert mapping is not None
     assert set(H.nodes) == set(mapping.keys())
     assert set(G.nodes).issuperset(mapping.values())
+
+def test_compiled_target_reuse():
+    # One compiled G serves several pattern queries
+    G = nx.Graph()
+    G.add_edges_from([("a", "b"), ("b", "c"), ("c", "a"), ("c", "d")])
+    target = CompiledTarget(G)
+
+    # Expected: Mappings use the original labels of G
+    triangle = nx.cycle_graph(3)
+    mapping = bonnici_giugno_subgraph_isomorphism(target, triangle)
+    assert mapping is not None
+    assert set(mapping.values()) == {"a", "b", "c"}
+
+    path = nx.path_graph(4)
+    mapping = bonnici_giugno_subgraph_isomorphism(target, path)
+    assert mapping is not None
+    assert set(G.nodes).issuperset(mapping.values())
+    assert all(G.has_edge(mapping[u], mapping[v]) for u, v in path.edges)
+
+    square = nx.cycle_graph(4)
+    assert bonnici_giugno_subgraph_isomorphism(target, square) is None
+
+def test_labelled_matching():
+    # G is a square with alternating colors; H is a path of two red nodes
+    G = nx.cycle_graph(4)
+    nx.set_node_attributes(G, {0: "red", 1: "blue", 2: "red", 3: "blue"}, "color")
+    H = nx.path_graph(2)
+    nx.set_node_attributes(H, {0: "red", 1: "red"}, "color")
+
+    # Expected: No two adjacent red nodes, although the unlabelled query succeeds
+    assert bonnici_giugno_subgraph_isomorphism(G, H) is not None
+    assert bonnici_giugno_subgraph_isomorphism(G, H, node_label="color") is None
+
+    nx.set_node_attributes(H, {0: "red", 1: "blue"}, "color")
+    mapping = bonnici_giugno_subgraph_isomorphism(G, H, node_label="color")
+    assert mapping is not None
+    assert G.nodes[mapping[0]]["color"] == "red"
+    assert G.nodes[mapping[1]]["color"] == "blue"
+
+def test_edge_labelled_matching():
+    G = nx.Graph()
+    G.add_edge(1, 2, kind="strong")
+    G.add_edge(2, 3, kind="weak")
+    H = nx.Graph()
+    H.add_edge("a", "b", kind="weak")
+
+    # Expected: Only the weak edge can host the pattern edge
+    mapping = bonnici_giugno_subgraph_isomorphism(G, H, edge_label="kind")
+    assert mapping is not None
+    assert set(mapping.values()) == {2, 3}
+
+def test_node_and_edge_match():
+    # G is a weighted triangle plus a pendant; H is a weighted edge between two heavy nodes
+    G = nx.Graph()
+    G.add_edge(0, 1, weight=1.0)
+    G.add_edge(1, 2, weight=5.0)
+    G.add_edge(2, 0, weight=2.0)
+    G.add_edge(2, 3, weight=7.0)
+    nx.set_node_attributes(G, {0: 1, 1: 10, 2: 20, 3: 30}, "mass")
+    H = nx.Graph()
+    H.add_edge("a", "b", weight=4.0)
+    nx.set_node_attributes(H, {"a": 15, "b": 15}, "mass")
+    heavy = lambda g, h: g["mass"] >= h["mass"]
+    strong = lambda g, h: g["weight"] >= h["weight"]
+
+    # Expected: Only nodes 2 and 3 are heavy enough, and their edge is strong enough
+    mapping = bonnici_giugno_subgraph_isomorphism(G, H, node_match=heavy, edge_match=strong)
+    assert set(mapping.values()) == {2, 3}
+    assert count_subgraph_isomorphisms(G, H, node_match=heavy, edge_match=strong) == 2
+    assert count_subgraph_isomorphisms(G, H, node_match=heavy, edge_match=strong, symmetry_breaking=True) == 1
+
+    H.edges["a", "b"]["weight"] = 8.0
+    assert bonnici_giugno_subgraph_isomorphism(G, H, node_match=heavy, edge_match=strong) is None
+
+def test_edge_match_is_not_available_in_parallel():
+    G = nx.cycle_graph(6)
+    H = nx.path_graph(3)
+
+    # Expected: Worker processes have no edge attributes to compare
+    with pytest.raises(ValueError):
+        bonnici_giugno_subgraph_isomorphism(G, H, parallel=True, edge_match=lambda g, h: True)
+
+def test_induced_mode_rejects_extra_edges():
+    # G is a triangle; H is a path on three nodes
+    G = nx.complete_graph(3)
+    H = nx.path_graph(3)
+
+    # Expected: The path is a subgraph of the triangle, but not an induced one
+    assert bonnici_giugno_subgraph_isomorphism(G, H) is not None
+    assert bonnici_giugno_subgraph_isomorphism(G, H, mode="induced") is None
+
+    G.add_edges_from([(2, 3), (3, 4)])
+    mapping = bonnici_giugno_subgraph_isomorphism(G, H, mode="induced")
+    assert mapping is not None
+    assert not G.has_edge(mapping[0], mapping[2])
+
+def test_induced_count_matches_networkx():
+    G = nx.gnp_random_graph(14, 0.4, seed=5)
+    H = nx.cycle_graph(4)
+    expected = sum(1 for _ in nx.algorithms.isomorphism.GraphMatcher(G, H).subgraph_isomorphisms_iter())
+
+    # Expected: Same number of induced embeddings as NetworkX, and fewer than monomorphisms
+    assert count_subgraph_isomorphisms(G, H, mode="induced") == expected
+    assert count_subgraph_isomorphisms(G, H, mode="induced", symmetry_breaking=True) * 8 == expected
+    assert count_subgraph_isomorphisms(G, H) > expected
+
+def test_unknown_mode():
+    # Expected: Modes other than "monomorphism" and "induced" are rejected
+    with pytest.raises(ValueError):
+        bonnici_giugno_subgraph_isomorphism(nx.path_graph(3), nx.path_graph(2), mode="homomorphism")
+
+def test_directed_matching_respects_arc_direction():
+    # G is a directed 3-cycle; H is a directed path of length 2
+    G = nx.DiGraph([(0, 1), (1, 2), (2, 0)])
+    H = nx.DiGraph([("a", "b"), ("b", "c")])
+
+    # Expected: Every mapping follows the arcs of G
+    mapping = bonnici_giugno_subgraph_isomorphism(G, H)
+    assert mapping is not None
+    assert G.has_edge(mapping["a"], mapping["b"]) and G.has_edge(mapping["b"], mapping["c"])
+    assert count_subgraph_isomorphisms(G, H) == 3
+
+    # Expected: Two arcs out of one node cannot be embedded in a directed cycle
+    fork = nx.DiGraph([("a", "b"), ("a", "c")])
+    assert bonnici_giugno_subgraph_isomorphism(G, fork) is None
+
+def test_directed_count_matches_networkx():
+    G = nx.gnp_random_graph(12, 0.3, seed=2, directed=True)
+    H = nx.DiGraph([(0, 1), (1, 2), (2, 0), (2, 3)])
+    matcher = nx.algorithms.isomorphism.DiGraphMatcher(G, H)
+
+    # Expected: Same monomorphism and induced counts as NetworkX
+    assert count_subgraph_isomorphisms(G, H) == sum(1 for _ in matcher.subgraph_monomorphisms_iter())
+    assert count_subgraph_isomorphisms(G, H, mode="induced") == sum(1 for _ in matcher.subgraph_isomorphisms_iter())
+
+def test_multigraph_needs_enough_parallel_edges():
+    G = nx.MultiGraph([(0, 1), (0, 1), (1, 2)])
+    H = nx.MultiGraph([("a", "b"), ("a", "b")])
+
+    # Expected: Only the double edge can host the pattern, and induced mode needs equal counts
+    assert count_subgraph_isomorphisms(G, H) == 2
+    assert set(bonnici_giugno_subgraph_isomorphism(G, H).values()) == {0, 1}
+    H.add_edge("a", "b")
+    assert bonnici_giugno_subgraph_isomorphism(G, H) is None
+    assert count_subgraph_isomorphisms(G, nx.MultiGraph([("a", "b")]), mode="induced") == 2
+
+def test_multigraph_edge_labels_need_only_be_contained():
+    G = nx.MultiGraph()
+    G.add_edges_from([(0, 1, {"kind": "x"}), (0, 1, {"kind": "x"}), (1, 2, {"kind": "x"}), (1, 2, {"kind": "y"})])
+    H = nx.Graph([("a", "b", {"kind": "x"})])
+
+    # Expected: A single x edge fits into parallel x/x and x/y edges, but induced mode needs equal labels
+    assert bonnici_giugno_subgraph_isomorphism(G, H, edge_label="kind") is not None
+    assert count_subgraph_isomorphisms(G, H, edge_label="kind") == 4
+    assert count_subgraph_isomorphisms(G, nx.MultiGraph(H), edge_label="kind") == 4
+    assert count_subgraph_isomorphisms(G, H, edge_label="kind", mode="induced") == 0
+    H.add_node("c")
+    H.add_edge("b", "c", kind="y")
+    assert count_subgraph_isomorphisms(G, H, edge_label="kind") == 1
+
+def test_pattern_self_loop_needs_target_self_loop():
+    G = nx.path_graph(3)
+    G.add_edge(2, 2)
+    H = nx.Graph([("a", "a"), ("a", "b")])
+
+    # Expected: The looped pattern node can only land on node 2
+    assert bonnici_giugno_subgraph_isomorphism(G, H) == {"a": 2, "b": 1}
+
+def test_mixed_directedness_is_rejected():
+    # Expected: A directed pattern cannot be matched against an undirected target
+    with pytest.raises(ValueError):
+        bonnici_giugno_subgraph_isomorphism(nx.path_graph(3), nx.DiGraph([(0, 1)]))
+
+def test_search_result_found_and_not_found():
+    G = nx.cycle_graph(6)
+
+    # Expected: A path is found, a triangle is ruled out within the full search
+    result = search_subgraph_isomorphism(G, nx.path_graph(3))
+    assert result.status == FOUND
+    assert result.partial == result.mapping
+    assert all(G.has_edge(result.mapping[u], result.mapping[u + 1]) for u in range(2))
+    assert result.states >= 3
+
+    result = search_subgraph_isomorphism(G, nx.complete_graph(3))
+    assert result.status == NOT_FOUND
+    assert result.mapping is None and result.stopped is None
+    assert search_subgraph_isomorphism(G, nx.complete_graph(7)).status == NOT_FOUND
+
+def test_search_budget_exhausted():
+    # An odd cycle never fits into a bipartite graph, but nothing short of search proves it
+    G = nx.complete_bipartite_graph(12, 12)
+    H = nx.cycle_graph(13)
+
+    # Expected: Each budget stops the search and reports how far it got
+    result = search_subgraph_isomorphism(G, H, max_states=2000)
+    assert result.status == BUDGET_EXHAUSTED
+    assert result.stopped == "max_states"
+    assert result.states == 2000
+    assert len(result.partial) > 0
+    assert all(G.has_edge(result.partial[u], result.partial[v]) for u, v in H.edges
+               if u in result.partial and v in result.partial)
+
+    result = search_subgraph_isomorphism(G, H, timeout=0.05)
+    assert result.status == BUDGET_EXHAUSTED
+    assert result.stopped == "deadline"
+
+    cancel = threading.Event()
+    cancel.set()
+    result = search_subgraph_isomorphism(G, H, cancel=cancel)
+    assert result.stopped == "cancelled"
+
+def test_deadline_checked_while_rejecting_candidates():
+    # Once the centre is mapped, all 20000 leaves are rejected by edge_match without a new state
+    G = nx.star_graph(20000)
+    H = nx.path_graph(2)
+
+    # Expected: A passed deadline stops the scan long before it reaches the next accepted state
+    result = search_subgraph_isomorphism(G, H, deadline=perf_counter() - 1, edge_match=lambda g, h: False)
+    assert result.status == BUDGET_EXHAUSTED
+    assert result.stopped == "deadline"
+    assert result.states == 1
+
+def test_large_sparse_target():
+    # G is a large grid; H is a cycle of length 4 plus a pendant path
+    G = nx.grid_2d_graph(60, 60)
+    H = nx.cycle_graph(4)
+    H.add_edges_from([(3, 4), (4, 5)])
+
+    # Expected: Isomorphism exists and every pattern edge lands on a grid edge
+    mapping = bonnici_giugno_subgraph_isomorphism(G, H)
+    assert mapping is not None
+    assert all(G.has_edge(mapping[u], mapping[v]) for u, v in H.edges)
+
+def test_search_deeper_than_recursion_limit():
+    # A path pattern longer than Python's default recursion limit
+    size = sys.getrecursionlimit() + 500
+    target = CompiledTarget(nx.path_graph(size + 10))
+    pattern = CompiledTarget(nx.path_graph(size))
+    domains = compute_domains(target, pattern)
+    order = list(range(size))
+
+    # Expected: The explicit-stack search finds an embedding without recursing
+    mapping = next(ri_search(target, pattern, order, domains), None)
+    assert mapping is not None
+    assert all(abs(mapping[i] - mapping[i + 1]) == 1 for i in range(size - 1))
+
+def test_iter_all_embeddings():
+    # Every embedding of a path of two edges in a square
+    G = nx.cycle_graph(4)
+    H = nx.path_graph(3)
+
+    # Expected: 4 choices for the middle node times 2 orientations
+    mappings = list(iter_subgraph_isomorphisms(G, H))
+    assert len(mappings) == 8
+    assert len({tuple(sorted(m.items())) for m in mappings}) == 8
+    for mapping in mappings:
+        assert all(G.has_edge(mapping[u], mapping[v]) for u, v in H.edges)
+
+def test_iter_limit_and_first_mapping():
+    G = nx.complete_graph(6)
+    H = nx.complete_graph(3)
+
+    # Expected: The first mapping agrees with the single-mapping function
+    mappings = list(iter_subgraph_isomorphisms(G, H, limit=5))
+    assert len(mappings) == 5
+    assert mappings[0] == bonnici_giugno_subgraph_isomorphism(G, H)
+
+def test_iter_timeout_stops():
+    # Counting all 8-paths in a dense graph takes far longer than the timeout
+    G = nx.complete_graph(30)
+    H = nx.path_graph(8)
+
+    # Expected: The generator ends on its own
+    count = sum(1 for _ in iter_subgraph_isomorphisms(G, H, timeout=0.05))
+    assert count > 0
+
+def test_count_embeddings():
+    G = nx.complete_graph(6)
+    H = nx.complete_graph(4)
+
+    # Expected: 6 * 5 * 4 * 3 embeddings, or C(6, 4) distinct subgraphs
+    assert count_subgraph_isomorphisms(G, H) == 360
+    assert count_subgraph_isomorphisms(G, H, symmetry_breaking=True) == 15
+    assert count_subgraph_isomorphisms(G, H, limit=10) == 10
+    assert count_subgraph_isomorphisms(G, nx.complete_graph(7)) == 0
+    assert count_subgraph_isomorphisms(G, nx.Graph()) == 1
+
+def test_symmetry_breaking_reports_each_subgraph_once():
+    # Squares in a 3x3 grid
+    G = nx.grid_2d_graph(3, 3)
+    H = nx.cycle_graph(4)
+
+    # Expected: 4 squares, each found once instead of |Aut(C4)| = 8 times
+    mappings = list(iter_subgraph_isomorphisms(G, H, symmetry_breaking=True))
+    assert len(mappings) == 4
+    assert len({frozenset(m.values()) for m in mappings}) == 4
+    assert count_subgraph_isomorphisms(G, H) == 32
+
+def test_layouts_enumerate_in_the_same_order():
+    # Dense target with edge labels, where the packed bit-matrix rows pay off
+    G = nx.fast_gnp_random_graph(80, 0.6, seed=9)
+    nx.set_edge_attributes(G, {e: i % 3 for i, e in enumerate(G.edges)}, "kind")
+    H = nx.cycle_graph(4)
+    nx.set_edge_attributes(H, {e: i % 2 for i, e in enumerate(H.edges)}, "kind")
+    target, pattern = CompiledTarget(G, edge_label="kind"), CompiledTarget(H, edge_label="kind")
+    domains = compute_domains(target, pattern)
+    order = [0, 1, 2, 3]
+
+    # Expected: Every layout enumerates the same embeddings in the same order
+    found = {layout: [list(m) for m in islice(ri_search(target, pattern, order, domains, layout=layout), 5000)]
+             for layout in ("sets", "csr", "bits")}
+    assert len(found["bits"]) > 0
+    assert found["sets"] == found["csr"] == found["bits"]
+    assert target.layout == "bits"
+
+def test_greatest_constraint_first_matches_reference():
+    # Random patterns of several kinds, including string labels and self-loops
+    graphs = [nx.gnp_random_graph(n, p, seed=n) for n in range(1, 40, 3) for p in (0.1, 0.3, 0.7)]
+    graphs.append(nx.relabel_nodes(nx.gnp_random_graph(25, 0.2, seed=1), lambda v: f"v{v}"))
+    looped = nx.cycle_graph(7)
+    looped.add_edge(3, 3)
+    graphs.append(looped)
+    graphs.append(nx.gnp_random_graph(20, 0.2, seed=3, directed=True))
+    graphs.append(nx.MultiGraph([(0, 1), (0, 1), (1, 2), (2, 3), (3, 0)]))
+
+    # Expected: Same order as the original implementation, ties included
+    for H in graphs:
+        assert greatest_constraint_first(H) == greatest_constraint_first_reference(H)
+
+def test_self_loop_labels():
+    G = nx.Graph()
+    G.add_edge(1, 1, kind="x")
+    G.add_edge(2, 2, kind="y")
+    H = nx.Graph()
+    H.add_edge("a", "a", kind="y")
+
+    # Expected: The label of a pattern self-loop is compared too
+    assert bonnici_giugno_subgraph_isomorphism(G, H, edge_label="kind") == {"a": 2}
+    assert count_subgraph_isomorphisms(G, H, edge_match=lambda g, h: g["kind"] == h["kind"]) == 1
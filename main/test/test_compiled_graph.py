@@ -0,0 +1,84 @@
+import pytest
+import networkx as nx
+import os
+import sys
+
+# Add the parent directory to sys.path, import the structure to be tested
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compiled_graph import CompiledTarget, choose_layout, intersect_rows
+
+def test_relabelling():
+    G = nx.Graph()
+    G.add_edges_from([("x", "y"), ("y", "z")])
+    target = CompiledTarget(G)
+
+    # Expected: Nodes are numbered in G.nodes order
+    assert target.nodes == ["x", "y", "z"]
+    assert target.index == {"x": 0, "y": 1, "z": 2}
+    assert len(target) == 3
+
+def test_csr_and_degrees():
+    G = nx.fast_gnp_random_graph(30, 0.2, seed=7)
+    target = CompiledTarget(G)
+
+    # Expected: CSR rows, bitsets and degrees all agree with G
+    for v in G.nodes:
+        i = target.index[v]
+        row = [target.nodes[u] for u in target.neighbors_of(i)]
+        assert sorted(row) == sorted(G.neighbors(v))
+        assert target.degrees[i] == G.degree[v]
+        for u in G.nodes:
+            assert target.has_edge(i, target.index[u]) == G.has_edge(v, u)
+
+def test_directed_in_and_out_adjacency():
+    G = nx.DiGraph([("a", "b"), ("b", "c"), ("c", "a"), ("a", "c")])
+    target = CompiledTarget(G)
+    a, b, c = (target.index[v] for v in "abc")
+
+    # Expected: Separate successor and predecessor rows; the undirected view joins both
+    assert target.directed
+    assert target.out_neighbors[target.out_offsets[a]:target.out_offsets[a + 1]].tolist() == [b, c]
+    assert target.in_neighbors[target.in_offsets[a]:target.in_offsets[a + 1]].tolist() == [c]
+    assert target.out_degrees.tolist() == [2, 1, 1]
+    assert target.in_degrees.tolist() == [1, 1, 2]
+    assert target.has_arc(a, b) and not target.has_arc(b, a)
+    assert target.has_edge(b, a)
+
+def test_multigraph_multiplicity():
+    G = nx.MultiGraph([(0, 1), (0, 1), (1, 2)])
+    target = CompiledTarget(G)
+
+    # Expected: Simple adjacency, parallel edges counted in both orientations
+    assert target.neighbors_of(1).tolist() == [0, 2]
+    assert target.multiplicity == {(0, 1): 2, (1, 0): 2, (1, 2): 1, (2, 1): 1}
+    assert target.degrees.tolist() == [2, 3, 1]
+
+def test_translate():
+    G = nx.path_graph(["a", "b", "c"])
+    target = CompiledTarget(G)
+
+    # Expected: Compiled ids are mapped back to original labels
+    assert target.translate({0: 2, 1: 0}) == {0: "c", 1: "a"}
+    assert target.translate(None) is None
+
+def test_layout_follows_size_and_density():
+    # Expected: Bit-matrix rows for dense targets, hash sets for other small ones, CSR for large ones
+    assert CompiledTarget(nx.complete_graph(10)).layout == "sets"
+    assert CompiledTarget(nx.complete_graph(100)).layout == "bits"
+    assert CompiledTarget(nx.grid_2d_graph(20, 20)).layout == "sets"
+    assert choose_layout(30000, 4 * 30000) == "csr"
+    assert choose_layout(10 ** 6, 10 ** 8) == "csr"
+
+    # Expected: A layout given by hand wins, and unknown layouts are refused
+    assert CompiledTarget(nx.complete_graph(10), layout="csr").layout == "csr"
+    with pytest.raises(ValueError):
+        CompiledTarget(nx.path_graph(3), layout="matrix")
+
+def test_intersect_rows():
+    sequence = [9, 1, 3, 5, 7, 9, 11, 2, 3, 4, 5, 6, 7, 8, 9]
+
+    # Expected: The sorted values common to every window, whatever their lengths
+    assert intersect_rows([(sequence, 1, 7), (sequence, 7, 15)]) == [3, 5, 7, 9]
+    assert intersect_rows([(sequence, 7, 15), (sequence, 1, 7), ([5, 9], 0, 2)]) == [5, 9]
+    assert intersect_rows([(sequence, 1, 7), (sequence, 0, 0)]) == []
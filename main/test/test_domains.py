@@ -0,0 +1,99 @@
+import pytest
+import networkx as nx
+import os
+import sys
+
+# Add the parent directory to sys.path, import the preprocessing to be tested
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compiled_graph import CompiledTarget, bits_to_indices
+from domains import compute_domains
+
+def domain_labels(target, domains, pattern, p):
+    return {target.nodes[c] for c in bits_to_indices(domains[pattern.index[p]], len(target)).tolist()}
+
+def test_degree_and_neighborhood_filter():
+    # G is a star with a tail; H is a star with three leaves
+    G = nx.Graph()
+    G.add_edges_from([(0, 1), (0, 2), (0, 3), (3, 4)])
+    H = nx.star_graph(3)
+    target, pattern = CompiledTarget(G), CompiledTarget(H)
+
+    # Expected: Only the center of G can host the center of H
+    domains = compute_domains(target, pattern)
+    assert domains is not None
+    assert domain_labels(target, domains, pattern, 0) == {0}
+
+def test_arc_consistency_prunes_unsupported_candidates():
+    # G is a triangle plus a long path; H is a triangle with a pendant
+    G = nx.Graph()
+    G.add_edges_from([(0, 1), (1, 2), (2, 0), (2, 3), (10, 11), (11, 12), (12, 13)])
+    H = nx.Graph()
+    H.add_edges_from([("a", "b"), ("b", "c"), ("c", "a"), ("c", "d")])
+    target, pattern = CompiledTarget(G), CompiledTarget(H)
+
+    # Expected: Path nodes have no support for a triangle, and node 2 is left only for "c"
+    domains = compute_domains(target, pattern)
+    assert domains is not None
+    assert domain_labels(target, domains, pattern, "a") == {0, 1}
+    assert domain_labels(target, domains, pattern, "c") == {2}
+
+def test_empty_domain_exits_early():
+    # H needs a node of degree 3; G is a cycle
+    G = nx.cycle_graph(6)
+    H = nx.star_graph(3)
+
+    # Expected: No domain for the center, so None is returned
+    assert compute_domains(CompiledTarget(G), CompiledTarget(H)) is None
+
+def test_node_labels_restrict_domains():
+    G = nx.path_graph(4)
+    nx.set_node_attributes(G, {0: "x", 1: "y", 2: "y", 3: "x"}, "kind")
+    H = nx.Graph()
+    H.add_edge("u", "v")
+    nx.set_node_attributes(H, {"u": "x", "v": "y"}, "kind")
+    target, pattern = CompiledTarget(G, node_label="kind"), CompiledTarget(H, node_label="kind")
+
+    # Expected: Labels must agree
+    domains = compute_domains(target, pattern)
+    assert domain_labels(target, domains, pattern, "u") == {0, 3}
+    assert domain_labels(target, domains, pattern, "v") == {1, 2}
+
+def test_node_match_restricts_domains():
+    G = nx.path_graph(4)
+    nx.set_node_attributes(G, {0: 1, 1: 5, 2: 7, 3: 2}, "size")
+    H = nx.path_graph(2)
+    nx.set_node_attributes(H, {0: 6, 1: 0}, "size")
+    target, pattern = CompiledTarget(G), CompiledTarget(H)
+
+    # Expected: Pattern node 0 only fits node 2, so arc consistency leaves its neighbors for node 1
+    domains = compute_domains(target, pattern, lambda g, h: g["size"] >= h["size"])
+    assert domain_labels(target, domains, pattern, 0) == {2}
+    assert domain_labels(target, domains, pattern, 1) == {1, 3}
+
+def test_missing_label_gives_no_domain():
+    G = nx.path_graph(3)
+    nx.set_node_attributes(G, "x", "kind")
+    H = nx.path_graph(2)
+    nx.set_node_attributes(H, {0: "x", 1: "z"}, "kind")
+
+    # Expected: No node of G carries label "z"
+    assert compute_domains(CompiledTarget(G, node_label="kind"), CompiledTarget(H, node_label="kind")) is None
+
+def test_edge_label_counts_come_from_the_label_arrays(tmp_path, monkeypatch):
+    from compiled_graph import CSRValues
+    from graph_file import open_graph, write_graph
+    G = nx.MultiDiGraph([(0, 1, {"kind": "x"}), (0, 1, {"kind": "x"}), (1, 2, {"kind": "y"}), (2, 0, {"kind": "x"})])
+    write_graph(tmp_path / "g.csr", G, edge_label="kind")
+    target = open_graph(tmp_path / "g.csr")
+    H = nx.MultiDiGraph([("a", "b", {"kind": "x"}), ("a", "b", {"kind": "x"})])
+    pattern = CompiledTarget(H, edge_label="kind")
+    monkeypatch.setattr(CSRValues, "__getitem__", lambda *args: pytest.fail("label looked up per edge"))
+
+    # Expected: Per-node label degrees count parallel edges, both directions, without edge lookups
+    assert target.edge_label_degrees((True, "x")).tolist() == [2, 0, 1]
+    assert target.edge_label_degrees((False, "x")).tolist() == [1, 2, 0]
+    assert target.edge_label_degrees((True, "z")).tolist() == [0, 0, 0]
+    domains = compute_domains(target, pattern)
+    assert domain_labels(target, domains, pattern, "a") == {0}
+    assert domain_labels(target, domains, pattern, "b") == {1}
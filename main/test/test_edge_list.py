@@ -0,0 +1,80 @@
+import pytest
+import networkx as nx
+import numpy as np
+import os
+import sys
+
+# Add the parent directory to sys.path, import the reader to be tested
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bonnici_giugno import count_subgraph_isomorphisms
+from compiled_graph import CompiledTarget
+from edge_list import convert_edge_list, iter_edge_chunks, read_edge_list
+from graph_file import open_graph
+
+def test_text_file_in_chunks(tmp_path):
+    path = tmp_path / "edges.txt"
+    path.write_text("# a comment\n10 20\n20 30 0.5\n\n30 10\n20 10\n40 40\n")
+    seen = []
+    target = read_edge_list(path, chunk_size=2, progress=seen.append)
+    G = nx.Graph([(10, 20), (20, 30), (30, 10), (40, 40)])
+    compiled = CompiledTarget(G.subgraph(sorted(G)).copy())
+
+    # Expected: Ids renumbered in increasing order, the repeated edge stored once, progress per chunk
+    assert list(target.nodes) == [10, 20, 30, 40]
+    assert (target.neighbors == compiled.neighbors).all()
+    assert (target.degrees == compiled.degrees).all()
+    assert seen == [1, 2, 4, 5]
+    assert count_subgraph_isomorphisms(target, nx.cycle_graph(3)) == 6
+
+def test_csv_names_and_self_loops(tmp_path):
+    path = tmp_path / "edges.csv"
+    path.write_text("source,target\nalice,bob\nbob,carol\ncarol,carol\n")
+    target = read_edge_list(path, skiprows=1, names=True, self_loops=False)
+
+    # Expected: Names in order of first appearance, self-loop dropped
+    assert list(target.nodes) == ["alice", "bob", "carol"]
+    assert not target.has_edge(2, 2)
+    assert target.has_edge(0, 1) and target.has_edge(1, 2)
+
+def test_parallel_edges_and_direction(tmp_path):
+    path = tmp_path / "edges.npy"
+    np.save(path, np.array([[0, 1], [0, 1], [1, 2], [2, 0]]))
+    target = read_edge_list(path, directed=True, deduplicate=False, relabel=False, num_nodes=4)
+    G = nx.MultiDiGraph([(0, 1), (0, 1), (1, 2), (2, 0)])
+    G.add_node(3)
+
+    # Expected: Kept ids, parallel arcs counted, the isolated node kept
+    assert len(target) == 4 and target.directed
+    assert target.multiplicity[0, 1] == 2 and target.has_arc(2, 0) and not target.has_arc(0, 2)
+    H = nx.MultiDiGraph([("a", "b"), ("a", "b")])
+    assert count_subgraph_isomorphisms(target, H) == count_subgraph_isomorphisms(G, H) == 1
+
+def test_convert_to_graph_file(tmp_path):
+    path, out = tmp_path / "edges.txt", tmp_path / "g.bin"
+    G = nx.fast_gnp_random_graph(50, 0.1, seed=2)
+    path.write_text("".join("%d %d\n" % edge for edge in G.edges))
+    convert_edge_list(path, out, relabel=False, num_nodes=50)
+
+    # Expected: The mapped file searches like the NetworkX graph
+    assert count_subgraph_isomorphisms(open_graph(out), nx.cycle_graph(4)) == count_subgraph_isomorphisms(
+        G, nx.cycle_graph(4))
+
+def test_malformed_lines(tmp_path):
+    path = tmp_path / "edges.txt"
+    path.write_text("1 2\n3\n")
+
+    # Expected: A line with one endpoint is rejected
+    with pytest.raises(ValueError):
+        read_edge_list(path)
+
+def test_malformed_lines_in_plain_chunks(tmp_path):
+    path = tmp_path / "edges.txt"
+    # Four values on two lines, which could be paired up as 1-2 and 3-4
+    path.write_text("1\n2 3 4\n")
+
+    # Expected: The NumPy fast path rejects the file like the per-line parser
+    with pytest.raises(ValueError, match="two endpoints"):
+        read_edge_list(path)
+    path.write_text("1 2\r\n3 4\r5 6")
+    assert [chunk.tolist() for chunk in next(iter_edge_chunks(path))] == [[1, 3, 5], [2, 4, 6]]
@@ -0,0 +1,86 @@
+import pytest
+import networkx as nx
+import numpy as np
+import os
+import sys
+
+# Add the parent directory to sys.path, import the format to be tested
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bonnici_giugno import bonnici_giugno_subgraph_isomorphism, count_subgraph_isomorphisms
+from compiled_graph import CompiledTarget
+from graph_file import open_graph, read_header, write_edge_list, write_graph
+
+def test_round_trip_maps_arrays(tmp_path):
+    G = nx.grid_2d_graph(4, 5)
+    path = tmp_path / "grid.bin"
+    write_graph(path, G)
+    target = open_graph(path)
+    compiled = CompiledTarget(G)
+
+    # Expected: The same CSR arrays, read-only views of the file, and the tuple node names restored
+    assert isinstance(target.neighbors, np.ndarray) and not target.neighbors.flags.writeable
+    assert (target.offsets == compiled.offsets).all()
+    assert (target.neighbors == compiled.neighbors).all()
+    assert (target.degrees == compiled.degrees).all()
+    assert list(target.nodes) == compiled.nodes
+    assert target.lazy and target.graph is None and target.path == str(path)
+
+def test_match_on_mapped_file(tmp_path):
+    G = nx.fast_gnp_random_graph(60, 0.1, seed=4)
+    H = nx.cycle_graph(5)
+    path = tmp_path / "g.bin"
+    write_graph(path, G)
+    target = open_graph(path)
+
+    # Expected: Valid mappings in original node names and the same counts as the NetworkX graph
+    mapping = bonnici_giugno_subgraph_isomorphism(target, H)
+    assert mapping is not None
+    assert all(G.has_edge(mapping[u], mapping[v]) for u, v in H.edges)
+    for mode in ("monomorphism", "induced"):
+        assert count_subgraph_isomorphisms(target, H, mode=mode) == count_subgraph_isomorphisms(G, H, mode=mode)
+
+def test_labels_direction_and_multiplicity(tmp_path):
+    G = nx.MultiDiGraph([(0, 1), (0, 1), (1, 2), (2, 0), (2, 2)])
+    nx.set_node_attributes(G, {0: "a", 1: "b", 2: "a"}, "color")
+    for u, v, key in G.edges(keys=True):
+        G.edges[u, v, key]["kind"] = "x" if u < v else "y"
+    H = nx.MultiDiGraph([("p", "q"), ("p", "q")])
+    nx.set_node_attributes(H, {"p": "a", "q": "b"}, "color")
+    for u, v, key in H.edges(keys=True):
+        H.edges[u, v, key]["kind"] = "x"
+    path = tmp_path / "multi.bin"
+    write_graph(path, G, node_label="color", edge_label="kind")
+    target = open_graph(path)
+
+    # Expected: Labels and parallel edge counts survive the file
+    assert target.directed and target.node_label == "color" and target.edge_label == "kind"
+    assert target.multiplicity[0, 1] == 2 and target.edge_labels[0, 1] == ("x", "x")
+    assert bonnici_giugno_subgraph_isomorphism(target, H, node_label="color", edge_label="kind") == {"p": 0, "q": 1}
+
+def test_edge_list_writer(tmp_path):
+    edges = [(0, 1), (1, 2), (2, 0), (1, 0), (3, 3)]
+    path = tmp_path / "edges.bin"
+    write_edge_list(path, edges, num_nodes=5, edge_labels=["a", "b", "c", "d", "e"])
+    target = open_graph(path)
+    G = nx.Graph(edges)
+    G.add_node(4)
+
+    # Expected: Repeated edges stored once with the last label, the self-loop kept, isolated nodes counted
+    assert len(target) == 5 and read_header(path)["edge_label"] == "label"
+    assert (target.degrees == np.array([G.degree[v] for v in range(5)])).all()
+    assert target.edge_labels[0, 1] == "d" and target.edge_labels[3, 3] == "e"
+    assert target.has_edge(3, 3) and not target.has_edge(0, 3)
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not a graph")
+
+    # Expected: A clear error instead of garbage arrays
+    with pytest.raises(ValueError):
+        open_graph(path)
+
+    # Expected: node_match needs the NetworkX graph
+    write_graph(path, nx.path_graph(3))
+    with pytest.raises(ValueError):
+        bonnici_giugno_subgraph_isomorphism(open_graph(path), nx.path_graph(2), node_match=lambda a, b: True)
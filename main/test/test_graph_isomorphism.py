@@ -0,0 +1,99 @@
+import pytest
+import networkx as nx
+import os
+import random
+import sys
+
+# Add the parent directory to sys.path, import the matcher to be tested
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from graph_isomorphism import graph_isomorphism
+from stats import SearchStats
+
+def shuffled(G, seed):
+    # An isomorphic copy with new node names, added in a random order.
+    rng = random.Random(seed)
+    names = list(range(len(G)))
+    rng.shuffle(names)
+    rename = dict(zip(G.nodes, names))
+    nodes = [(rename[v], data) for v, data in G.nodes(data=True)]
+    edges = [(rename[u], rename[v], data) for u, v, data in G.edges(data=True)]
+    rng.shuffle(nodes)
+    rng.shuffle(edges)
+    H = G.__class__()
+    H.add_nodes_from(nodes)
+    H.add_edges_from(edges)
+    return H
+
+def is_isomorphism(G1, G2, mapping):
+    return (sorted(mapping) == sorted(G2.nodes) and len(set(mapping.values())) == len(G1)
+            and all(G1.number_of_edges(mapping[u], mapping[v]) == G2.number_of_edges(u, v) for u, v in G2.edges()))
+
+def test_isomorphic_copies():
+    graphs = [nx.petersen_graph(), nx.balanced_tree(3, 4), nx.grid_2d_graph(6, 6), nx.hypercube_graph(5),
+              nx.gnm_random_graph(60, 150, seed=1), nx.empty_graph(5), nx.Graph(),
+              nx.gnp_random_graph(30, 0.2, seed=2, directed=True)]
+    for seed, G in enumerate(graphs):
+        H = shuffled(G, seed)
+        mapping = graph_isomorphism(G, H)
+
+        # Expected: A mapping of H onto G that keeps every edge
+        assert mapping is not None and is_isomorphism(G, H, mapping)
+
+def test_cheap_invariants_reject_first():
+    cases = [
+        (nx.path_graph(4), nx.path_graph(5), "nodes"),
+        (nx.path_graph(4), nx.cycle_graph(4), "edges"),
+        (nx.path_graph(4), nx.star_graph(3), "degrees"),
+        # Both 2-regular on 6 nodes; only the triangles tell them apart.
+        (nx.cycle_graph(6), nx.disjoint_union(nx.cycle_graph(3), nx.cycle_graph(3)), "triangles"),
+    ]
+    for G1, G2, reason in cases:
+        stats = SearchStats()
+
+        # Expected: Rejected by the named invariant, before refinement or search
+        assert graph_isomorphism(G1, G2, stats=stats) is None
+        assert stats.rejected == {reason: 1} and stats.tried == []
+
+def test_refinement_rejects_same_degrees_and_triangles():
+    # Both trees have degrees 3, 3, 2, 2, 1, 1, 1, 1 and no triangles; only the neighbourhood of the
+    # degree-3 nodes differs (joined directly, or through a path).
+    G1 = nx.Graph([(0, 1), (0, 2), (0, 3), (1, 4), (1, 5), (3, 6), (6, 7)])
+    G2 = nx.Graph([(0, 2), (0, 3), (0, 6), (6, 1), (1, 4), (1, 5), (3, 7)])
+    stats = SearchStats()
+
+    # Expected: Colour refinement tells them apart without a search
+    assert graph_isomorphism(G1, G2, stats=stats) is None
+    assert stats.rejected == {"refinement": 1} and stats.tried == []
+
+def test_search_separates_strongly_regular_graphs():
+    # The 4x4 rook's graph and the Shrikhande graph are both strongly regular with parameters
+    # (16, 6, 2, 2), so every invariant and the colour refinement agree.
+    rook = nx.convert_node_labels_to_integers(nx.cartesian_product(nx.complete_graph(4), nx.complete_graph(4)))
+    shrikhande = nx.Graph([(4 * a + b, 4 * ((a + da) % 4) + (b + db) % 4)
+                           for a in range(4) for b in range(4) for da, db in ((0, 1), (1, 0), (1, 1))])
+    stats = SearchStats()
+
+    # Expected: Only the individualization search finds out that they differ
+    assert graph_isomorphism(rook, shrikhande, stats=stats) is None
+    assert stats.tried and not stats.accepted[-1]
+    assert graph_isomorphism(rook, shuffled(rook, 1)) is not None
+
+def test_labels_multigraphs_and_directions():
+    G = nx.MultiDiGraph()
+    G.add_nodes_from([(0, {"kind": "a"}), (1, {"kind": "b"}), (2, {"kind": "b"})])
+    G.add_edges_from([(0, 1, {"bond": 1}), (0, 1, {"bond": 2}), (1, 2, {"bond": 1}), (2, 0, {"bond": 1}), (2, 2, {"bond": 3})])
+    H = shuffled(G, 3)
+
+    # Expected: Equal labels, multiplicities and directions are required
+    mapping = graph_isomorphism(G, H, node_label="kind", edge_label="bond")
+    assert mapping is not None and is_isomorphism(G, H, mapping)
+    assert all(G.nodes[mapping[v]]["kind"] == H.nodes[v]["kind"] for v in H)
+    relabelled = H.copy()
+    relabelled.nodes[next(v for v in H if H.nodes[v]["kind"] == "b" and H.has_edge(v, v))]["kind"] = "a"
+    assert graph_isomorphism(G, relabelled) is not None
+    assert graph_isomorphism(G, relabelled, node_label="kind") is None
+    reversed_edges = nx.MultiDiGraph(G.reverse())
+    assert graph_isomorphism(G, reversed_edges, node_label="kind") is None
+    with pytest.raises(ValueError):
+        graph_isomorphism(G, nx.MultiGraph(G))
@@ -0,0 +1,66 @@
+import pytest
+import networkx as nx
+import os
+import random
+import sys
+
+# Add the parent directory to sys.path, import the matcher to be tested
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bonnici_giugno import iter_subgraph_isomorphisms
+from incremental import ContinuousMatcher
+
+def embedding_set(mappings, H):
+    return {tuple(mapping[v] for v in H.nodes) for mapping in mappings}
+
+def test_insert_and_delete_report_changes():
+    G = nx.path_graph(3)
+    matcher = ContinuousMatcher(G)
+    name = matcher.register(nx.cycle_graph(3), "triangle")
+
+    # Expected: Closing the triangle adds its 6 embeddings, reopening it removes them
+    assert matcher.count(name) == 0
+    added, removed = matcher.insert_edge(0, 2)[name]
+    assert len(added) == 6 and removed == []
+    added, removed = matcher.delete_edge(1, 2)[name]
+    assert added == [] and len(removed) == 6
+    assert matcher.count(name) == 0
+
+def test_batches_match_recomputation():
+    rng = random.Random(3)
+    for mode, directed in [("monomorphism", False), ("induced", False), ("monomorphism", True), ("induced", True)]:
+        G = nx.gnp_random_graph(20, 0.15, seed=4, directed=directed)
+        nx.set_edge_attributes(G, "a", "kind")
+        patterns = [nx.path_graph(3, create_using=type(G)), nx.cycle_graph(4, create_using=type(G))]
+        matcher = ContinuousMatcher(G, edge_label="kind", mode=mode)
+        names = [matcher.register(H) for H in patterns]
+        for _ in range(5):
+            inserted = [(rng.randrange(22), rng.randrange(22), {"kind": rng.choice("ab")}) for _ in range(4)]
+            deleted = [(rng.randrange(20), rng.randrange(20)) for _ in range(4)]
+            before = [embedding_set(matcher.embeddings(name), H) for name, H in zip(names, patterns)]
+            changes = matcher.update(inserted=inserted, deleted=deleted)
+
+            # Expected: The same embeddings as a search from scratch, and exactly the differences reported
+            for name, H, old in zip(names, patterns, before):
+                expected = embedding_set(iter_subgraph_isomorphisms(G, H, edge_label="kind", mode=mode), H)
+                assert embedding_set(matcher.embeddings(name), H) == expected
+                added, removed = changes[name]
+                assert embedding_set(added, H) == expected - old
+                assert embedding_set(removed, H) == old - expected
+
+def test_isolated_pattern_nodes_and_new_nodes():
+    G = nx.Graph([(0, 1)])
+    H = nx.Graph([("a", "b")])
+    H.add_node("c")
+    matcher = ContinuousMatcher(G)
+    name = matcher.register(H)
+
+    # Expected: A new node can host the isolated pattern node
+    assert matcher.count(name) == 0
+    added, _ = matcher.insert_edge(5, 6)[name]
+    assert embedding_set(added, H) == embedding_set(iter_subgraph_isomorphisms(G, H), H)
+
+def test_rejects_multigraphs():
+    # Expected: Parallel edges are not supported
+    with pytest.raises(ValueError):
+        ContinuousMatcher(nx.MultiGraph())
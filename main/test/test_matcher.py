@@ -0,0 +1,172 @@
+import pytest
+import networkx as nx
+import os
+import sys
+
+# Add the parent directory to sys.path, import the matcher to be tested
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from matcher import SubgraphMatcher
+
+def is_embedding(G, H, mapping):
+    return (set(mapping.keys()) == set(H.nodes)
+            and len(set(mapping.values())) == len(H)
+            and all(G.has_edge(mapping[u], mapping[v]) for u, v in H.edges))
+
+def test_match_many_in_input_order():
+    G = nx.Graph()
+    G.add_edges_from([(1, 2), (2, 3), (3, 1), (3, 4), (4, 5)])
+    patterns = [nx.cycle_graph(3), nx.cycle_graph(4), nx.path_graph(4), nx.star_graph(3)]
+
+    # Expected: Triangle, path and star exist; the square does not
+    results = SubgraphMatcher(G).match_many(patterns)
+    assert len(results) == 4
+    assert is_embedding(G, patterns[0], results[0])
+    assert results[1] is None
+    assert is_embedding(G, patterns[2], results[2])
+    assert is_embedding(G, patterns[3], results[3])
+
+def test_isomorphic_patterns_are_solved_once(monkeypatch):
+    G = nx.fast_gnp_random_graph(30, 0.3, seed=11)
+    # The same triangle-with-tail under three different labellings
+    a = nx.Graph([(0, 1), (1, 2), (2, 0), (2, 3)])
+    b = nx.Graph([("w", "x"), ("x", "y"), ("y", "w"), ("w", "z")])
+    c = nx.relabel_nodes(a, {0: 10, 1: 11, 2: 12, 3: 13})
+    matcher = SubgraphMatcher(G)
+    calls = []
+    original = matcher.match
+    monkeypatch.setattr(matcher, "match", lambda H: calls.append(H) or original(H))
+
+    # Expected: One search, three valid relabelled results
+    results = matcher.match_many([a, b, c])
+    assert len(calls) == 1
+    for H, mapping in zip([a, b, c], results):
+        assert is_embedding(G, H, mapping)
+
+def test_labels_prevent_deduplication():
+    G = nx.path_graph(3)
+    nx.set_node_attributes(G, {0: "a", 1: "b", 2: "a"}, "kind")
+    H1 = nx.path_graph(2)
+    nx.set_node_attributes(H1, {0: "a", 1: "b"}, "kind")
+    H2 = nx.path_graph(2)
+    nx.set_node_attributes(H2, {0: "a", 1: "a"}, "kind")
+
+    # Expected: Same shape, different labels, different answers
+    results = SubgraphMatcher(G, node_label="kind").match_many([H1, H2])
+    assert results[0] is not None
+    assert results[1] is None
+
+def multipath(*labels):
+    # Path whose consecutive nodes are joined by parallel edges with the given labels
+    H = nx.MultiGraph()
+    for i, group in enumerate(labels):
+        H.add_edges_from((i, i + 1, {"kind": label}) for label in group)
+    return H
+
+def test_parallel_edge_labels_are_compared_as_multisets(monkeypatch):
+    import result_cache
+    from result_cache import ResultCache
+    G = H1 = multipath("aab", "abb", "abb")
+    H2 = multipath("abb", "aab", "abb")
+
+    # Expected: Equal label sets but different multisets are not merged
+    matcher = SubgraphMatcher(G, edge_label="kind")
+    assert matcher.match_many([H1, H2]) == [{0: 0, 1: 1, 2: 2, 3: 3}, None]
+    assert matcher.match(H2) is None
+
+    # Expected: Nor are they confused by the cache when their hashes collide
+    monkeypatch.setattr(result_cache, "pattern_hash", lambda *args: "same")
+    cached = SubgraphMatcher(G, edge_label="kind", cache=ResultCache())
+    assert cached.match(H1) is not None
+    assert cached.match(H2) is None
+
+def test_degree_histogram_rejects_early():
+    G = nx.cycle_graph(10)
+
+    # Expected: A star needs a node of degree 3
+    assert SubgraphMatcher(G).match(nx.star_graph(3)) is None
+
+def test_match_many_with_workers():
+    G = nx.fast_gnp_random_graph(40, 0.2, seed=2)
+    patterns = [nx.cycle_graph(4), nx.path_graph(5), nx.complete_graph(8), nx.cycle_graph(4)]
+
+    # Expected: Same answers as the in-process run
+    matcher = SubgraphMatcher(G)
+    sequential = matcher.match_many(patterns)
+    pooled = matcher.match_many(patterns, workers=2)
+    assert [m is None for m in pooled] == [m is None for m in sequential]
+    for H, mapping in zip(patterns, pooled):
+        assert mapping is None or is_embedding(G, H, mapping)
+
+def test_workers_are_kept_between_calls():
+    G = nx.fast_gnp_random_graph(40, 0.2, seed=2)
+
+    # Expected: Later calls reuse the pool of the first one, which is shut down on exit
+    with SubgraphMatcher(G) as matcher:
+        assert matcher.match_many([nx.cycle_graph(4)], workers=2)[0] is not None
+        pool = matcher.pool(2)
+        mapping = matcher.match_many([nx.path_graph(5)], workers=2)[0]
+        assert is_embedding(G, nx.path_graph(5), mapping)
+        assert matcher.pool(2) is pool
+    with pytest.raises(RuntimeError):
+        pool.submit(len, ())
+
+def test_node_match_is_applied_and_separates_patterns():
+    G = nx.path_graph(4)
+    nx.set_node_attributes(G, {0: 1, 1: 1, 2: 9, 3: 9}, "size")
+    big, small = nx.path_graph(2), nx.path_graph(2)
+    nx.set_node_attributes(big, 5, "size")
+    nx.set_node_attributes(small, 1, "size")
+    matcher = SubgraphMatcher(G, node_match=lambda g, h: g["size"] >= h["size"])
+
+    # Expected: Only the heavy end of the path hosts big; the two patterns are not merged
+    results = matcher.match_many([big, small])
+    assert set(results[0].values()) == {2, 3}
+    assert results[1] is not None
+
+def test_budgeted_search():
+    matcher = SubgraphMatcher(nx.complete_bipartite_graph(10, 10))
+
+    # Expected: The odd cycle search is cut short, the even cycle is found
+    assert matcher.search(nx.cycle_graph(11), max_states=500).status == "budget_exhausted"
+    assert matcher.search(nx.cycle_graph(10), max_states=500).status == "found"
+
+def test_result_cache_hits_on_relabelled_patterns(tmp_path, monkeypatch):
+    from result_cache import ResultCache
+    import matcher
+    G = nx.fast_gnp_random_graph(30, 0.3, seed=11)
+    cache = ResultCache(maxsize=8, path=str(tmp_path / "cache.pkl"))
+    first = SubgraphMatcher(G, cache=cache).match(nx.cycle_graph(4))
+    calls = []
+    monkeypatch.setattr(matcher, "bonnici_giugno_subgraph_isomorphism", lambda *args, **kwargs: calls.append(1))
+
+    # Expected: A relabelled square and the same square again are answered from the cache
+    relabelled = nx.relabel_nodes(nx.cycle_graph(4), {0: "a", 1: "b", 2: "c", 3: "d"})
+    mapping = SubgraphMatcher(G, cache=cache).match(relabelled)
+    assert is_embedding(G, relabelled, mapping)
+    assert SubgraphMatcher(G, cache=cache).match(nx.cycle_graph(4)) == first
+    assert calls == [] and cache.hits == 2
+
+    # Expected: The saved cache is reused by a new instance, but not once G changes
+    cache.save()
+    reloaded = ResultCache(path=str(tmp_path / "cache.pkl"))
+    assert SubgraphMatcher(G, cache=reloaded).match(relabelled) == mapping
+    G.add_edge(0, "new")
+    monkeypatch.undo()
+    assert is_embedding(G, relabelled, SubgraphMatcher(G, cache=reloaded).match(relabelled))
+    assert reloaded.misses == 1
+
+def test_result_cache_stores_not_found_and_evicts():
+    from result_cache import ResultCache
+    G = nx.path_graph(6)
+    cache = ResultCache(maxsize=2)
+    matcher = SubgraphMatcher(G, cache=cache, stamp="v1")
+
+    # Expected: "Not found" is cached; the least recently used class is dropped past maxsize
+    assert matcher.match(nx.cycle_graph(3)) is None
+    assert cache.get(nx.cycle_graph(3), matcher.stamp) == (True, None)
+    matcher.match(nx.path_graph(3))
+    matcher.match(nx.star_graph(2))
+    matcher.match(nx.path_graph(4))
+    assert len(cache) == 2
+    assert cache.get(nx.cycle_graph(3), matcher.stamp) == (False, None)
@@ -6,7 +6,8 @@ import sys
 # Add the parent directory to sys.path, import the algorithm to be tested
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from naive_backtracking import naive_subgraph_isomorphism
+from bonnici_giugno import count_subgraph_isomorphisms
+from naive_backtracking import iter_naive_subgraph_isomorphisms, naive_subgraph_isomorphism
 
 def test_empty_graphs():
     # Both G and H are empty
@@ -226,3 +227,74 @@ def test_partial_graph_isomorphism():
     assert mapping is not None
     assert set(H.nodes) == set(mapping.keys())
     assert set(G.nodes).issuperset(mapping.values())
+
+def test_node_and_edge_match():
+    # G is a path with colored nodes and weighted edges
+    G = nx.path_graph(4)
+    nx.set_node_attributes(G, {0: "red", 1: "blue", 2: "red", 3: "red"}, "color")
+    nx.set_edge_attributes(G, {(0, 1): 1, (1, 2): 1, (2, 3): 9}, "weight")
+    H = nx.path_graph(2)
+    nx.set_node_attributes(H, "red", "color")
+    nx.set_edge_attributes(H, 5, "weight")
+    same_color = lambda g, h: g["color"] == h["color"]
+    heavy = lambda g, h: g["weight"] >= h["weight"]
+
+    # Expected: Only the heavy edge between the two red nodes 2 and 3 matches
+    mapping = naive_subgraph_isomorphism(G, H, node_match=same_color, edge_match=heavy)
+    assert set(mapping.values()) == {2, 3}
+
+    nx.set_edge_attributes(H, 10, "weight")
+    assert naive_subgraph_isomorphism(G, H, node_match=same_color, edge_match=heavy) is None
+
+def test_induced_mode():
+    # G is a triangle; H is a path on three nodes
+    G = nx.complete_graph(3)
+    H = nx.path_graph(3)
+
+    # Expected: A subgraph, but not an induced subgraph
+    assert naive_subgraph_isomorphism(G, H) is not None
+    assert naive_subgraph_isomorphism(G, H, mode="induced") is None
+
+def test_directed_and_multigraph():
+    # G is a directed 3-cycle
+    G = nx.DiGraph([(0, 1), (1, 2), (2, 0)])
+
+    # Expected: A path along the arcs exists, two arcs out of one node do not
+    assert naive_subgraph_isomorphism(G, nx.DiGraph([("a", "b"), ("b", "c")])) is not None
+    assert naive_subgraph_isomorphism(G, nx.DiGraph([("a", "b"), ("a", "c")])) is None
+
+    # Expected: A double edge needs a double edge in G
+    M = nx.MultiGraph([(0, 1), (1, 2), (1, 2)])
+    mapping = naive_subgraph_isomorphism(M, nx.MultiGraph([("a", "b"), ("a", "b")]))
+    assert set(mapping.values()) == {1, 2}
+
+def test_pattern_larger_than_target():
+    # Expected: No mapping, rather than a trivial one
+    assert naive_subgraph_isomorphism(nx.path_graph(2), nx.path_graph(3)) is None
+    assert naive_subgraph_isomorphism(nx.Graph(), nx.path_graph(1)) is None
+
+def test_enumeration_matches_ri():
+    # Expected: The pruned search finds exactly the embeddings RI finds, in permutation order
+    for create_using in (nx.Graph, nx.DiGraph, nx.MultiGraph):
+        G = nx.gnm_random_graph(9, 18, seed=5, directed=create_using is nx.DiGraph)
+        G = create_using(G)
+        if G.is_multigraph():
+            G.add_edges_from([(0, 1), (2, 3), (4, 4)])
+        H = create_using(nx.path_graph(3))
+        if G.is_multigraph():
+            H.add_edge(0, 1)
+        for mode in ("monomorphism", "induced"):
+            found = list(iter_naive_subgraph_isomorphisms(G, H, mode=mode))
+            assert len(found) == count_subgraph_isomorphisms(G, H, mode=mode)
+            keys = [tuple(mapping[u] for u in H) for mapping in found]
+            assert keys == sorted(keys)
+
+def test_induced_self_loops():
+    # G has a loop on node 0 only
+    G = nx.Graph([(0, 0), (0, 1)])
+    H = nx.Graph()
+    H.add_node("a")
+
+    # Expected: In induced mode a node without a loop cannot map onto a looped node
+    assert naive_subgraph_isomorphism(G, H) == {"a": 0}
+    assert naive_subgraph_isomorphism(G, H, mode="induced") == {"a": 1}
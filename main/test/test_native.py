@@ -0,0 +1,129 @@
+import pytest
+import networkx as nx
+import os
+import sys
+from time import perf_counter
+
+# Add the parent directory to sys.path, import the kernel to be tested
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import native
+from bonnici_giugno import _conditions, bonnici_giugno_subgraph_isomorphism, prepare_search, ri_search
+from graph_file import open_graph, write_graph
+from stats import SearchStats
+
+# The kernel loop runs as plain Python here, so these tests do not need Numba.
+
+def both_searches(G, H, edge_label=None, induced=False, symmetry=False):
+    target, pattern, order, domains = prepare_search(G, H, edge_label=edge_label)
+    conditions = _conditions(pattern, order) if symmetry else ()
+    expected = [list(mapping) for mapping in ri_search(target, pattern, order, domains, conditions, induced=induced)]
+    found = list(native.native_search(target, pattern, order, domains, conditions, induced=induced,
+                                      run=native.run_kernel))
+    return expected, found
+
+# The compiled kernel too, where Numba is installed.
+KERNELS = [native.run_kernel] + ([native.kernel] if native.warm_up() else [])
+
+def test_same_embeddings_in_the_same_order():
+    G = nx.gnp_random_graph(14, 0.35, seed=3)
+    nx.set_edge_attributes(G, {e: i % 2 for i, e in enumerate(G.edges)}, "kind")
+    H = nx.cycle_graph(4)
+    nx.set_edge_attributes(H, 1, "kind")
+
+    # Expected: The kernel reproduces ri_search exactly
+    for edge_label in (None, "kind"):
+        for induced in (False, True):
+            for symmetry in (False, True):
+                expected, found = both_searches(G, H, edge_label, induced, symmetry)
+                assert found == expected
+
+def test_directed_and_multigraph_targets():
+    D = nx.gnp_random_graph(12, 0.3, seed=1, directed=True)
+    M = nx.MultiGraph(nx.cycle_graph(6))
+    M.add_edges_from([(0, 1), (2, 3), (4, 4)])
+    H = nx.MultiGraph([("a", "b"), ("a", "b"), ("b", "c")])
+
+    # Expected: Arc directions and parallel edge counts are respected
+    for G, pattern in ((D, nx.DiGraph([(0, 1), (1, 2), (2, 0)])), (D, nx.DiGraph([(0, 1), (0, 2)])), (M, H)):
+        for induced in (False, True):
+            expected, found = both_searches(G, pattern, induced=induced)
+            assert found == expected
+
+def test_mapped_targets(tmp_path):
+    G = nx.MultiDiGraph(nx.gnp_random_graph(10, 0.4, seed=2, directed=True))
+    G.add_edges_from([(0, 1), (1, 2)])
+    nx.set_edge_attributes(G, "x", "kind")
+    write_graph(tmp_path / "g.csr", G, edge_label="kind")
+    H = nx.MultiDiGraph([(0, 1), (1, 2)])
+    nx.set_edge_attributes(H, "x", "kind")
+
+    # Expected: Labels and counts are read from the file arrays
+    expected, found = both_searches(open_graph(tmp_path / "g.csr"), H, "kind")
+    assert found == expected and found
+
+@pytest.mark.parametrize("run", KERNELS)
+def test_multigraph_edge_labels_need_only_be_contained(run, tmp_path):
+    G = nx.MultiGraph([(0, 1, {"kind": "x"}), (0, 1, {"kind": "x"}), (1, 2, {"kind": "x"}), (1, 2, {"kind": "y"})])
+    write_graph(tmp_path / "g.csr", G, edge_label="kind")
+    H = nx.Graph([("a", "b", {"kind": "x"})])
+    H2 = nx.Graph([("a", "b", {"kind": "x"}), ("b", "c", {"kind": "y"})])
+
+    # Expected: Extra parallel edges are allowed unless induced, for in-memory and mapped targets
+    for target_graph in (G, open_graph(tmp_path / "g.csr")):
+        for pattern_graph, induced, embeddings in ((H, False, 4), (nx.MultiGraph(H), False, 4), (H, True, 0),
+                                                   (H2, False, 1)):
+            target, pattern, order, domains = prepare_search(target_graph, pattern_graph, edge_label="kind")
+            expected = [list(mapping) for mapping in ri_search(target, pattern, order, domains, induced=induced)]
+            found = list(native.native_search(target, pattern, order, domains, induced=induced, run=run))
+            assert len(found) == embeddings
+            assert found == expected
+
+def test_resumes_across_chunks_and_counts(monkeypatch):
+    monkeypatch.setattr(native, "CHUNK_STATES", 3)
+    G = nx.complete_graph(6)
+    H = nx.path_graph(3)
+    target, pattern, order, domains = prepare_search(G, H)
+    stats = SearchStats()
+
+    # Expected: Small chunks lose nothing, counts add up, stats match ri_search
+    assert len(list(native.native_search(target, pattern, order, domains, run=native.run_kernel))) == 120
+    assert sum(native.native_search(target, pattern, order, domains, count=True, stats=stats,
+                                    run=native.run_kernel)) == 120
+    assert stats.accepted == [6, 30, 120]
+    assert stats.embeddings == 120
+
+    # Expected: So do the short calls made while a deadline is watched
+    monkeypatch.setattr(native, "CHECK_STATES", 2)
+    monkeypatch.setattr(native, "CHECK_CANDIDATES", 1)
+    assert len(list(native.native_search(target, pattern, order, domains, deadline=perf_counter() + 60,
+                                         run=native.run_kernel))) == 120
+
+def test_deadline_checked_while_rejecting_candidates():
+    # Only the last of 20000 leaves has a "y" edge, so the scan of the centre's row rejects the others
+    G = nx.star_graph(20000)
+    nx.set_edge_attributes(G, "x", "kind")
+    G[0][20000]["kind"] = "y"
+    H = nx.Graph([("a", "b", {"kind": "y"})])
+    target, pattern, order, domains = prepare_search(G, H, edge_label="kind")
+    stats = SearchStats()
+
+    # Expected: A passed deadline stops the scan after one chunk of candidates
+    assert not list(native.native_search(target, pattern, order, domains, deadline=perf_counter() - 1,
+                                         stats=stats, run=native.run_kernel))
+    assert stats.tried[1] == native.CHECK_CANDIDATES
+
+def test_selected_when_available(monkeypatch):
+    calls = []
+    def kernel(*args):
+        calls.append(args)
+        return native.run_kernel(*args)
+    monkeypatch.setattr(native, "kernel", kernel)
+
+    # Expected: The matchers use the kernel when it is available, except for edge_match
+    G = nx.petersen_graph()
+    assert bonnici_giugno_subgraph_isomorphism(G, nx.cycle_graph(5)) is not None
+    assert calls
+    calls.clear()
+    assert bonnici_giugno_subgraph_isomorphism(G, nx.cycle_graph(5), edge_match=lambda g, h: True) is not None
+    assert not calls
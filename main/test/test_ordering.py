@@ -0,0 +1,60 @@
+import pytest
+import networkx as nx
+import os
+import sys
+
+# Add the parent directory to sys.path, import the orderings to be tested
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bonnici_giugno import bonnici_giugno_subgraph_isomorphism, count_subgraph_isomorphisms
+from compiled_graph import CompiledTarget
+from domains import compute_domains
+from ordering import ORDERINGS, bfs_order, domain_order, matching_order
+
+def prepared(G, H, node_label=None):
+    target, pattern = CompiledTarget(G, node_label), CompiledTarget(H, node_label)
+    return pattern, target, compute_domains(target, pattern)
+
+@pytest.mark.parametrize("name", sorted(ORDERINGS))
+def test_every_ordering_is_a_permutation_with_same_results(name):
+    G = nx.barabasi_albert_graph(30, 2, seed=4)
+    H = nx.cycle_graph(5)
+    H.add_edges_from([(0, 5), (5, 6)])
+
+    # Expected: Each strategy lists every node once and finds the same embeddings
+    pattern, target, domains = prepared(G, H)
+    order = matching_order(H, pattern, target, domains, name)
+    assert sorted(order) == list(range(len(H)))
+    assert count_subgraph_isomorphisms(G, H, ordering=name) == count_subgraph_isomorphisms(G, H)
+
+def test_bfs_starts_from_rarest_label():
+    G = nx.path_graph(10)
+    nx.set_node_attributes(G, {v: "common" for v in G}, "kind")
+    G.nodes[4]["kind"] = "rare"
+    H = nx.path_graph(["a", "b", "c"])
+    nx.set_node_attributes(H, {"a": "common", "b": "common", "c": "rare"}, "kind")
+
+    # Expected: The rare end of the path is ordered first, then its neighbor
+    pattern, target, domains = prepared(G, H, "kind")
+    assert bfs_order(H, pattern, target, domains)[:2] == ["c", "b"]
+
+def test_domain_order_starts_from_smallest_domain():
+    # A star in G has one center, many leaves
+    G = nx.star_graph(20)
+    H = nx.path_graph(3)
+
+    # Expected: The middle of the path can only go to the center, so it comes first
+    pattern, target, domains = prepared(G, H)
+    assert domain_order(H, pattern, target, domains)[0] == 1
+
+def test_custom_ordering_callable():
+    G = nx.complete_graph(6)
+    H = nx.complete_graph(3)
+    reverse = lambda H, pattern, target, domains: sorted(H.nodes, reverse=True)
+
+    # Expected: Any permutation works; invalid ones are rejected
+    assert bonnici_giugno_subgraph_isomorphism(G, H, ordering=reverse) is not None
+    with pytest.raises(ValueError):
+        bonnici_giugno_subgraph_isomorphism(G, H, ordering=lambda *args: [0, 1])
+    with pytest.raises(ValueError):
+        bonnici_giugno_subgraph_isomorphism(G, H, ordering="nope")
@@ -0,0 +1,95 @@
+import pytest
+import networkx as nx
+import os
+import sys
+
+# Add the parent directory to sys.path, import the algorithm to be tested
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parallel
+from bonnici_giugno import bonnici_giugno_subgraph_isomorphism, count_subgraph_isomorphisms, iter_subgraph_isomorphisms
+
+def test_parallel_first_match():
+    G = nx.fast_gnp_random_graph(40, 0.2, seed=3)
+    H = nx.cycle_graph(5)
+
+    # Expected: Some worker finds a valid mapping
+    mapping = bonnici_giugno_subgraph_isomorphism(G, H, workers=2)
+    assert mapping is not None
+    assert set(H.nodes) == set(mapping.keys())
+    assert all(G.has_edge(mapping[u], mapping[v]) for u, v in H.edges)
+
+def test_parallel_no_match():
+    G = nx.fast_gnp_random_graph(40, 0.2, seed=3)
+    H = nx.complete_graph(9)
+
+    # Expected: No isomorphism exists
+    assert bonnici_giugno_subgraph_isomorphism(G, H, parallel=True, workers=2) is None
+
+def test_parallel_first_match_cancels_remaining_work():
+    # Enumerating everything here would take far too long
+    G = nx.complete_graph(30)
+    H = nx.path_graph(10)
+
+    # Expected: Returns as soon as one worker succeeds
+    mapping = bonnici_giugno_subgraph_isomorphism(G, H, workers=2)
+    assert mapping is not None
+
+def test_parallel_enumeration_with_subtree_splitting(monkeypatch):
+    # Tiny split budget, so most subtrees are handed back and redistributed
+    monkeypatch.setattr(parallel, "SPLIT_STATES", 50)
+    G = nx.fast_gnp_random_graph(30, 0.25, seed=5)
+    H = nx.cycle_graph(4)
+
+    # Expected: Same embeddings as the sequential search
+    expected = {tuple(sorted(m.items())) for m in iter_subgraph_isomorphisms(G, H)}
+    found = [tuple(sorted(m.items())) for m in iter_subgraph_isomorphisms(G, H, workers=2)]
+    assert len(found) == len(expected)
+    assert set(found) == expected
+    assert count_subgraph_isomorphisms(G, H, workers=2) == len(expected)
+    assert count_subgraph_isomorphisms(G, H, workers=2, symmetry_breaking=True) == len(expected) // 8
+    induced = count_subgraph_isomorphisms(G, H, mode="induced")
+    assert count_subgraph_isomorphisms(G, H, workers=2, mode="induced") == induced
+
+def test_parallel_directed_target():
+    G = nx.gnp_random_graph(25, 0.2, seed=8, directed=True)
+    H = nx.DiGraph([(0, 1), (1, 2), (2, 0)])
+
+    # Expected: Workers see the arc directions of the shared target
+    assert count_subgraph_isomorphisms(G, H, workers=2) == count_subgraph_isomorphisms(G, H)
+
+def test_parallel_mapped_target(tmp_path):
+    from graph_file import open_graph, write_graph
+    G = nx.fast_gnp_random_graph(30, 0.25, seed=6)
+    H = nx.cycle_graph(4)
+    path = tmp_path / "g.bin"
+    write_graph(path, G)
+
+    # Expected: Workers map the file themselves and find the same embeddings
+    assert count_subgraph_isomorphisms(open_graph(path), H, workers=2) == count_subgraph_isomorphisms(G, H)
+
+def test_parallel_layouts():
+    from compiled_graph import CompiledTarget
+    G = nx.fast_gnp_random_graph(40, 0.3, seed=4)
+    H = nx.cycle_graph(4)
+    expected = count_subgraph_isomorphisms(G, H)
+
+    # Expected: Workers search with the layout of the shared target and agree with each other
+    for layout in ("sets", "csr", "bits"):
+        assert count_subgraph_isomorphisms(CompiledTarget(G, layout=layout), H, workers=2) == expected
+
+def test_searches_share_a_pool():
+    from bonnici_giugno import prepare_search
+    from matcher import SubgraphMatcher
+    G = nx.fast_gnp_random_graph(40, 0.3, seed=4)
+
+    # Expected: Several searches run on one matcher pool; leaving one early leaves the pool usable
+    with SubgraphMatcher(G) as matcher:
+        pool = matcher.pool(2)
+        for H in (nx.cycle_graph(4), nx.path_graph(4)):
+            target, pattern, order, domains = prepare_search(matcher.target, H)
+            search = parallel.parallel_search(target, pattern, order, domains, mode="count", pool=pool)
+            assert sum(search) == count_subgraph_isomorphisms(G, H)
+            search = parallel.parallel_search(target, pattern, order, domains, pool=pool)
+            assert next(search)
+            search.close()
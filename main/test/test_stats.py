@@ -0,0 +1,52 @@
+import pytest
+import networkx as nx
+import json
+import os
+import sys
+
+# Add the parent directory to sys.path, import the structure to be tested
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bonnici_giugno import bonnici_giugno_subgraph_isomorphism, count_subgraph_isomorphisms
+from naive_backtracking import naive_subgraph_isomorphism
+from stats import SearchStats
+
+def test_ri_stats_per_depth():
+    G = nx.cycle_graph(8)
+    H = nx.path_graph(4)
+    stats = SearchStats()
+
+    # Expected: One accepted state per depth on the way to the first mapping, all phases timed
+    assert bonnici_giugno_subgraph_isomorphism(G, H, stats=stats) is not None
+    assert len(stats.accepted) == 4
+    assert all(count >= 1 for count in stats.accepted)
+    assert all(tried >= accepted for tried, accepted in zip(stats.tried, stats.accepted))
+    assert stats.embeddings == 1
+    assert set(stats.phases) == {"compile", "domains", "ordering", "search"}
+
+def test_counting_all_embeddings():
+    G = nx.complete_graph(5)
+    H = nx.path_graph(3)
+    stats = SearchStats()
+
+    # Expected: Every state at the last depth is an embedding; branching follows K5
+    assert count_subgraph_isomorphisms(G, H, stats=stats) == 60
+    assert stats.accepted == [5, 20, 60]
+    assert stats.branching() == [5.0, 4.0, 3.0]
+    assert stats.embeddings == 60
+    assert stats.states == 85
+
+def test_naive_stats_and_json_export():
+    G = nx.cycle_graph(5)
+    H = nx.complete_graph(3)
+    stats = SearchStats()
+
+    # Expected: Partial assignments are rejected at the depth where an edge goes missing
+    assert naive_subgraph_isomorphism(G, H, stats=stats) is None
+    assert stats.tried == [5, 20, 30]
+    assert stats.accepted == [5, 10, 0]
+    assert stats.rejected == {"edges": 40}
+    exported = json.loads(stats.to_json())
+    assert exported["states"] == 15
+    assert exported["embeddings"] == 0
+    assert "search" in exported["phases"]